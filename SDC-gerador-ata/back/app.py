@@ -245,13 +245,18 @@ def gerar_ata_completa_endpoint():
         logger.info(f"Participantes: {participantes}")
         logger.info(f"Transcrição: {len(transcricao)} caracteres")
 
-        if not ollama_service.check_health():
+        # Status em cache; com o circuito aberto falha na hora, sem esperar timeouts
+        if not ollama_service.health.is_available():
             logger.error("Ollama não está disponível")
-            return jsonify({
+            retry_after = ollama_service.health.retry_after()
+            response = jsonify({
                 'status': 'erro',
                 'mensagem': 'Serviço de IA (Ollama) não está disponível',
                 'detalhes': 'Verifique se o Ollama está rodando: ollama serve'
-            }), 503
+            })
+            if retry_after:
+                response.headers['Retry-After'] = str(int(retry_after) + 1)
+            return response, 503
 
         try:
             toon_string, dados_estruturados = ollama_service.gerar_toon_from_dados(
@@ -306,15 +311,16 @@ def gerar_ata_completa_endpoint():
 
 @app.route('/api/ollama/status', methods=['GET'])
 def ollama_status():
-    """Verifica status do serviço Ollama"""
-    is_online = ollama_service.check_health()
+    """Verifica status do serviço Ollama (status em cache + estado do circuit breaker)"""
+    is_online = ollama_service.health.is_available()
     modelos = ollama_service.list_models() if is_online else []
 
     return jsonify({
         'status': 'online' if is_online else 'offline',
         'modelo_configurado': config.OLLAMA_MODEL,
         'modelos_disponiveis': modelos,
-        'url': config.OLLAMA_BASE_URL
+        'url': config.OLLAMA_BASE_URL,
+        'saude': ollama_service.health.status()
     }), 200 if is_online else 503
 
 
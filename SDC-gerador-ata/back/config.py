@@ -41,6 +41,14 @@ OLLAMA_TIMEOUT = 600  # 15 minutos (suporta reuniões longas de +1h)
 OLLAMA_TEMPERATURE = 0.1
 OLLAMA_MAX_TOKENS = 4096
 OLLAMA_TOP_P = 0.9 
+# Pool de conexões keep-alive com o Ollama (compartilhado entre as threads do waitress)
+OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', '8'))
+OLLAMA_RETRIES = int(os.environ.get('OLLAMA_RETRIES', '2'))  # só falhas de conexão e GETs com 502/503/504
+OLLAMA_RETRY_BACKOFF = 0.5
+# Saúde do Ollama: cache do status + circuit breaker (estado em memória)
+OLLAMA_HEALTH_TTL = 30          # segundos em que um health check OK é reaproveitado
+OLLAMA_BREAKER_THRESHOLD = 3    # falhas consecutivas para abrir o circuito
+OLLAMA_BREAKER_COOLDOWN = 30    # segundos com o circuito aberto antes de sondar de novo
 
 # CORS - Adicionar origem do frontend Transcreve
 CORS_ORIGINS = [
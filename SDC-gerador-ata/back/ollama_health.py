@@ -0,0 +1,192 @@
+"""
+Monitor de saúde do Ollama com cache e circuit breaker
+SDC-Ata-Generator
+
+- Cache: uma verificação bem-sucedida vale por HEALTH_TTL segundos; dentro
+  desse intervalo as requisições não fazem o round trip ao /api/tags.
+- Circuit breaker: após BREAKER_THRESHOLD falhas consecutivas (verificação
+  ou conexão durante a geração) o circuito abre e as requisições falham na
+  hora, sem esperar timeouts de conexão.
+- Half-open: passado BREAKER_COOLDOWN, uma única verificação é liberada; se
+  passar o circuito fecha, se falhar abre de novo por mais um cooldown.
+- Com state_file, cada leitura-modificação-escrita do estado roda sob um
+  flock em <state_file>.lock, para que processos concorrentes não percam
+  falhas nem liberem duas sondagens no half-open.
+
+Na API Flask o processo é único e o estado fica em memória, compartilhado
+entre as threads do waitress; state_file permite persistir em arquivo
+quando há mais de um processo.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class OllamaHealthMonitor:
+    """Status do Ollama em cache + circuit breaker (estado opcionalmente em arquivo)"""
+
+    def __init__(self, probe: Callable[[], bool], state_file: Optional[str] = None,
+                 ttl: float = 30.0, threshold: int = 3, cooldown: float = 30.0,
+                 probe_timeout: float = 15.0):
+        self.probe = probe
+        self.state_file = state_file
+        self.ttl = ttl
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._memory = self._initial_state()
+
+    @staticmethod
+    def _initial_state() -> dict:
+        return {
+            'state': CLOSED,
+            'failures': 0,
+            'opened_at': None,
+            'probe_started_at': None,
+            'last_check': None,
+            'last_ok': None,
+            'last_error': None,
+        }
+
+    def _load(self) -> dict:
+        if not self.state_file:
+            return dict(self._memory)
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return dict(self._initial_state(), **json.load(f))
+        except (OSError, ValueError):
+            return self._initial_state()
+
+    @contextmanager
+    def _locked(self):
+        """Lock entre threads e, com state_file, entre processos"""
+        with self._lock:
+            lock_file = None
+            if self.state_file and fcntl is not None:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.state_file)), exist_ok=True)
+                    lock_file = open(self.state_file + '.lock', 'a')
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                except OSError as e:
+                    logger.warning(f"⚠️ Não foi possível travar o estado de saúde do Ollama: {e}")
+                    if lock_file is not None:
+                        lock_file.close()
+                        lock_file = None
+            try:
+                yield
+            finally:
+                if lock_file is not None:
+                    lock_file.close()  # fechar libera o flock
+
+    def _save(self, state: dict) -> None:
+        if not self.state_file:
+            self._memory = state
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.state_file))
+            os.makedirs(directory, exist_ok=True)
+            # Escrita atômica: outro processo nunca lê o arquivo pela metade
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ollama_health_')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar o estado de saúde do Ollama: {e}")
+
+    def is_available(self) -> bool:
+        """
+        True se a requisição pode seguir para o Ollama
+
+        Usa o cache quando válido, falha na hora com o circuito aberto e
+        libera uma única verificação quando o cooldown termina.
+        """
+        now = time.time()
+        with self._locked():
+            state = self._load()
+
+            if state['state'] == OPEN:
+                if now - state['opened_at'] < self.cooldown:
+                    return False
+                state['state'] = HALF_OPEN
+                state['probe_started_at'] = now
+                self._save(state)
+                logger.info("🔌 Circuito do Ollama semiaberto: sondando")
+            elif state['state'] == HALF_OPEN:
+                # Outra requisição já está sondando; se ela travou, esta assume
+                if now - (state['probe_started_at'] or 0) < self.probe_timeout:
+                    return False
+                state['probe_started_at'] = now
+                self._save(state)
+            elif state['last_ok'] and now - state['last_ok'] < self.ttl:
+                return True
+
+        if self.probe():
+            self.record_success()
+            return True
+        self.record_failure('falha na verificação de saúde')
+        return False
+
+    def record_success(self) -> None:
+        with self._locked():
+            state = self._load()
+            if state['state'] != CLOSED:
+                logger.info("✅ Circuito do Ollama fechado")
+            now = time.time()
+            state.update(state=CLOSED, failures=0, opened_at=None, probe_started_at=None,
+                         last_check=now, last_ok=now, last_error=None)
+            self._save(state)
+
+    def record_failure(self, error: str) -> None:
+        with self._locked():
+            state = self._load()
+            now = time.time()
+            state['failures'] += 1
+            state['last_check'] = now
+            state['last_ok'] = None
+            state['last_error'] = error
+            # Falha no half-open reabre direto; fechado abre no limiar
+            if state['state'] == HALF_OPEN or state['failures'] >= self.threshold:
+                if state['state'] != OPEN:
+                    logger.warning(f"🚫 Circuito do Ollama aberto após {state['failures']} falhas "
+                                   f"(nova tentativa em {self.cooldown:.0f}s): {error}")
+                state.update(state=OPEN, opened_at=now, probe_started_at=None)
+            self._save(state)
+
+    def retry_after(self) -> float:
+        """Segundos até a próxima sondagem (0 se o circuito não está aberto)"""
+        state = self._load()
+        if state['state'] != OPEN:
+            return 0.0
+        return max(0.0, self.cooldown - (time.time() - state['opened_at']))
+
+    def status(self) -> dict:
+        """Estado do circuito para o endpoint /api/ollama/status"""
+        state = self._load()
+        now = time.time()
+        return {
+            'circuito': state['state'],
+            'falhas_consecutivas': state['failures'],
+            'ultimo_erro': state['last_error'],
+            'cache_valido': bool(state['state'] == CLOSED and state['last_ok']
+                                 and now - state['last_ok'] < self.ttl),
+            'segundos_desde_verificacao': round(now - state['last_check'], 1) if state['last_check'] else None,
+            'proxima_sondagem_em': round(self.retry_after(), 1),
+        }
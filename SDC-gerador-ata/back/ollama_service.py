@@ -5,12 +5,16 @@ SDC-Ata-Generator
 
 import requests
 import logging
+import threading
 import time
 from typing import Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import config
 from prompts import criar_prompt_geracao_ata, criar_prompt_correcao_toon
 from toon_parser import parse_toon, TOONParserError
+from ollama_health import OllamaHealthMonitor
 
 
 logger = logging.getLogger(__name__)
@@ -32,10 +36,50 @@ class OllamaService:
         self.max_tokens = config.OLLAMA_MAX_TOKENS
         self.top_p = config.OLLAMA_TOP_P
 
+        # Um adapter (pool urllib3, thread-safe) compartilhado pelas sessões
+        # de cada thread do waitress: conexões keep-alive reaproveitadas
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.OLLAMA_POOL_SIZE,
+            max_retries=Retry(
+                total=config.OLLAMA_RETRIES,
+                connect=config.OLLAMA_RETRIES,
+                read=0,  # nunca repetir uma geração que já chegou ao Ollama
+                status=config.OLLAMA_RETRIES,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                backoff_factor=config.OLLAMA_RETRY_BACKOFF,
+                raise_on_status=False,
+            ),
+        )
+        self._local = threading.local()
+
+        self.health = OllamaHealthMonitor(
+            self.check_health,
+            ttl=config.OLLAMA_HEALTH_TTL,
+            threshold=config.OLLAMA_BREAKER_THRESHOLD,
+            cooldown=config.OLLAMA_BREAKER_COOLDOWN,
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """Sessão da thread atual (requests.Session não é thread-safe; o pool é compartilhado)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+
+    def close(self) -> None:
+        """Fecha as conexões do pool"""
+        self._adapter.close()
+
     def check_health(self) -> bool:
         """Verifica se Ollama está online"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except Exception as e:
             logger.warning(f"Ollama não disponível: {e}")
@@ -44,7 +88,7 @@ class OllamaService:
     def list_models(self) -> list:
         """Lista modelos disponíveis no Ollama"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=10)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return [model['name'] for model in data.get('models', [])]
@@ -84,7 +128,7 @@ class OllamaService:
             start_time = time.time()
             logger.info("⏱️  Enviando requisição para Ollama...")
 
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json=payload,
                 timeout=self.timeout
@@ -98,6 +142,7 @@ class OllamaService:
                 raise OllamaServiceError(
                     f"Ollama retornou status {response.status_code}: {response.text}"
                 )
+            self.health.record_success()
 
             data = response.json()
             generated_text = data.get('response', '')
@@ -136,10 +181,13 @@ class OllamaService:
             return generated_text.strip()
 
         except requests.exceptions.Timeout:
+            # Ollama travado (runner preso, fila cheia) conta para o circuit breaker
+            self.health.record_failure(f"Timeout ({self.timeout}s)")
             raise OllamaServiceError(
                 f"Timeout ao aguardar resposta do Ollama ({self.timeout}s)"
             )
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.ConnectionError as e:
+            self.health.record_failure(str(e))
             raise OllamaServiceError(
                 f"Não foi possível conectar ao Ollama em {self.base_url}"
             )
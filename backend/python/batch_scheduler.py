@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-batching entre jobs para gravações curtas
+
+Cada job é dividido em janelas de 30 segundos (tamanho nativo do Whisper).
+As janelas de vários jobs concorrentes entram em uma fila única; um thread
+agrupa até `batch_size` janelas por inferência, respeitando um tempo máximo
+de espera (`max_wait`) medido a partir da janela mais antiga do lote.
+Os segmentos resultantes são roteados de volta ao job dono de cada janela.
+As janelas saem da fila pela prioridade do job (menor primeiro, ver
+job_scheduler.py) e, dentro da mesma prioridade, na ordem de chegada.
+
+A função de inferência é injetada (infer_batch), o que mantém o scheduler
+independente do modelo: ela recebe a lista de janelas e devolve, na mesma
+ordem, a lista de segmentos de cada janela (tempos relativos ao job).
+"""
+
+import sys
+import time
+import queue
+import itertools
+import threading
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30
+
+
+class BatchSchedulerError(Exception):
+    """Exceção para erros do scheduler de micro-batching"""
+    pass
+
+
+class Window:
+    """Janela de áudio (até 30s) pertencente a um job"""
+
+    __slots__ = ('job', 'index', 'offset', 'audio', 'enqueued_at')
+
+    def __init__(self, job, index, offset, audio):
+        self.job = job
+        self.index = index
+        self.offset = offset  # segundos desde o início do áudio do job
+        self.audio = audio
+        self.enqueued_at = 0.0
+
+
+class BatchJob:
+    """Estado de um job submetido ao scheduler"""
+
+    def __init__(self, job_id, total_windows, duration):
+        self.id = job_id
+        self.total_windows = total_windows
+        self.duration = duration
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self._results = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if total_windows == 0:
+            self._finish()
+
+    def _finish(self):
+        self.finished_at = time.time()
+        self._done.set()
+
+    def _deliver(self, window_index, segments):
+        with self._lock:
+            self._results[window_index] = segments
+            if len(self._results) == self.total_windows:
+                self._finish()
+
+    def _fail(self, error):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+        self._finish()
+
+    def wait(self, timeout=None):
+        """
+        Aguarda a conclusão do job
+
+        Returns:
+            Dict com text e segments (ordenados por tempo)
+        """
+        if not self._done.wait(timeout):
+            raise BatchSchedulerError(f"Timeout waiting for job {self.id}")
+        if self.error is not None:
+            raise BatchSchedulerError(f"Job {self.id} failed: {self.error}")
+
+        segments = []
+        for index in range(self.total_windows):
+            segments.extend(self._results.get(index, []))
+
+        text = " ".join(seg['text'].strip() for seg in segments if seg['text'].strip())
+        return {
+            'text': text,
+            'segments': segments,
+        }
+
+
+class MicroBatchScheduler:
+    """Agrupa janelas de jobs concorrentes em lotes de inferência compartilhados"""
+
+    def __init__(self, infer_batch, batch_size=8, max_wait=0.5, on_window=None):
+        """
+        Args:
+            infer_batch: função(list[Window]) -> list[list[dict]]
+            batch_size: máximo de janelas por inferência
+            max_wait: espera máxima (s) da janela mais antiga antes de disparar o lote
+            on_window: função(job_id, índice, segmentos) chamada a cada janela concluída
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.infer_batch = infer_batch
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.on_window = on_window
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._thread = None
+        self._running = False
+        self.stats = {
+            'batches': 0,
+            'windows': 0,
+            'jobs': 0,
+            'max_queue_wait': 0.0,
+        }
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Para o thread após drenar o lote atual"""
+        if not self._running:
+            return
+        self._running = False
+        self._put(None, float('inf'))
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _put(self, window, priority):
+        self._queue.put((priority, next(self._seq), window))
+
+    def _get(self, timeout=None, block=True):
+        return self._queue.get(block=block, timeout=timeout)[2]
+
+    def submit(self, job_id, audio, sample_rate=SAMPLE_RATE, priority=0.0, completed=None):
+        """
+        Divide o áudio (np.ndarray float32, mono) em janelas e as enfileira
+
+        priority: menor sai primeiro (com o mesmo valor para todos, FIFO)
+        completed: {índice: segmentos} de janelas já concluídas (retomada),
+                   que não são enfileiradas de novo
+
+        Returns:
+            BatchJob (use job.wait() para obter o resultado)
+        """
+        if not self._running:
+            raise BatchSchedulerError("Scheduler is not running")
+
+        window_samples = WINDOW_SECONDS * sample_rate
+        total_samples = len(audio)
+        starts = list(range(0, total_samples, window_samples))
+
+        job = BatchJob(job_id, len(starts), total_samples / sample_rate)
+        self.stats['jobs'] += 1
+
+        completed = completed or {}
+        now = time.time()
+        for index, start in enumerate(starts):
+            if index in completed:
+                job._deliver(index, completed[index])
+                continue
+            window = Window(job, index, start / sample_rate, audio[start:start + window_samples])
+            window.enqueued_at = now
+            self._put(window, priority)
+
+        return job
+
+    def _collect_batch(self, first):
+        """Coleta janelas até encher o lote ou estourar o prazo da mais antiga"""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    window = self._get(timeout=remaining)
+                else:
+                    window = self._get(block=False)
+            except queue.Empty:
+                break
+            if window is None:
+                # Sinal de parada: processar o que já foi coletado
+                self._running = False
+                break
+            batch.append(window)
+        return batch
+
+    def _loop(self):
+        while self._running or not self._queue.empty():
+            window = self._get()
+            if window is None:
+                continue
+
+            batch = self._collect_batch(window)
+            # Janelas de jobs já falhos não precisam ser inferidas
+            batch = [w for w in batch if w.job.error is None]
+            if not batch:
+                continue
+
+            waited = time.time() - batch[0].enqueued_at
+            self.stats['max_queue_wait'] = max(self.stats['max_queue_wait'], waited)
+
+            try:
+                results = self.infer_batch(batch)
+            except Exception as e:
+                print(f"❌ Batch inference failed ({len(batch)} windows): {e}", file=sys.stderr)
+                for w in batch:
+                    w.job._fail(str(e))
+                continue
+
+            self.stats['batches'] += 1
+            self.stats['windows'] += len(batch)
+
+            for w, segments in zip(batch, results):
+                if self.on_window is not None:
+                    try:
+                        self.on_window(w.job.id, w.index, segments)
+                    except Exception as e:
+                        print(f"⚠️ on_window callback failed for job {w.job.id}: {e}", file=sys.stderr)
+                w.job._deliver(w.index, segments)
+
+    def summary(self):
+        """Estatísticas agregadas (ocupação média dos lotes etc.)"""
+        batches = self.stats['batches']
+        return dict(self.stats, avg_batch_fill=(self.stats['windows'] / batches) if batches else 0.0)
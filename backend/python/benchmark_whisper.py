@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de decodificação (RTF, pico de memória e WER)
+
+Mede cada combinação de model_size x compute_type x beam_size x
+condition_on_previous_text sobre um corpus local de fixtures e gera:
+
+    - relatório comparativo (JSON + Markdown)
+    - tabela de tiers para get_whisper_options (whisper_tiers.json)
+
+Corpus: um diretório com arquivos de áudio e, ao lado de cada um, a
+transcrição de referência com o mesmo nome e extensão .txt:
+
+    fixtures/
+        reuniao_curta.wav
+        reuniao_curta.txt
+
+Cada combinação roda em um processo separado, para que o pico de RSS medido
+seja só daquela combinação (o modelo carregado entra na medição).
+
+Uso via CLI:
+    python benchmark_whisper.py run --corpus fixtures --models small,medium \\
+        --compute-types int8,int8_float32 --beam-sizes 1,3,5 --output bench.json
+    python benchmark_whisper.py report bench.json
+    python benchmark_whisper.py tiers bench.json --model medium --compute-type int8
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+from datetime import datetime
+
+from whisper_tiers import DEFAULT_TIERS, TIERS_FILE, save_tiers
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.ogg', '.flac', '.aac', '.opus')
+
+# RTF máximo aceito em cada tier (áudios longos precisam de decodificação mais barata)
+DEFAULT_RTF_BUDGETS = {0: 1.0, 600: 0.5, 1800: 0.3, 3600: 0.2}
+# Diferenças de WER abaixo disso são consideradas empate (vence o menor RTF)
+WER_TOLERANCE = 0.005
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def parse_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'sim')
+
+
+def parse_budgets(value):
+    """'0:1.0,600:0.5' -> {0: 1.0, 600: 0.5}"""
+    budgets = {}
+    for item in parse_list(value):
+        duration, rtf = item.split(':', 1)
+        budgets[int(duration)] = float(rtf)
+    return budgets
+
+
+def normalize_words(text):
+    """Minúsculas, sem pontuação (acentos preservados)"""
+    return re.sub(r'[^\w\s]', ' ', text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """
+    Distância de edição em palavras (substituições + inserções + remoções)
+
+    Returns:
+        (erros, palavras na referência)
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1,
+                             current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def discover_corpus(corpus_dir):
+    """Pares (áudio, texto de referência) do corpus"""
+    fixtures = []
+    for name in sorted(os.listdir(corpus_dir)):
+        base, ext = os.path.splitext(name)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference_path = os.path.join(corpus_dir, base + '.txt')
+        if not os.path.exists(reference_path):
+            print(f"⚠️ Skipping {name}: no reference {base}.txt", file=sys.stderr)
+            continue
+        with open(reference_path, 'r', encoding='utf-8') as f:
+            fixtures.append((os.path.join(corpus_dir, name), f.read()))
+    return fixtures
+
+
+def measure(args):
+    """Executa uma combinação (processo filho) e imprime o resultado em JSON"""
+    from model_registry import load_whisper_model
+    from run_metrics import peak_rss_mb
+
+    condition = parse_bool(args.condition)
+    start = time.perf_counter()
+    model, compute_type = load_whisper_model(
+        args.model, compute_type=args.compute_type, cpu_threads=args.cpu_threads)
+    load_time = time.perf_counter() - start
+
+    files = []
+    for audio_path, reference in discover_corpus(args.corpus):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            segments, info = model.transcribe(
+                audio_path,
+                language='pt',
+                beam_size=args.beam_size,
+                condition_on_previous_text=condition,
+                temperature=0.0,
+            )
+            text = ' '.join(segment.text.strip() for segment in segments)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        errors, words = word_errors(reference, text)
+        files.append({
+            'file': os.path.basename(audio_path),
+            'duration': round(info.duration, 2),
+            'decode_time': round(best, 3),
+            'rtf': round(best / info.duration, 4) if info.duration else None,
+            'errors': errors,
+            'reference_words': words,
+            'wer': round(errors / words, 4) if words else None,
+        })
+
+    print(json.dumps({
+        'model_size': args.model,
+        'compute_type': compute_type,
+        'beam_size': args.beam_size,
+        'condition_on_previous_text': condition,
+        'load_time': round(load_time, 2),
+        'peak_rss_mb': round(peak_rss_mb() or 0.0, 1),
+        'files': files,
+    }))
+
+
+def aggregate(combo):
+    """RTF e WER da combinação sobre o corpus inteiro (ponderados)"""
+    files = combo['files']
+    duration = sum(f['duration'] for f in files)
+    decode = sum(f['decode_time'] for f in files)
+    errors = sum(f['errors'] for f in files)
+    words = sum(f['reference_words'] for f in files)
+    combo['audio_seconds'] = round(duration, 2)
+    combo['rtf'] = round(decode / duration, 4) if duration else None
+    combo['wer'] = round(errors / words, 4) if words else None
+    return combo
+
+
+def run(args):
+    fixtures = discover_corpus(args.corpus)
+    if not fixtures:
+        print(f"❌ No fixtures (audio + .txt reference) in {args.corpus}", file=sys.stderr)
+        sys.exit(1)
+    print(f"📂 {len(fixtures)} fixtures in {args.corpus}", file=sys.stderr)
+
+    combos = list(itertools.product(
+        parse_list(args.models),
+        parse_list(args.compute_types),
+        parse_list(args.beam_sizes, int),
+        parse_list(args.conditions, parse_bool),
+    ))
+    results = []
+    for index, (model, compute_type, beam_size, condition) in enumerate(combos, 1):
+        label = f"{model}/{compute_type}/beam={beam_size}/condition={condition}"
+        print(f"⏱️ [{index}/{len(combos)}] {label}", file=sys.stderr)
+        command = [
+            sys.executable, os.path.abspath(__file__), 'measure',
+            '--corpus', args.corpus,
+            '--model', model,
+            '--compute-type', compute_type,
+            '--beam-size', str(beam_size),
+            '--condition', str(condition).lower(),
+            '--cpu-threads', str(args.cpu_threads),
+            '--repeat', str(args.repeat),
+        ]
+        completed = subprocess.run(command, stdout=subprocess.PIPE, text=True, encoding='utf-8')
+        if completed.returncode != 0:
+            print(f"❌ {label} failed (exit {completed.returncode})", file=sys.stderr)
+            results.append({'model_size': model, 'compute_type': compute_type,
+                            'beam_size': beam_size, 'condition_on_previous_text': condition,
+                            'error': f"exit code {completed.returncode}"})
+            continue
+        combo = aggregate(json.loads(completed.stdout.strip().splitlines()[-1]))
+        print(f"   RTF {combo['rtf']}  WER {combo['wer']}  peak {combo['peak_rss_mb']}MB", file=sys.stderr)
+        results.append(combo)
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'corpus': os.path.abspath(args.corpus),
+        'fixtures': [os.path.basename(path) for path, _ in fixtures],
+        'cpu_threads': args.cpu_threads,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    markdown_path = os.path.splitext(args.output)[0] + '.md'
+    with open(markdown_path, 'w', encoding='utf-8') as f:
+        f.write(render_markdown(report))
+    print(f"📊 Report: {args.output}, {markdown_path}", file=sys.stderr)
+
+
+def render_markdown(report):
+    """Tabela comparativa ordenada por modelo, compute_type e RTF"""
+    lines = [
+        f"# Whisper benchmark ({report['generated_at']})",
+        '',
+        f"Corpus: `{report['corpus']}` ({len(report['fixtures'])} fixtures), "
+        f"cpu_threads={report['cpu_threads']}",
+        '',
+        '| model | compute_type | beam | condition | RTF | WER | peak RSS (MB) | load (s) |',
+        '|---|---|---|---|---|---|---|---|',
+    ]
+    ok = [r for r in report['results'] if 'error' not in r]
+    for r in sorted(ok, key=lambda r: (r['model_size'], r['compute_type'], r['rtf'] or 0)):
+        wer = f"{r['wer']:.2%}" if r['wer'] is not None else '-'
+        lines.append(f"| {r['model_size']} | {r['compute_type']} | {r['beam_size']} | "
+                     f"{r['condition_on_previous_text']} | {r['rtf']} | {wer} | "
+                     f"{r['peak_rss_mb']} | {r['load_time']} |")
+    for r in report['results']:
+        if 'error' in r:
+            lines.append(f"| {r['model_size']} | {r['compute_type']} | {r['beam_size']} | "
+                         f"{r['condition_on_previous_text']} | failed: {r['error']} | | | |")
+    return '\n'.join(lines) + '\n'
+
+
+def choose_tiers(results, budgets):
+    """
+    Para cada tier, a combinação de menor WER dentro do RTF do tier
+
+    Se nenhuma combinação cabe no orçamento, usa a mais rápida. Em empate de
+    RTF vale o condition_on_previous_text da tabela padrão: fixtures curtas não
+    mostram os loops que motivaram desligá-lo em áudios longos.
+    """
+    defaults = {tier['min_duration']: tier for tier in DEFAULT_TIERS}
+    tiers = []
+    for min_duration in sorted(budgets, reverse=True):
+        budget = budgets[min_duration]
+        default = defaults.get(min_duration, DEFAULT_TIERS[-1])
+        fitting = [r for r in results if r['rtf'] is not None and r['rtf'] <= budget]
+        if fitting:
+            best_wer = min(r['wer'] for r in fitting)
+            chosen = min((r for r in fitting if r['wer'] <= best_wer + WER_TOLERANCE),
+                         key=lambda r: (r['rtf'], r['condition_on_previous_text']
+                                        != default['condition_on_previous_text']))
+        else:
+            chosen = min(results, key=lambda r: r['rtf'])
+            print(f"⚠️ No combination within RTF {budget} for >= {min_duration}s, using fastest",
+                  file=sys.stderr)
+        tiers.append({
+            'min_duration': min_duration,
+            'config': default['config'] if min_duration in defaults else f"tier_{min_duration}",
+            'beam_size': chosen['beam_size'],
+            'condition_on_previous_text': chosen['condition_on_previous_text'],
+            'rtf': chosen['rtf'],
+            'wer': chosen['wer'],
+        })
+    return tiers
+
+
+def generate_tiers(args):
+    with open(args.report, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+
+    results = [r for r in report['results']
+               if 'error' not in r and r['rtf'] is not None and r['wer'] is not None
+               and r['model_size'] == args.model and r['compute_type'] == args.compute_type]
+    if not results:
+        print(f"❌ No successful results for {args.model}/{args.compute_type} in {args.report}",
+              file=sys.stderr)
+        sys.exit(1)
+
+    tiers = choose_tiers(results, parse_budgets(args.budgets))
+    print(json.dumps(tiers, indent=2))
+    if not args.dry_run:
+        path = save_tiers(args.output, tiers,
+                          generated_at=datetime.now().isoformat(timespec='seconds'),
+                          source=os.path.abspath(args.report),
+                          model_size=args.model,
+                          compute_type=args.compute_type)
+        print(f"✅ Tier table written to {path}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de RTF/WER do faster-whisper')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='Mede todas as combinações sobre o corpus')
+    run_parser.add_argument('--corpus', required=True, help='Diretório com áudios e referências .txt')
+    run_parser.add_argument('--models', default='small,medium')
+    run_parser.add_argument('--compute-types', default='int8')
+    run_parser.add_argument('--beam-sizes', default='1,3,5')
+    run_parser.add_argument('--conditions', default='true,false',
+                            help='Valores de condition_on_previous_text')
+    run_parser.add_argument('--cpu-threads', type=int, default=0)
+    run_parser.add_argument('--repeat', type=int, default=1, help='Execuções por arquivo (vale a melhor)')
+    run_parser.add_argument('--output', default='whisper_benchmark.json')
+
+    measure_parser = sub.add_parser('measure', help=argparse.SUPPRESS)
+    measure_parser.add_argument('--corpus', required=True)
+    measure_parser.add_argument('--model', required=True)
+    measure_parser.add_argument('--compute-type', required=True)
+    measure_parser.add_argument('--beam-size', type=int, required=True)
+    measure_parser.add_argument('--condition', default='true')
+    measure_parser.add_argument('--cpu-threads', type=int, default=0)
+    measure_parser.add_argument('--repeat', type=int, default=1)
+
+    report_parser = sub.add_parser('report', help='Reimprime o relatório Markdown')
+    report_parser.add_argument('report')
+
+    tiers_parser = sub.add_parser('tiers', help='Gera a tabela de tiers de get_whisper_options')
+    tiers_parser.add_argument('report')
+    tiers_parser.add_argument('--model', default='medium')
+    tiers_parser.add_argument('--compute-type', default='int8')
+    tiers_parser.add_argument('--budgets', default=','.join(f"{d}:{r}" for d, r in DEFAULT_RTF_BUDGETS.items()),
+                              help='Orçamento de RTF por tier (duração_mínima:rtf,...)')
+    tiers_parser.add_argument('--output', default=TIERS_FILE)
+    tiers_parser.add_argument('--dry-run', action='store_true', help='Só imprime a tabela')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'measure':
+        measure(args)
+    elif args.command == 'report':
+        with open(args.report, 'r', encoding='utf-8') as f:
+            print(render_markdown(json.load(f)))
+    else:
+        generate_tiers(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planejador de capacidade para transcrições concorrentes em um host CPU
+
+Lê núcleos disponíveis, RAM livre (respeitando limite de cgroup) e o
+footprint aproximado de cada modelo para dizer quantos jobs de cada tamanho
+cabem em paralelo, com quantos cpu_threads e em qual conjunto de núcleos
+(afinidade) cada slot deve rodar.
+
+Uso via CLI:
+    python capacity_planner.py                  # plano para todos os modelos
+    python capacity_planner.py --model medium   # plano de um modelo
+    python capacity_planner.py --model medium --slot 2   # threads/afinidade do slot 2
+
+O plano por slot (--slot, slot_assignment) é calculado sobre a RAM total do
+host/cgroup, para que todos os jobs vejam o mesmo conjunto de slots.
+
+O transcribe.py aplica o plano com --slot N (ou --cpu-threads/--cpu-affinity).
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# RSS aproximado (MB) do modelo carregado em CPU com int8
+MODEL_FOOTPRINT_MB = {
+    'tiny': 150,
+    'base': 250,
+    'small': 600,
+    'medium': 1500,
+    'large-v2': 3200,
+    'large-v3': 3200,
+    'large': 3200,
+}
+
+# Multiplicador de memória por compute_type (relativo a int8)
+COMPUTE_TYPE_FACTOR = {
+    'int8': 1.0,
+    'int8_float32': 1.3,
+    'int8_float16': 1.2,
+    'float16': 2.0,
+    'float32': 3.5,
+}
+
+# Threads por job a partir das quais o ganho do CTranslate2 fica marginal
+DEFAULT_THREADS_PER_JOB = {
+    'tiny': 2,
+    'base': 2,
+    'small': 3,
+    'medium': 4,
+    'large-v2': 6,
+    'large-v3': 6,
+    'large': 6,
+}
+
+JOB_OVERHEAD_MB = 400      # áudio decodificado, buffers do ffmpeg, interpretador
+RESERVED_MEMORY_MB = 1024  # Node.js, SO e folga
+RESERVED_CORES = 1         # núcleo para Node.js/ffmpeg quando há núcleos sobrando
+
+_SLOT_PLANS = {}           # (model_size, compute_type) -> plano de slot_plan
+
+
+def parse_cpu_list(spec):
+    """Converte '0-3,8,10-11' em [0, 1, 2, 3, 8, 10, 11]"""
+    cores = []
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cores.extend(range(int(first), int(last) + 1))
+        else:
+            cores.append(int(part))
+    return sorted(set(cores))
+
+
+def format_cpu_list(cores):
+    """Converte [0, 1, 2, 3, 8] em '0-3,8'"""
+    ranges = []
+    for core in sorted(cores):
+        if ranges and core == ranges[-1][1] + 1:
+            ranges[-1][1] = core
+        else:
+            ranges.append([core, core])
+    return ','.join(f"{a}-{b}" if a != b else str(a) for a, b in ranges)
+
+
+def available_cores():
+    """Núcleos que este processo pode usar (respeita taskset/cpuset)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _read_int(path):
+    try:
+        with open(path, 'r') as f:
+            value = f.read().strip()
+        return None if value == 'max' else int(value)
+    except (OSError, ValueError):
+        return None
+
+
+def _cgroup_memory():
+    """(limite, uso) em bytes do cgroup (v2 ou v1); limite None se não houver"""
+    limit = _read_int('/sys/fs/cgroup/memory.max')
+    usage = _read_int('/sys/fs/cgroup/memory.current')
+    if limit is None:
+        limit = _read_int('/sys/fs/cgroup/memory/memory.limit_in_bytes')
+        usage = _read_int('/sys/fs/cgroup/memory/memory.usage_in_bytes')
+        # cgroup v1 usa um valor enorme para "sem limite"
+        if limit is not None and limit >= 1 << 60:
+            limit = None
+    return limit, usage
+
+
+def cgroup_memory_limit_mb():
+    """Limite de memória do cgroup em MB (None se não houver limite)"""
+    limit, _usage = _cgroup_memory()
+    return None if limit is None else limit // (1024 * 1024)
+
+
+def _cgroup_available_mb():
+    """Memória livre dentro do limite do cgroup, se houver limite"""
+    limit, usage = _cgroup_memory()
+    if limit is None:
+        return None
+    return max(0, limit - (usage or 0)) // (1024 * 1024)
+
+
+def available_memory_mb():
+    """RAM disponível em MB (mínimo entre host e cgroup)"""
+    host_mb = None
+    try:
+        import psutil
+        host_mb = psutil.virtual_memory().available // (1024 * 1024)
+    except ImportError:
+        try:
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        host_mb = int(line.split()[1]) // 1024
+                        break
+        except OSError:
+            pass
+
+    cgroup_mb = _cgroup_available_mb()
+    candidates = [v for v in (host_mb, cgroup_mb) if v is not None]
+    return min(candidates) if candidates else None
+
+
+def total_memory_mb():
+    """RAM total em MB (mínimo entre host e limite do cgroup)"""
+    host_mb = None
+    try:
+        import psutil
+        host_mb = psutil.virtual_memory().total // (1024 * 1024)
+    except ImportError:
+        try:
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    if line.startswith('MemTotal:'):
+                        host_mb = int(line.split()[1]) // 1024
+                        break
+        except OSError:
+            pass
+
+    cgroup_mb = cgroup_memory_limit_mb()
+    candidates = [v for v in (host_mb, cgroup_mb) if v is not None]
+    return min(candidates) if candidates else None
+
+
+def job_memory_mb(model_size, compute_type='int8'):
+    """Memória estimada de um job (modelo + overhead)"""
+    footprint = MODEL_FOOTPRINT_MB.get(model_size, MODEL_FOOTPRINT_MB['medium'])
+    factor = COMPUTE_TYPE_FACTOR.get(compute_type, 1.0)
+    return int(footprint * factor) + JOB_OVERHEAD_MB
+
+
+def plan(model_size, compute_type='int8', cores=None, memory_mb=None, threads_per_job=None):
+    """
+    Calcula quantos jobs do modelo cabem em paralelo e como dividir os núcleos
+
+    Args:
+        model_size: tamanho do modelo
+        compute_type: compute_type usado pelos jobs
+        cores: lista de núcleos disponíveis (padrão: afinidade do processo)
+        memory_mb: RAM disponível (padrão: medida no host/cgroup)
+        threads_per_job: threads desejadas por job (padrão por modelo)
+
+    Returns:
+        Dict com concurrent_jobs, cpu_threads e a afinidade de cada slot
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    if memory_mb is None:
+        memory_mb = available_memory_mb()
+
+    usable_cores = cores[:-RESERVED_CORES] if len(cores) > 4 else cores
+    threads = threads_per_job or DEFAULT_THREADS_PER_JOB.get(model_size, 4)
+    threads = max(1, min(threads, len(usable_cores)))
+
+    per_job_mb = job_memory_mb(model_size, compute_type)
+    by_cpu = max(1, len(usable_cores) // threads)
+    if memory_mb is None:
+        by_memory = by_cpu
+    else:
+        by_memory = max(0, (memory_mb - RESERVED_MEMORY_MB) // per_job_mb)
+
+    concurrent = min(by_cpu, by_memory)
+
+    slots = []
+    if concurrent > 0:
+        # Distribuir TODOS os núcleos utilizáveis entre os slots (blocos contíguos)
+        base, extra = divmod(len(usable_cores), concurrent)
+        position = 0
+        for slot in range(concurrent):
+            size = base + (1 if slot < extra else 0)
+            slot_cores = usable_cores[position:position + size]
+            position += size
+            slots.append({
+                'slot': slot,
+                'cpu_threads': len(slot_cores),
+                'cpu_affinity': format_cpu_list(slot_cores),
+            })
+
+    return {
+        'model_size': model_size,
+        'compute_type': compute_type,
+        'concurrent_jobs': concurrent,
+        'cpu_threads': slots[0]['cpu_threads'] if slots else 0,
+        'slots': slots,
+        'limits': {
+            'by_cpu': by_cpu,
+            'by_memory': by_memory,
+        },
+        'host': {
+            'cores': len(cores),
+            'usable_cores': len(usable_cores),
+            'available_memory_mb': memory_mb,
+            'job_memory_mb': per_job_mb,
+        },
+    }
+
+
+def plan_all(compute_type='int8'):
+    """Plano para cada tamanho de modelo conhecido"""
+    cores = available_cores()
+    memory_mb = available_memory_mb()
+    return {
+        model: plan(model, compute_type, cores=cores, memory_mb=memory_mb)
+        for model in MODEL_FOOTPRINT_MB
+    }
+
+
+def slot_plan(model_size, compute_type='int8'):
+    """
+    Plano fixo de slots do host, igual para todos os jobs
+
+    Calculado sobre a RAM total (ou o limite do cgroup), não sobre a livre:
+    cada job roda em um processo próprio e, medindo a memória livre, os jobs
+    seguintes veriam a RAM dos anteriores já ocupada, receberiam menos slots
+    e o índice módulo len(slots) cairia em núcleos de outro slot.
+    """
+    key = (model_size, compute_type)
+    if key not in _SLOT_PLANS:
+        _SLOT_PLANS[key] = plan(model_size, compute_type, memory_mb=total_memory_mb())
+    return _SLOT_PLANS[key]
+
+
+def slot_assignment(model_size, slot, compute_type='int8'):
+    """
+    Retorna (cpu_threads, núcleos) do slot indicado no slot_plan
+
+    O índice é reduzido módulo o número de slots, então o chamador pode usar
+    um contador crescente de jobs sem conhecer o plano.
+    """
+    slots = slot_plan(model_size, compute_type)['slots']
+    if not slots:
+        return 0, None
+    chosen = slots[slot % len(slots)]
+    return chosen['cpu_threads'], parse_cpu_list(chosen['cpu_affinity'])
+
+
+def apply_cpu_affinity(cores):
+    """
+    Fixa o processo atual no conjunto de núcleos informado
+
+    Deve ser chamado ANTES de carregar o modelo: os threads do CTranslate2
+    herdam a afinidade do processo.
+    """
+    if not cores:
+        return False
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, set(cores))
+        else:
+            import psutil
+            psutil.Process().cpu_affinity(list(cores))
+    except ImportError:
+        print("⚠️ CPU affinity not supported on this platform (install psutil)", file=sys.stderr)
+        return False
+    except OSError as e:
+        print(f"⚠️ Could not set CPU affinity {format_cpu_list(cores)}: {e}", file=sys.stderr)
+        return False
+
+    print(f"📌 Pinned to cores {format_cpu_list(cores)}", file=sys.stderr)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Planejador de capacidade de transcrição')
+    parser.add_argument('--model', default=None, help='Tamanho do modelo (padrão: todos)')
+    parser.add_argument('--compute-type', default='int8')
+    parser.add_argument('--slot', type=int, default=None, help='Mostra apenas o slot indicado')
+    args = parser.parse_args()
+
+    if args.model is None:
+        print(json.dumps(plan_all(args.compute_type), indent=2))
+        return
+
+    if args.slot is not None:
+        slots = slot_plan(args.model, args.compute_type)['slots']
+        print(json.dumps(slots[args.slot % len(slots)] if slots else None, indent=2))
+    else:
+        print(json.dumps(plan(args.model, args.compute_type), indent=2))
+
+
+if __name__ == '__main__':
+    main()
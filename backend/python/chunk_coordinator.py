@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coordenador de transcrição distribuída (lado cliente do chunk_worker.py)
+
+Distribui chunks de áudio entre um pool de workers HTTP (locais ou remotos),
+um chunk por worker por vez. Chunks de um worker que falha (conexão
+recusada, timeout, erro 5xx) voltam para a fila e são reatribuídos a outro
+worker; o worker com falha só volta a receber chunks depois de responder
+ao /health, e um worker que não responde ao /health por MAX_HEALTH_PROBES
+sondagens seguidas é descartado. Os resultados são entregues em ordem (on_result) assim que o
+próximo chunk da sequência fica pronto.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from urllib import request as urlrequest
+from urllib.error import URLError
+from urllib.parse import urlencode
+
+HEALTH_TIMEOUT = 5
+MAX_ATTEMPTS = 3            # tentativas por chunk antes de abortar o job
+RETRY_BACKOFF = 5.0         # espera (s) antes de sondar um worker com falha
+MAX_WORKER_FAILURES = 3     # falhas consecutivas até o worker ser descartado
+MAX_HEALTH_PROBES = 6       # sondagens do /health (a cada RETRY_BACKOFF) antes de descartar
+TIMEOUT_PER_AUDIO_SECOND = 2.0
+MIN_REQUEST_TIMEOUT = 120
+
+
+class ChunkCoordinatorError(Exception):
+    """Exceção para erros da transcrição distribuída"""
+    pass
+
+
+class Chunk:
+    """Chunk de áudio a transcrever (offset em segundos no áudio original)"""
+
+    __slots__ = ('index', 'path', 'offset', 'duration', 'attempts')
+
+    def __init__(self, index, path, offset, duration):
+        self.index = index
+        self.path = path
+        self.offset = offset
+        self.duration = duration
+        self.attempts = 0
+
+
+def parse_workers(spec):
+    """'host1:8101,http://host2:8101' -> lista de URLs base"""
+    workers = []
+    for item in (spec or '').split(','):
+        item = item.strip().rstrip('/')
+        if item:
+            workers.append(item if item.startswith('http') else f'http://{item}')
+    return workers
+
+
+def check_worker(url, timeout=HEALTH_TIMEOUT):
+    """Dict do /health do worker ou None se inacessível"""
+    try:
+        with urlrequest.urlopen(f'{url}/health', timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except (URLError, OSError, ValueError):
+        return None
+
+
+class ChunkCoordinator:
+    """Fila de chunks compartilhada por um thread de despacho por worker"""
+
+    def __init__(self, workers, beam_size=5, condition_on_previous_text=False,
+                 retry_backoff=RETRY_BACKOFF, max_health_probes=MAX_HEALTH_PROBES):
+        if not workers:
+            raise ChunkCoordinatorError("No chunk workers configured")
+        self.workers = list(workers)
+        self.beam_size = beam_size
+        self.condition = condition_on_previous_text
+        self.retry_backoff = retry_backoff
+        self.max_health_probes = max_health_probes
+        self.stats = {url: {'chunks': 0, 'failures': 0, 'seconds': 0.0} for url in self.workers}
+
+        self._pending = deque()
+        self._results = {}
+        self._next_to_emit = 0
+        self._total = 0
+        self._active_workers = 0
+        self._error = None
+        self._cond = threading.Condition()
+
+    def _transcribe_remote(self, url, chunk):
+        with open(chunk.path, 'rb') as f:
+            audio = f.read()
+        query = urlencode({
+            'chunk': chunk.index,
+            'beam_size': self.beam_size,
+            'condition': str(self.condition).lower(),
+            'suffix': os.path.splitext(chunk.path)[1] or '.mp3',
+        })
+        req = urlrequest.Request(f'{url}/transcribe?{query}', data=audio, method='POST',
+                                 headers={'Content-Type': 'application/octet-stream'})
+        timeout = max(MIN_REQUEST_TIMEOUT, chunk.duration * TIMEOUT_PER_AUDIO_SECOND)
+        with urlrequest.urlopen(req, timeout=timeout) as response:
+            result = json.loads(response.read().decode('utf-8'))
+        if not result.get('success'):
+            raise ChunkCoordinatorError(result.get('error', 'worker returned failure'))
+        return result
+
+    def _take(self):
+        """Próximo chunk pendente; None quando não há mais trabalho"""
+        with self._cond:
+            while not self._pending:
+                if self._error or len(self._results) == self._total:
+                    return None
+                # Chunks em andamento em outros workers podem voltar para a fila
+                self._cond.wait(1.0)
+            return self._pending.popleft()
+
+    def _requeue(self, chunk, reason):
+        with self._cond:
+            chunk.attempts += 1
+            if chunk.attempts >= MAX_ATTEMPTS:
+                self._error = f"Chunk {chunk.index} failed {chunk.attempts} times: {reason}"
+            else:
+                self._pending.appendleft(chunk)
+            self._cond.notify_all()
+
+    def _dispatch(self, url, on_result):
+        consecutive_failures = 0
+        try:
+            while True:
+                chunk = self._take()
+                if chunk is None:
+                    return
+                start = time.time()
+                try:
+                    segments = self._absolute_segments(chunk, self._transcribe_remote(url, chunk))
+                except Exception as e:
+                    # Qualquer falha do chunk (rede, http.client.IncompleteRead/BadStatusLine,
+                    # corpo malformado) devolve o chunk à fila: a thread nunca morre com ele
+                    reason = f"{type(e).__name__}: {e}"
+                    consecutive_failures += 1
+                    self.stats[url]['failures'] += 1
+                    print(f"⚠️ Worker {url} failed on chunk {chunk.index}: {reason} - reassigning",
+                          file=sys.stderr)
+                    self._requeue(chunk, reason)
+                    if not self._wait_until_healthy(url, consecutive_failures):
+                        return
+                    continue
+
+                consecutive_failures = 0
+                self.stats[url]['chunks'] += 1
+                self.stats[url]['seconds'] += time.time() - start
+                self._complete(chunk, segments, on_result)
+        except Exception as e:
+            # Erro fora do chunk (on_result): interrompe o job em vez de deixar os outros esperando
+            with self._cond:
+                self._error = self._error or f"Chunk dispatch to {url} failed: {e}"
+        finally:
+            with self._cond:
+                self._active_workers -= 1
+                if self._active_workers == 0 and len(self._results) < self._total and not self._error:
+                    self._error = "All chunk workers failed"
+                self._cond.notify_all()
+
+    def _wait_until_healthy(self, url, failures):
+        """Aguarda o worker voltar; False se ele deve ser descartado"""
+        if failures >= MAX_WORKER_FAILURES:
+            print(f"❌ Worker {url} dropped after {failures} consecutive failures", file=sys.stderr)
+            return False
+        for _ in range(self.max_health_probes):
+            time.sleep(self.retry_backoff)
+            with self._cond:
+                if self._error or len(self._results) == self._total:
+                    return False
+            if check_worker(url) is not None:
+                return True
+        print(f"❌ Worker {url} dropped: no /health response after {self.max_health_probes} probes",
+              file=sys.stderr)
+        return False
+
+    @staticmethod
+    def _absolute_segments(chunk, result):
+        """Segmentos do worker com tempos absolutos (KeyError/TypeError se o corpo vier malformado)"""
+        return [dict(seg, start=seg['start'] + chunk.offset, end=seg['end'] + chunk.offset)
+                for seg in result['segments']]
+
+    def _complete(self, chunk, segments, on_result):
+        """Guarda o resultado e entrega, em ordem, todos os chunks consecutivos prontos"""
+        with self._cond:
+            self._results[chunk.index] = segments
+            ready = []
+            while self._next_to_emit in self._results and self._next_to_emit < self._total:
+                ready.append((self._next_to_emit, self._results[self._next_to_emit]))
+                self._next_to_emit += 1
+            # on_result sob o lock garante a ordem entre threads
+            for index, chunk_segments in ready:
+                on_result(index, chunk_segments)
+                self._results[index] = None  # já entregue: só a contagem importa
+            self._cond.notify_all()
+
+    def run(self, chunks, on_result):
+        """
+        Transcreve os chunks no pool de workers
+
+        Args:
+            chunks: lista de Chunk (índices 0..n-1)
+            on_result: função(índice, segmentos com tempos absolutos), chamada em ordem
+
+        Raises:
+            ChunkCoordinatorError se algum chunk esgotar as tentativas ou
+            todos os workers caírem
+        """
+        healthy = [url for url in self.workers if check_worker(url) is not None]
+        if not healthy:
+            raise ChunkCoordinatorError(f"No chunk worker reachable: {', '.join(self.workers)}")
+        print(f"🌐 Distributing {len(chunks)} chunks across {len(healthy)} workers", file=sys.stderr)
+
+        self._pending = deque(sorted(chunks, key=lambda c: c.index))
+        self._total = len(chunks)
+        self._active_workers = len(healthy)
+        threads = [threading.Thread(target=self._dispatch, args=(url, on_result), daemon=True,
+                                    name=f'chunk-dispatch-{i}') for i, url in enumerate(healthy)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error:
+            raise ChunkCoordinatorError(self._error)
+        return {url: dict(stat, seconds=round(stat['seconds'], 1)) for url, stat in self.stats.items()}
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker HTTP de chunks para transcrição distribuída
+
+Mantém um modelo carregado e transcreve chunks de áudio enviados pelo
+coordenador (transcribe.py --workers ...). O áudio vai no corpo da
+requisição, então o worker pode estar em outra máquina sem disco
+compartilhado.
+
+Protocolo:
+    GET  /health                    -> {"status": "ok", "busy": false, ...}
+    POST /transcribe?chunk=3&beam_size=5&condition=false
+         corpo: bytes do arquivo de áudio do chunk
+                                    -> {"success": true, "chunk": 3, "segments": [...], ...}
+
+Os tempos dos segmentos são relativos ao início do chunk; o coordenador
+aplica o deslocamento. Um chunk é transcrito por vez (o modelo não é
+compartilhado entre requisições); /health responde mesmo durante uma
+transcrição.
+
+Uso (vários workers na mesma máquina para teste):
+    python chunk_worker.py small --port 8101 --cpu-threads 4
+    python chunk_worker.py small --port 8102 --cpu-threads 4
+"""
+
+import sys
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from model_registry import load_whisper_model
+from capacity_planner import apply_cpu_affinity, parse_cpu_list
+
+# Forçar UTF-8 no stdout e stderr ANTES de qualquer print
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+MAX_CHUNK_BYTES = 512 * 1024 * 1024
+
+
+class ChunkWorker:
+    """Modelo carregado + serialização das transcrições"""
+
+    def __init__(self, model, model_size, compute_type):
+        self.model = model
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.completed = 0
+        self.busy = False
+        self._lock = threading.Lock()
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'model_size': self.model_size,
+            'compute_type': self.compute_type,
+            'busy': self.busy,
+            'completed': self.completed,
+        }
+
+    def transcribe(self, audio_bytes, suffix, beam_size, condition):
+        with self._lock:
+            self.busy = True
+            fd, path = tempfile.mkstemp(prefix='chunk_', suffix=suffix)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(audio_bytes)
+                start = time.time()
+                segments, info = self.model.transcribe(
+                    path,
+                    language='pt',
+                    beam_size=beam_size,
+                    condition_on_previous_text=condition,
+                    temperature=0.0,
+                )
+                collected = [{
+                    'start': round(segment.start, 3),
+                    'end': round(segment.end, 3),
+                    'text': segment.text,
+                    'avg_logprob': round(segment.avg_logprob, 4),
+                } for segment in segments]
+                self.completed += 1
+                return {
+                    'success': True,
+                    'segments': collected,
+                    'duration': info.duration,
+                    'processing_time': round(time.time() - start, 3),
+                }
+            finally:
+                self.busy = False
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+def make_handler(worker):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path == '/health':
+                self._send(200, worker.health())
+            else:
+                self._send(404, {'success': False, 'error': 'Not found'})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/transcribe':
+                self._send(404, {'success': False, 'error': 'Not found'})
+                return
+
+            query = parse_qs(url.query)
+            chunk = query.get('chunk', ['?'])[0]
+            length = int(self.headers.get('Content-Length') or 0)
+            if length <= 0 or length > MAX_CHUNK_BYTES:
+                self._send(400, {'success': False, 'error': f'Invalid chunk size: {length}'})
+                return
+
+            audio_bytes = self.rfile.read(length)
+            suffix = query.get('suffix', ['.mp3'])[0]
+            beam_size = int(query.get('beam_size', ['5'])[0])
+            condition = query.get('condition', ['false'])[0].lower() == 'true'
+
+            print(f"🎤 Chunk {chunk}: {length / 1024**2:.1f}MB from {self.client_address[0]}", file=sys.stderr)
+            try:
+                result = worker.transcribe(audio_bytes, suffix, beam_size, condition)
+            except Exception as e:
+                print(f"❌ Chunk {chunk} failed: {e}", file=sys.stderr)
+                self._send(500, {'success': False, 'chunk': chunk, 'error': str(e)})
+                return
+
+            result['chunk'] = chunk
+            print(f"✅ Chunk {chunk}: {len(result['segments'])} segments in {result['processing_time']}s",
+                  file=sys.stderr)
+            self._send(200, result)
+
+        def log_message(self, format, *args):
+            # Logs de acesso padrão do http.server vão para stderr sem formatação útil
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker HTTP de chunks para transcrição distribuída')
+    parser.add_argument('model_size', nargs='?', default='medium')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8101)
+    parser.add_argument('--cpu-threads', type=int, default=0)
+    parser.add_argument('--cpu-affinity', default=None, help="Núcleos, ex.: '0-3,8'")
+    args = parser.parse_args()
+
+    cpu_threads = args.cpu_threads
+    if args.cpu_affinity:
+        cores = parse_cpu_list(args.cpu_affinity)
+        apply_cpu_affinity(cores)
+        cpu_threads = cpu_threads or len(cores)
+
+    model, compute_type = load_whisper_model(args.model_size, device='cpu', cpu_threads=cpu_threads,
+                                             warmup=True)
+    worker = ChunkWorker(model, args.model_size, compute_type)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(worker))
+    print(f"✅ Chunk worker listening on {args.host}:{args.port} "
+          f"(model={args.model_size}, compute_type={compute_type})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Construção da ata em JSON restrito por schema (alternativa ao TOON livre)
+SDC-Ata-Generator
+
+Com o campo format do Ollama (JSON schema) a amostragem é restrita por
+gramática: a resposta é sempre JSON com os campos da ata, sem rodadas de
+correção de formato. O modelo gera só objetivo, pontos e próximos passos;
+local, data/horário, convocador e participantes vêm dos dados recebidos.
+
+json_para_dados converte a resposta para o mesmo dict do parse_toon
+(docx_filler não muda) e dados_para_toon gera o TOON equivalente, para o
+contrato (toon_string, dados) do OllamaService.
+"""
+
+import json
+from typing import Any, Dict, List
+
+try:
+    from .prompts import _formatar_data
+    from .toon_repair import VALOR_PADRAO
+except ImportError:
+    from prompts import _formatar_data
+    from toon_repair import VALOR_PADRAO
+
+
+class AtaJSONError(Exception):
+    """Resposta JSON sem o conteúdo mínimo da ata"""
+    pass
+
+
+ATA_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "objetivo": {"type": "string"},
+        "pontos": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": 1,
+        },
+        "proximos_passos": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "acao": {"type": "string"},
+                    "responsavel": {"type": "string"},
+                    "data": {"type": "string"},
+                },
+                "required": ["acao", "responsavel", "data"],
+            },
+            "minItems": 1,
+        },
+    },
+    "required": ["objetivo", "pontos", "proximos_passos"],
+}
+
+
+def _texto(valor: Any) -> str:
+    return ' '.join(str(valor or '').split())
+
+
+def json_para_dados(resposta: str, participantes: str, data_hora: str,
+                    local: str, convocado_por: str) -> Dict[str, Any]:
+    """
+    Resposta JSON do modelo -> dict no formato do parse_toon
+
+    Raises:
+        AtaJSONError: JSON inválido ou sem objetivo/pontos/próximos passos
+    """
+    try:
+        ata = json.loads(resposta)
+    except ValueError as e:
+        raise AtaJSONError(f"JSON inválido: {e}")
+    if not isinstance(ata, dict):
+        raise AtaJSONError("Resposta não é um objeto JSON")
+
+    pontos = [_texto(p) for p in ata.get('pontos') or [] if _texto(p)]
+    passos = []
+    for passo in ata.get('proximos_passos') or []:
+        if isinstance(passo, dict) and _texto(passo.get('acao')):
+            passos.append({
+                'acao': _texto(passo.get('acao')),
+                'responsavel': _texto(passo.get('responsavel')) or VALOR_PADRAO,
+                'data': _texto(passo.get('data')) or VALOR_PADRAO,
+            })
+
+    faltando = [nome for nome, valor in (('objetivo', _texto(ata.get('objetivo'))),
+                                         ('pontos', pontos), ('proximos_passos', passos)) if not valor]
+    if faltando:
+        raise AtaJSONError(f"Campos obrigatórios faltando: {', '.join(faltando)}")
+
+    nomes = [p.strip() for p in participantes.split(',') if p.strip()]
+    return {
+        'local': local,
+        'data_horario': _formatar_data(data_hora),
+        'convocado_por': convocado_por,
+        'objetivo': _texto(ata['objetivo']),
+        'participantes': [{'num': str(i), 'nome': nome} for i, nome in enumerate(nomes, 1)],
+        'pontos': [{'item': str(i), 'topico': topico} for i, topico in enumerate(pontos, 1)],
+        'proximos_passos': [dict(item=str(i), **passo) for i, passo in enumerate(passos, 1)],
+    }
+
+
+def dados_para_toon(dados: Dict[str, Any]) -> str:
+    """TOON equivalente ao dict (vírgulas em colunas do meio viram ';')"""
+    def coluna(valor: str, ultima: bool) -> str:
+        return valor if ultima else valor.replace(',', ';')
+
+    linhas: List[str] = [f"{campo}: {dados[campo]}" for campo in
+                         ('local', 'data_horario', 'convocado_por', 'objetivo')]
+    for nome, campos in (('participantes', ['num', 'nome']),
+                         ('pontos', ['item', 'topico']),
+                         ('proximos_passos', ['item', 'acao', 'responsavel', 'data'])):
+        linhas.append('')
+        linhas.append(f"{nome}[{len(dados[nome])}]{{{','.join(campos)}}}:")
+        for registro in dados[nome]:
+            linhas.append(','.join(coluna(registro[c], i == len(campos) - 1) for i, c in enumerate(campos)))
+    return '\n'.join(linhas)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da Fase 2: TOON livre x JSON restrito por schema
+
+Para cada transcrição a Fase 1 roda uma vez (ou vem do armazenamento de
+extrações) e a Fase 2 é executada --runs vezes em cada modo:
+
+    toon  - TOON em texto livre, validado em streaming, com reparo local e
+            rodadas de correção via LLM
+    json  - saída restrita pelo JSON schema da ata (format do Ollama)
+
+Mede a latência da Fase 2 e quantas chamadas ao LLM cada ata precisou
+(mais de uma = houve rodada de correção). O cache de respostas fica
+desligado para que toda execução chegue ao modelo; com --temperature
+maior que a padrão as execuções variam e a taxa de retentativa fica
+representativa.
+
+Uso via CLI:
+    python benchmark_construcao.py reuniao1.txt reuniao2.txt --runs 5
+    python benchmark_construcao.py reuniao.txt --temperature 0.7 --output construcao.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from ollama_service import OllamaService, OllamaServiceError
+
+MODES = ('toon', 'json')
+
+
+def count_calls(service):
+    """Envolve os métodos de geração do serviço e devolve o contador"""
+    counter = {'calls': 0}
+    for name in ('generate_completion', 'generate_completion_stream'):
+        original = getattr(service, name)
+
+        def wrapped(*args, _original=original, **kwargs):
+            counter['calls'] += 1
+            return _original(*args, **kwargs)
+        setattr(service, name, wrapped)
+    return counter
+
+
+def run_once(service, counter, mode, lista, meta):
+    service.formato_construcao = mode
+    counter['calls'] = 0
+    start = time.time()
+    try:
+        _, dados = service.construir_toon(lista, *meta)
+        ok, error = True, None
+        pontos = len(dados['pontos'])
+    except OllamaServiceError as e:
+        ok, error, pontos = False, str(e), 0
+    return {
+        'ok': ok,
+        'elapsed_s': round(time.time() - start, 2),
+        'llm_calls': counter['calls'],
+        'pontos': pontos,
+        'error': error,
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(results):
+    elapsed = [r['elapsed_s'] for r in results]
+    return {
+        'runs': len(results),
+        'failures': sum(not r['ok'] for r in results),
+        'mean_s': round(statistics.mean(elapsed), 2),
+        'p50_s': percentile(elapsed, 0.5),
+        'p95_s': percentile(elapsed, 0.95),
+        'max_s': max(elapsed),
+        'mean_llm_calls': round(statistics.mean(r['llm_calls'] for r in results), 2),
+        'retry_rate': round(sum(r['llm_calls'] > 1 for r in results) / len(results), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da Fase 2: TOON livre x JSON schema')
+    parser.add_argument('transcricoes', nargs='+', help='Arquivos de texto com transcrições reais')
+    parser.add_argument('--runs', type=int, default=3, help='Execuções da Fase 2 por transcrição e modo')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--temperature', type=float, default=None,
+                        help='Sobrescreve OLLAMA_TEMPERATURE (variação entre execuções)')
+    parser.add_argument('--participantes', default='Ana Souza, Bruno Lima, Carla Dias')
+    parser.add_argument('--data-hora', default='2025-01-01T10:00')
+    parser.add_argument('--local', default='Sala de reuniões')
+    parser.add_argument('--convocado-por', default='Ana Souza')
+    parser.add_argument('--output', default=None, help='Salvar resultados em JSON')
+    args = parser.parse_args()
+
+    service = OllamaService()
+    if not service.check_health():
+        print(f"❌ Ollama not reachable at {service.base_url}", file=sys.stderr)
+        sys.exit(1)
+    service.cache = None
+    if args.temperature is not None:
+        service.temperature = args.temperature
+
+    meta = (args.participantes, args.data_hora, args.local, args.convocado_por)
+    listas = []
+    for path in args.transcricoes:
+        with open(path, 'r', encoding='utf-8') as f:
+            _, lista = service.obter_extracao(f.read())
+        listas.append((os.path.basename(path), lista))
+
+    counter = count_calls(service)
+    print(f"📊 Phase 2: {len(listas)} transcriptions x {args.runs} runs, model={service.model}, "
+          f"temperature={service.temperature}", file=sys.stderr)
+
+    report = {'model': service.model, 'temperature': service.temperature, 'modes': {}}
+    for mode in args.modes:
+        results = []
+        for name, lista in listas:
+            for run in range(1, args.runs + 1):
+                result = dict(run_once(service, counter, mode, lista, meta), transcricao=name, run=run)
+                results.append(result)
+                status = '✅' if result['ok'] else '❌'
+                print(f"   [{mode}] {name} #{run}: {status} {result['elapsed_s']}s, "
+                      f"{result['llm_calls']} LLM calls", file=sys.stderr)
+        report['modes'][mode] = {'results': results, 'summary': summarize(results)}
+
+    print("", file=sys.stderr)
+    for mode, data in report['modes'].items():
+        s = data['summary']
+        print(f"✅ {mode}: mean {s['mean_s']}s | p95 {s['p95_s']}s | max {s['max_s']}s | "
+              f"retry rate {s['retry_rate']:.0%} | failures {s['failures']}/{s['runs']}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps({mode: data['summary'] for mode, data in report['modes'].items()}))
+
+
+if __name__ == '__main__':
+    main()
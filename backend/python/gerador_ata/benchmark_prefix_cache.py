@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do cache de prefixo do Ollama (tempo de avaliação do prompt)
+
+Envia N requisições com as mesmas instruções fixas e conteúdos diferentes
+(trechos distintos de uma transcrição real) em dois modos:
+
+    prefixo    - layout atual: instruções idênticas como prefixo (mensagem
+                 de sistema); a partir da 2ª requisição o Ollama só avalia
+                 o conteúdo variável
+    sem-cache  - mesmas requisições com uma linha única no início das
+                 instruções, o que invalida o prefixo (equivale a
+                 interpolar conteúdo variável antes das instruções)
+
+Para cada requisição registra prompt_eval_count (tokens efetivamente
+avaliados) e prompt_eval_duration. num_ctx vem do mesmo orçamento usado
+pelo OllamaService (por requisição, ou OLLAMA_NUM_CTX quando definido),
+então o benchmark mede a configuração real: se num_ctx variar entre as
+requisições o Ollama recarrega o modelo e o relatório avisa. num_predict
+é pequeno, para medir só a avaliação do prompt.
+
+Uso via CLI:
+    python benchmark_prefix_cache.py transcricao.txt --requests 5 --fase extracao
+    python benchmark_prefix_cache.py transcricao.txt --fase construcao --output prefix.json
+"""
+
+import os
+import sys
+import json
+import uuid
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from prompts import mensagens_extracao, mensagens_construcao
+from extracao_chunks import dividir_transcricao
+from ollama_service import OllamaService
+from token_budget import budget
+
+MODES = ('sem-cache', 'prefixo')
+
+
+def build_requests(transcricao, fase, count, tokens_per_request):
+    """Lista de (instruções, conteúdo) com conteúdos distintos"""
+    trechos = dividir_transcricao(transcricao, tokens_per_request)
+    batch = []
+    for i in range(count):
+        trecho = trechos[i % len(trechos)]
+        if fase == 'extracao':
+            instrucoes, conteudo = mensagens_extracao(trecho)
+        else:
+            # A lista extraída é simulada com as frases do trecho
+            lista = '\n'.join(f'{n}. {frase}' for n, frase in enumerate(trecho.split('. ')[:15], 1))
+            instrucoes, conteudo = mensagens_construcao(lista, 'Ana, Bruno, Carla', '2025-01-01T10:00',
+                                                        'Sala de reuniões', 'Ana')
+        # Marcador no conteúdo: trechos repetidos (transcrição curta) não reaproveitam cache
+        batch.append((instrucoes, f'[requisição {i + 1}]\n{conteudo}'))
+    return batch
+
+
+def run_mode(service, mode, batch, num_predict):
+    results = []
+    for i, (instrucoes, conteudo) in enumerate(batch, 1):
+        if mode == 'sem-cache':
+            instrucoes = f'Sessão {uuid.uuid4().hex}\n{instrucoes}'
+        # Mesmas opções do OllamaService (num_ctx do orçamento de tokens)
+        options = service._options(instrucoes + conteudo, num_predict)
+        url, payload = service._request(conteudo, instrucoes, options, stream=False)
+        response = service.session.post(url, json=payload, timeout=service.timeout)
+        response.raise_for_status()
+        data = response.json()
+        result = {
+            'request': i,
+            'prompt_tokens_estimated': budget.estimate(instrucoes + conteudo),
+            'num_ctx': options['num_ctx'],
+            'prompt_eval_count': data.get('prompt_eval_count', 0),
+            'prompt_eval_s': round(data.get('prompt_eval_duration', 0) / 1e9, 3),
+            'total_s': round(data.get('total_duration', 0) / 1e9, 3),
+        }
+        results.append(result)
+        print(f"   [{mode}] #{i}: {result['prompt_eval_count']} prompt tokens evaluated "
+              f"in {result['prompt_eval_s']}s (total {result['total_s']}s)", file=sys.stderr)
+    return results
+
+
+def summarize(results):
+    """Médias da 2ª requisição em diante (a 1ª é fria nos dois modos)"""
+    warm = results[1:] or results
+    return {
+        'first_prompt_eval_s': results[0]['prompt_eval_s'],
+        'warm_mean_prompt_eval_s': round(sum(r['prompt_eval_s'] for r in warm) / len(warm), 3),
+        'warm_mean_prompt_eval_count': round(sum(r['prompt_eval_count'] for r in warm) / len(warm), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do cache de prefixo do Ollama')
+    parser.add_argument('transcricao', help='Arquivo de texto com uma transcrição real')
+    parser.add_argument('--fase', choices=['extracao', 'construcao'], default='extracao')
+    parser.add_argument('--requests', type=int, default=4)
+    parser.add_argument('--tokens-per-request', type=int, default=1500,
+                        help='Tamanho do conteúdo variável de cada requisição')
+    parser.add_argument('--num-predict', type=int, default=16)
+    parser.add_argument('--output', default=None, help='Salvar resultados em JSON')
+    args = parser.parse_args()
+
+    with open(args.transcricao, 'r', encoding='utf-8') as f:
+        transcricao = f.read()
+
+    service = OllamaService()
+    if not service.check_health():
+        print(f"❌ Ollama not reachable at {service.base_url}", file=sys.stderr)
+        sys.exit(1)
+
+    batch = build_requests(transcricao, args.fase, args.requests, args.tokens_per_request)
+
+    print(f"📊 {args.requests} requests ({args.fase}), model={service.model}, "
+          f"num_ctx={budget.fixed_ctx or 'per request'}, keep_alive={service.keep_alive}, "
+          f"endpoint={'chat' if service.use_chat else 'generate'}", file=sys.stderr)
+
+    report = {'model': service.model, 'fase': args.fase, 'num_ctx': budget.fixed_ctx, 'modes': {}}
+    for mode in MODES:
+        results = run_mode(service, mode, batch, args.num_predict)
+        report['modes'][mode] = {'requests': results, 'summary': summarize(results)}
+
+    sizes = sorted({r['num_ctx'] for mode in report['modes'].values() for r in mode['requests']})
+    if len(sizes) > 1:
+        print(f"⚠️ num_ctx varied between requests {sizes}: Ollama reloaded the model and "
+              f"dropped the prefix cache (set OLLAMA_NUM_CTX)", file=sys.stderr)
+
+    baseline = report['modes']['sem-cache']['summary']['warm_mean_prompt_eval_s']
+    cached = report['modes']['prefixo']['summary']['warm_mean_prompt_eval_s']
+    report['saved_per_request_s'] = round(baseline - cached, 3)
+
+    print(f"\n✅ Prompt eval (2nd request onward): sem-cache {baseline}s | prefixo {cached}s "
+          f"| saved {report['saved_per_request_s']}s per request", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps(dict(report['modes']['prefixo']['summary'], saved_per_request_s=report['saved_per_request_s'])))
+
+
+if __name__ == '__main__':
+    main()
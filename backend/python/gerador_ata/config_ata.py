@@ -41,6 +41,51 @@ OLLAMA_TIMEOUT = 600  # 15 minutos (suporta reuniões longas de +1h)
 OLLAMA_TEMPERATURE = 0.1
 OLLAMA_MAX_TOKENS = 6000
 OLLAMA_TOP_P = 0.8 
+# Pool de conexões keep-alive com o Ollama (compartilhado entre threads)
+OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', '8'))
+OLLAMA_RETRIES = int(os.environ.get('OLLAMA_RETRIES', '2'))  # só falhas de conexão e GETs com 502/503/504
+OLLAMA_RETRY_BACKOFF = 0.5
+# Saúde do Ollama: cache do status + circuit breaker
+# Estado em arquivo porque o gerar_ata.py roda um processo por requisição
+DATA_DIR = os.environ.get('TRANSCRIBE_DATA_DIR', os.path.join(os.path.dirname(BASE_DIR), 'data'))
+OLLAMA_HEALTH_STATE_FILE = os.environ.get('OLLAMA_HEALTH_STATE_FILE',
+                                          os.path.join(DATA_DIR, 'ollama_health.json'))
+OLLAMA_HEALTH_TTL = 30          # segundos em que um health check OK é reaproveitado
+OLLAMA_BREAKER_THRESHOLD = 3    # falhas consecutivas para abrir o circuito
+OLLAMA_BREAKER_COOLDOWN = 30    # segundos com o circuito aberto antes de sondar de novo
+# Orçamento de tokens: num_ctx/num_predict dimensionados por requisição
+OLLAMA_MAX_CTX = 8192           # contexto máximo do modelo (gemma2:9b)
+OLLAMA_MIN_CTX = 2048
+OLLAMA_MIN_PREDICT = 512
+TOKEN_SAFETY_MARGIN = 1.1       # folga sobre a estimativa de tokens do prompt
+TOKEN_CALIBRATION_FILE = os.path.join(DATA_DIR, 'token_calibration.json')  # token_budget.py calibrate
+SAIDA_EXTRACAO = 1500           # tokens esperados da lista de tópicos (Fase 1)
+SAIDA_CONSTRUCAO = 2500         # tokens esperados do TOON (Fase 2)
+# Fase 1 em map-reduce para transcrições longas
+EXTRACAO_TOKENS_POR_TRECHO = 2500  # acima disso a transcrição é dividida em trechos
+EXTRACAO_PARALELISMO = int(os.environ.get('OLLAMA_NUM_PARALLEL', '2'))  # prompts simultâneos
+# AsyncOllamaService: requisições simultâneas ao Ollama somando todas as atas do
+# processo (acompanhar o OLLAMA_NUM_PARALLEL do servidor; o excedente fica na fila do Ollama)
+OLLAMA_ASYNC_CONCORRENCIA = int(os.environ.get('OLLAMA_ASYNC_CONCURRENCY',
+                                               os.environ.get('OLLAMA_NUM_PARALLEL', '2')))
+# Cache de prefixo: instruções fixas como mensagem de sistema (/api/chat) e
+# modelo mantido carregado entre requisições para reaproveitar o KV cache
+OLLAMA_USE_CHAT = os.environ.get('OLLAMA_USE_CHAT', '1') != '0'
+OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+# num_ctx fixo para todas as requisições (0 = dimensionado por requisição).
+# Opcional: preserva o cache de prefixo entre fases ao custo de memória
+# (ver token_budget.py)
+OLLAMA_NUM_CTX = int(os.environ.get('OLLAMA_NUM_CTX', '0'))
+# Cache persistente de respostas (mesma requisição -> mesma resposta)
+OLLAMA_CACHE_ENABLED = os.environ.get('OLLAMA_CACHE', '1') != '0'
+OLLAMA_CACHE_DB = os.environ.get('OLLAMA_CACHE_DB', os.path.join(DATA_DIR, 'llm_cache.db'))
+OLLAMA_CACHE_MAX_MB = int(os.environ.get('OLLAMA_CACHE_MAX_MB', '200'))
+# Listas da Fase 1 por transcrição: regerar a ata com outros metadados roda só a Fase 2
+EXTRACAO_STORE_DB = os.environ.get('EXTRACAO_STORE_DB', os.path.join(DATA_DIR, 'extracoes.db'))
+# Fase 2: 'toon' (texto livre validado/corrigido) ou 'json' (saída restrita por JSON schema)
+OLLAMA_CONSTRUCAO_FORMATO = os.environ.get('OLLAMA_CONSTRUCAO_FORMATO', 'toon').lower()
+# Fase 2 em streaming: valida o TOON enquanto é gerado e aborta cedo se a estrutura quebrar
+OLLAMA_STREAM_VALIDATION = os.environ.get('OLLAMA_STREAM_VALIDATION', '1') != '0'
 
 # CORS - Adicionar origem do frontend Transcreve
 CORS_ORIGINS = [
@@ -0,0 +1,128 @@
+"""
+Extração em map-reduce para transcrições longas (Fase 1)
+SDC-Ata-Generator
+
+MAP: a transcrição é dividida em trechos que terminam em fim de frase e
+cabem no orçamento de tokens; cada trecho vira um prompt de extração
+independente (executados em paralelo pelo OllamaService).
+
+REDUCE: as listas numeradas de cada trecho são unidas, tópicos repetidos
+(mesmo assunto extraído de trechos vizinhos) são removidos e a lista final
+é renumerada no formato que o criar_prompt_construcao espera.
+"""
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import List
+
+try:
+    from .token_budget import budget
+except ImportError:
+    from token_budget import budget
+
+# Fim de frase seguido de espaço, ou quebra de linha (falas do Whisper)
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?…])\s+|\n+')
+_NUMBERED_ITEM = re.compile(r'^\s*(?:\d+\s*[.)\-:]|[-•*])\s*(.+)$')
+
+SIMILARIDADE_DUPLICADO = 0.9
+
+
+def dividir_transcricao(transcricao: str, max_tokens: int) -> List[str]:
+    """
+    Divide a transcrição em trechos de até max_tokens, sempre em fim de frase
+
+    Frases maiores que o orçamento (transcrição sem pontuação) são cortadas
+    entre palavras.
+    """
+    max_chars = int(max_tokens * budget.chars_per_token)
+    frases = [f.strip() for f in _SENTENCE_BREAK.split(transcricao) if f and f.strip()]
+
+    trechos = []
+    atual = []
+    tamanho = 0
+    for frase in frases:
+        for parte in _cortar_frase(frase, max_chars):
+            if atual and tamanho + len(parte) + 1 > max_chars:
+                trechos.append(' '.join(atual))
+                atual, tamanho = [], 0
+            atual.append(parte)
+            tamanho += len(parte) + 1
+    if atual:
+        trechos.append(' '.join(atual))
+    return trechos
+
+
+def _cortar_frase(frase: str, max_chars: int) -> List[str]:
+    if len(frase) <= max_chars:
+        return [frase]
+    partes, atual = [], ''
+    for palavra in frase.split():
+        if atual and len(atual) + len(palavra) + 1 > max_chars:
+            partes.append(atual)
+            atual = palavra
+        else:
+            atual = f'{atual} {palavra}' if atual else palavra
+    if atual:
+        partes.append(atual)
+    return partes
+
+
+def extrair_itens(lista: str) -> List[str]:
+    """Itens de uma lista numerada (ignora texto fora dos itens)"""
+    itens = []
+    for linha in lista.split('\n'):
+        match = _NUMBERED_ITEM.match(linha)
+        if match:
+            item = match.group(1).replace('**', '').strip()
+            if item:
+                itens.append(item)
+    return itens
+
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', texto).split())
+
+
+def _duplicado(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    palavras_a, palavras_b = set(a.split()), set(b.split())
+    # Números diferentes (datas, quantidades, versões) indicam tópicos distintos
+    if {p for p in palavras_a if p.isdigit()} != {p for p in palavras_b if p.isdigit()}:
+        return False
+    # Um tópico inteiramente contido no outro (versão resumida do mesmo assunto)
+    if min(len(palavras_a), len(palavras_b)) >= 5 and (palavras_a <= palavras_b or palavras_b <= palavras_a):
+        return True
+    # Comparação por palavras: trocar um nome ou termo muda o tópico
+    return SequenceMatcher(None, a.split(), b.split()).ratio() >= SIMILARIDADE_DUPLICADO
+
+
+def mesclar_topicos(listas: List[str]) -> str:
+    """
+    REDUCE: une as listas dos trechos, remove duplicados e renumera
+
+    Entre dois tópicos duplicados fica o mais detalhado (mais palavras), na
+    posição em que o assunto apareceu primeiro.
+    """
+    topicos = []
+    normalizados = []
+    for lista in listas:
+        for item in extrair_itens(lista):
+            chave = _normalizar(item)
+            for i, existente in enumerate(normalizados):
+                if _duplicado(chave, existente):
+                    if len(chave.split()) > len(existente.split()):
+                        topicos[i] = item
+                        normalizados[i] = chave
+                    break
+            else:
+                topicos.append(item)
+                normalizados.append(chave)
+
+    if not topicos:
+        # Modelo fugiu do formato de lista: melhor entregar o texto bruto à Fase 2
+        return '\n\n'.join(lista.strip() for lista in listas if lista.strip())
+    return '\n'.join(f'{i}. {topico}' for i, topico in enumerate(topicos, 1))
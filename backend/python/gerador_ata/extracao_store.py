@@ -0,0 +1,141 @@
+"""
+Armazenamento das extrações da Fase 1 por transcrição
+SDC-Ata-Generator
+
+A Fase 1 (lista de tópicos) depende só da transcrição e do modelo;
+participantes, data, local e convocador entram apenas na Fase 2. A lista
+extraída é guardada sob o hash da transcrição (extracao_id), e regerar a
+ata com metadados corrigidos roda só a Fase 2.
+
+SQLite em modo WAL, compartilhado entre os processos do gerar_ata.py.
+Erros de leitura/escrita são registrados no log e tratados como
+"extração não encontrada": a Fase 1 roda normalmente.
+
+Uso via CLI:
+    python extracao_store.py list
+    python extracao_store.py purge --days 30
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Optional
+
+try:
+    from . import config_ata as config
+except ImportError:
+    import config_ata as config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extracoes (
+    id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    lista TEXT NOT NULL,
+    transcricao_chars INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+def extracao_id(transcricao: str, model: str) -> str:
+    """Hash da transcrição (espaços normalizados) + modelo"""
+    normalizada = ' '.join(transcricao.split())
+    return hashlib.sha256(f'{model}\n{normalizada}'.encode('utf-8')).hexdigest()[:32]
+
+
+class ExtracaoStore:
+    """Listas da Fase 1 indexadas por extracao_id"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or config.EXTRACAO_STORE_DB
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.executescript(SCHEMA)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            # Só guardada depois do schema: uma falha aqui é tentada de novo no próximo uso
+            self._conn = conn
+        return self._conn
+
+    def get(self, id_: str) -> Optional[str]:
+        """Lista extraída ou None"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    row = conn.execute("SELECT lista FROM extracoes WHERE id = ?", (id_,)).fetchone()
+                    if row:
+                        conn.execute("UPDATE extracoes SET last_used = ? WHERE id = ?", (time.time(), id_))
+                return row[0] if row else None
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Falha ao ler a extração armazenada: {e}")
+                return None
+
+    def put(self, id_: str, model: str, lista: str, transcricao_chars: int) -> None:
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO extracoes (id, model, lista, transcricao_chars, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", (id_, model, lista, transcricao_chars, now, now))
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Falha ao gravar a extração: {e}")
+
+    def list(self):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, model, transcricao_chars, created_at, last_used FROM extracoes ORDER BY last_used DESC"
+            ).fetchall()
+        return [dict(zip(('id', 'model', 'transcricao_chars', 'created_at', 'last_used'), row)) for row in rows]
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Remove extrações não usadas há mais que o limite"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                return conn.execute("DELETE FROM extracoes WHERE last_used < ?",
+                                    (time.time() - older_than_seconds,)).rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extrações da Fase 1 armazenadas por transcrição')
+    parser.add_argument('--db', default=None, help='Caminho do banco de extrações')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='Lista extrações armazenadas')
+    purge_parser = sub.add_parser('purge', help='Remove extrações não usadas há N dias')
+    purge_parser.add_argument('--days', type=float, default=30)
+    args = parser.parse_args()
+
+    store = ExtracaoStore(args.db)
+    try:
+        if args.command == 'list':
+            print(json.dumps(store.list(), indent=2))
+        else:
+            print(f"🧹 {store.purge(args.days * 86400)} extrações removidas", file=sys.stderr)
+    except (sqlite3.Error, OSError) as e:
+        print(f"❌ Banco de extrações indisponível ({store.db_path}): {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
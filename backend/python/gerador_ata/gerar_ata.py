@@ -13,12 +13,17 @@ from datetime import datetime
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
+# Diretório pai (backend/python) para utilitários compartilhados com o transcribe.py
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
 
 # Imports (sempre usar imports absolutos quando executado como script)
 import config_ata
 from toon_parser import parse_toon, TOONParserError
 from docx_filler import fill_docx_from_data, DOCXFillerError
 from ollama_service import ollama_service, OllamaServiceError
+from profiling import profile_mode, profiled
 
 
 # Configurar encoding UTF-8 para Windows
@@ -43,13 +48,17 @@ def gerar_ata_completa(data):
 
     Args:
         data: Dict com campos participantes, dataHora, local, convocadoPor, transcricao
+              (ou extracaoId de uma geração anterior, para regerar só com novos metadados)
 
     Returns:
         Dict com status, mensagem, arquivo, etc.
     """
     try:
         # Validar campos obrigatórios
-        campos_obrigatorios = ['participantes', 'dataHora', 'local', 'convocadoPor', 'transcricao']
+        id_extracao = data.get('extracaoId')
+        campos_obrigatorios = ['participantes', 'dataHora', 'local', 'convocadoPor']
+        if not id_extracao:
+            campos_obrigatorios.append('transcricao')
         campos_faltando = [campo for campo in campos_obrigatorios if not data.get(campo)]
 
         if campos_faltando:
@@ -62,10 +71,10 @@ def gerar_ata_completa(data):
         data_hora = data['dataHora']
         local = data['local']
         convocado_por = data['convocadoPor']
-        transcricao = data['transcricao']
+        transcricao = data.get('transcricao') or ''
         nome_arquivo = data.get('nomeArquivo', None)
 
-        if len(transcricao.strip()) < 50:
+        if not id_extracao and len(transcricao.strip()) < 50:
             return {
                 'status': 'erro',
                 'mensagem': 'Transcrição muito curta (mínimo 50 caracteres)'
@@ -73,26 +82,43 @@ def gerar_ata_completa(data):
 
         logger.info(f"Iniciando geração de ata completa via Ollama")
         logger.info(f"Participantes: {participantes}")
-        logger.info(f"Transcrição: {len(transcricao)} caracteres")
+        if id_extracao:
+            logger.info(f"Regerando a partir da extração {id_extracao}")
+        else:
+            logger.info(f"Transcrição: {len(transcricao)} caracteres")
 
-        # Verificar se Ollama está disponível
-        if not ollama_service.check_health():
+        # Verificar se Ollama está disponível (status em cache; circuito aberto falha na hora)
+        if not ollama_service.health.is_available():
             logger.error("Ollama não está disponível")
+            retry_after = ollama_service.health.retry_after()
+            detalhes = 'Verifique se o Ollama está rodando: ollama serve'
+            if retry_after:
+                detalhes += f' (nova verificação em {retry_after:.0f}s)'
             return {
                 'status': 'erro',
                 'mensagem': 'Serviço de IA (Ollama) não está disponível',
-                'detalhes': 'Verifique se o Ollama está rodando: ollama serve'
+                'detalhes': detalhes
             }
 
         # Gerar TOON usando Ollama
         try:
-            toon_string, dados_estruturados = ollama_service.gerar_toon_from_dados(
-                participantes=participantes,
-                data_hora=data_hora,
-                local=local,
-                convocado_por=convocado_por,
-                transcricao=transcricao
-            )
+            if id_extracao:
+                toon_string, dados_estruturados = ollama_service.regenerar_toon(
+                    id_extracao,
+                    participantes=participantes,
+                    data_hora=data_hora,
+                    local=local,
+                    convocado_por=convocado_por
+                )
+            else:
+                toon_string, dados_estruturados = ollama_service.gerar_toon_from_dados(
+                    participantes=participantes,
+                    data_hora=data_hora,
+                    local=local,
+                    convocado_por=convocado_por,
+                    transcricao=transcricao
+                )
+                id_extracao = ollama_service.extracao_id(transcricao)
             logger.info("TOON gerado com sucesso via Ollama")
         except OllamaServiceError as e:
             logger.error(f"Erro no Ollama: {str(e)}")
@@ -120,6 +146,7 @@ def gerar_ata_completa(data):
             'mensagem': 'Ata gerada com sucesso',
             'arquivo': output_filename,
             'download_url': f'/api/download-ata/{output_filename}',
+            'extracao_id': id_extracao,
             'dados_extraidos': {
                 'objetivo': dados_estruturados.get('objetivo', ''),
                 'num_pontos': len(dados_estruturados.get('pontos', [])),
@@ -173,4 +200,11 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    # Profiling opcional (--profile ou SDC_PROFILE): arquivos no diretório de saída
+    profile_base = os.path.join(
+        config_ata.OUTPUT_DIR, f"gerar_ata_{datetime.now().strftime('%Y%m%d_%H%M%S')}_profile")
+    mode = profile_mode()
+    if mode:
+        os.makedirs(config_ata.OUTPUT_DIR, exist_ok=True)
+    with profiled(profile_base, mode):
+        main()
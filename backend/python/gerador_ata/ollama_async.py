@@ -0,0 +1,405 @@
+"""
+Serviço Ollama assíncrono (asyncio) para várias atas no mesmo processo
+SDC-Ata-Generator
+
+O OllamaService bloqueia uma thread (waitress) ou um processo inteiro
+(gerar_ata.py) por ata durante toda a geração. AsyncOllamaService tem o
+mesmo contrato de gerar_toon_from_dados/regenerar_toon, mas como
+corrotinas: um único event loop conduz muitas atas ao mesmo tempo.
+
+- Cliente HTTP/1.1 mínimo sobre asyncio.open_connection: o projeto não
+  depende de aiohttp/httpx e o Ollama só precisa de POST com corpo JSON,
+  resposta Content-Length ou chunked e NDJSON lido linha a linha. Fechar
+  a conexão interrompe a geração no Ollama (abort do streaming). O
+  protocolo coberto está em test_ollama_async.py.
+- Um asyncio.Semaphore limita as requisições simultâneas ao Ollama a
+  OLLAMA_ASYNC_CONCORRENCIA; atas além disso esperam a vez sem ocupar
+  threads.
+- Cache de respostas, extrações guardadas (SQLite) e estado de saúde (em
+  arquivo) são síncronos e rodam em asyncio.to_thread, sem bloquear o
+  event loop.
+- Prompts, orçamento de tokens, validação em streaming, reparo local e
+  modo JSON são os mesmos do OllamaService (herdados).
+
+Uso:
+    service = AsyncOllamaService()
+    toon, dados = await service.gerar_toon_from_dados(participantes, data_hora,
+                                                      local, convocado_por, transcricao)
+"""
+
+import ssl
+import json
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from . import config_ata as config
+    from .ollama_service import OllamaService, OllamaServiceError
+    from .prompts import mensagens_extracao, mensagens_construcao, mensagens_construcao_json
+    from .toon_stream import TOONStreamValidator, TOONStreamAbort
+    from .extracao_chunks import dividir_transcricao, mesclar_topicos
+    from .token_budget import estimar_tokens
+    from .ata_json import ATA_SCHEMA
+except ImportError:
+    import config_ata as config
+    from ollama_service import OllamaService, OllamaServiceError
+    from prompts import mensagens_extracao, mensagens_construcao, mensagens_construcao_json
+    from toon_stream import TOONStreamValidator, TOONStreamAbort
+    from extracao_chunks import dividir_transcricao, mesclar_topicos
+    from token_budget import estimar_tokens
+    from ata_json import ATA_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 10
+
+
+class _Response:
+    """Resposta HTTP aberta: status, cabeçalhos e leitura incremental do corpo"""
+
+    def __init__(self, status: int, headers: dict, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, timeout: float):
+        self.status = status
+        self.headers = headers
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+
+    async def _read(self, coro):
+        # Timeout entre leituras, não para a geração inteira
+        return await asyncio.wait_for(coro, self._timeout)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        if self.headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size_line = await self._read(self._reader.readline())
+                size = int(size_line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    return
+                data = await self._read(self._reader.readexactly(size + 2))
+                yield data[:-2]
+        elif 'content-length' in self.headers:
+            length = int(self.headers['content-length'])
+            if length:
+                yield await self._read(self._reader.readexactly(length))
+        else:
+            while True:
+                data = await self._read(self._reader.read(65536))
+                if not data:
+                    return
+                yield data
+
+    async def body(self) -> bytes:
+        return b''.join([chunk async for chunk in self.chunks()])
+
+    async def lines(self) -> AsyncIterator[bytes]:
+        """Linhas do corpo (NDJSON do streaming)"""
+        pending = b''
+        async for chunk in self.chunks():
+            pending += chunk
+            while b'\n' in pending:
+                line, pending = pending.split(b'\n', 1)
+                yield line
+        if pending:
+            yield pending
+
+    async def close(self) -> None:
+        # Fechar a conexão interrompe a geração no Ollama
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class AsyncOllamaService(OllamaService):
+    """OllamaService com a geração em corrotinas (asyncio)"""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        super().__init__()
+        self.max_concurrency = max_concurrency or config.OLLAMA_ASYNC_CONCORRENCIA
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Criado no primeiro uso, dentro do event loop em execução"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _post(self, url: str, payload: dict) -> _Response:
+        parts = urlsplit(url)
+        https = parts.scheme == 'https'
+        host = parts.hostname
+        port = parts.port or (443 if https else 80)
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl.create_default_context() if https else None),
+                CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            await asyncio.to_thread(self.health.record_failure, str(e) or type(e).__name__)
+            raise OllamaServiceError(f"Não foi possível conectar ao Ollama em {self.base_url}")
+
+        body = json.dumps(payload).encode('utf-8')
+        writer.write((
+            f"POST {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode('latin-1') + body)
+        try:
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            status = int(status_line.split()[1])
+        except asyncio.TimeoutError:
+            writer.close()
+            await self._raise_timeout()
+        except (OSError, IndexError, ValueError) as e:
+            writer.close()
+            raise OllamaServiceError(f"Resposta HTTP inválida do Ollama: {e}")
+        return _Response(status, headers, reader, writer, self.timeout)
+
+    async def _raise_timeout(self) -> None:
+        """Timeout conta como falha no circuit breaker (Ollama travado)"""
+        await asyncio.to_thread(self.health.record_failure, f"Timeout ({self.timeout}s)")
+        raise OllamaServiceError(f"Timeout ao aguardar resposta do Ollama ({self.timeout}s)")
+
+    async def _check_status(self, response: _Response) -> None:
+        if response.status != 200:
+            detalhes = (await response.body()).decode('utf-8', 'replace')
+            await response.close()
+            logger.error(f"❌ Ollama retornou erro {response.status}")
+            raise OllamaServiceError(f"Ollama retornou status {response.status}: {detalhes}")
+        await asyncio.to_thread(self.health.record_success)
+
+    async def _put_cache(self, cache_key: Optional[str], generated_text: str) -> None:
+        if cache_key:
+            await asyncio.to_thread(self.cache.put, cache_key, self.model, generated_text)
+
+    async def generate_completion(self, prompt: str, expected_output: Optional[int] = None,
+                                  system: Optional[str] = None, formato: Optional[dict] = None,
+                                  cachear: bool = True) -> str:
+        """Geração sem streaming (mesmos parâmetros do OllamaService.generate_completion)"""
+        options = self._options((system or '') + prompt, expected_output)
+        url, payload = self._request(prompt, system, options, stream=False, formato=formato)
+        cache_key, cached = await asyncio.to_thread(self._cached, url, payload)
+        if cached:
+            logger.info(f"💾 Resposta em cache ({len(cached):,} caracteres) - Ollama não consultado")
+            return cached.strip()
+
+        async with self.semaphore:
+            start_time = time.time()
+            response = await self._post(url, payload)
+            try:
+                await self._check_status(response)
+                data = json.loads(await response.body())
+            except asyncio.TimeoutError:
+                await self._raise_timeout()
+            except (ValueError, OSError, asyncio.IncompleteReadError) as e:
+                raise OllamaServiceError(f"Erro ao gerar completion: {str(e)}")
+            finally:
+                await response.close()
+
+        generated_text = self._response_text(data)
+        if not generated_text:
+            raise OllamaServiceError("Ollama retornou resposta vazia")
+        logger.info(f"✅ Resposta do Ollama: {len(generated_text):,} caracteres em {time.time() - start_time:.2f}s "
+                    f"({data.get('prompt_eval_count', 0)} tokens de prompt, {data.get('eval_count', 0)} gerados)")
+
+        if cachear:
+            await self._put_cache(cache_key, generated_text)
+        return generated_text.strip()
+
+    async def generate_completion_stream(self, prompt: str,
+                                         validator: Optional[TOONStreamValidator] = None,
+                                         expected_output: Optional[int] = None,
+                                         system: Optional[str] = None, cachear: bool = True) -> str:
+        """
+        Streaming validado (mesmo comportamento do OllamaService)
+
+        Raises:
+            TOONStreamAbort: estrutura inválida; .partial contém o texto gerado até ali
+            OllamaServiceError: erro de comunicação com o Ollama
+        """
+        validator = validator or TOONStreamValidator()
+        options = self._options((system or '') + prompt, expected_output)
+        url, payload = self._request(prompt, system, options, stream=True)
+        cache_key, cached = await asyncio.to_thread(self._cached, url, payload)
+        if cached:
+            logger.info(f"💾 Resposta em cache ({len(cached):,} caracteres) - Ollama não consultado")
+            if not validator.feed(cached):
+                validator.finish()
+            return cached.strip()
+
+        early_stop = False
+        async with self.semaphore:
+            start_time = time.time()
+            response = await self._post(url, payload)
+            try:
+                await self._check_status(response)
+                async for line in response.lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get('error'):
+                        raise OllamaServiceError(f"Ollama retornou erro: {data['error']}")
+                    piece = self._response_text(data)
+                    if piece and validator.feed(piece):
+                        early_stop = True
+                        break
+                    if data.get('done'):
+                        break
+                if not early_stop:
+                    validator.finish()
+            except TOONStreamAbort as e:
+                logger.warning(f"✂️  Geração interrompida após {time.time() - start_time:.2f}s: {e}")
+                raise
+            except asyncio.TimeoutError:
+                await self._raise_timeout()
+            except (OSError, asyncio.IncompleteReadError) as e:
+                raise OllamaServiceError(f"Erro no streaming do Ollama: {str(e)}")
+            except ValueError as e:
+                raise OllamaServiceError(f"Resposta de streaming inválida do Ollama: {str(e)}")
+            finally:
+                await response.close()
+
+        generated_text = validator.text
+        if not generated_text.strip():
+            raise OllamaServiceError("Ollama retornou resposta vazia")
+        logger.info(f"✅ Streaming do Ollama: {len(generated_text):,} caracteres em {time.time() - start_time:.2f}s"
+                    + (" (TOON completo, encerrado antes do fim)" if early_stop else ""))
+
+        if cachear:
+            await self._put_cache(cache_key, generated_text)
+        return generated_text.strip()
+
+    async def extrair_topicos(self, transcricao: str) -> str:
+        """FASE 1: trechos extraídos concorrentemente (limitados pelo semáforo)"""
+        if estimar_tokens(transcricao) <= config.EXTRACAO_TOKENS_POR_TRECHO:
+            instrucoes, conteudo = mensagens_extracao(transcricao)
+            return await self.generate_completion(conteudo, config.SAIDA_EXTRACAO, system=instrucoes)
+
+        trechos = dividir_transcricao(transcricao, config.EXTRACAO_TOKENS_POR_TRECHO)
+        logger.info(f"✂️  Transcrição longa: {len(trechos)} trechos")
+
+        async def extrair_trecho(indice: int) -> str:
+            instrucoes, conteudo = mensagens_extracao(trechos[indice], indice + 1, len(trechos))
+            return await self.generate_completion(conteudo, config.SAIDA_EXTRACAO, system=instrucoes)
+
+        listas = await asyncio.gather(*(extrair_trecho(i) for i in range(len(trechos))))
+        return mesclar_topicos(listas)
+
+    async def obter_extracao(self, transcricao: str) -> Tuple[str, str]:
+        """FASE 1 com reaproveitamento da extração guardada"""
+        id_ = self.extracao_id(transcricao)
+        lista_extraida = await asyncio.to_thread(self.extracoes.get, id_)
+        if lista_extraida:
+            logger.info(f"♻️  Extração reaproveitada ({id_}) - Fase 1 não executada")
+            return id_, lista_extraida
+        lista_extraida = await self.extrair_topicos(transcricao)
+        await asyncio.to_thread(self.extracoes.put, id_, self.model, lista_extraida, len(transcricao))
+        return id_, lista_extraida
+
+    async def gerar_toon_from_dados(
+        self,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        transcricao: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """Gera a ata (Fase 1 + Fase 2); mesmo retorno do OllamaService: (toon, dados)"""
+        logger.info(f"🚀 Ata: transcrição de {len(transcricao):,} caracteres, participantes: {participantes}")
+        _, lista_extraida = await self.obter_extracao(transcricao)
+        return await self.construir_toon(lista_extraida, participantes, data_hora, local,
+                                         convocado_por, max_retries)
+
+    async def regenerar_toon(
+        self,
+        id_extracao: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """Regera a ata só com a Fase 2, a partir de uma extração guardada"""
+        lista_extraida = await asyncio.to_thread(self.extracoes.get, id_extracao)
+        if not lista_extraida:
+            raise OllamaServiceError(
+                f"Extração {id_extracao} não encontrada. Envie a transcrição para gerar a ata novamente."
+            )
+        return await self.construir_toon(lista_extraida, participantes, data_hora, local,
+                                         convocado_por, max_retries)
+
+    async def construir_toon(
+        self,
+        lista_extraida: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """FASE 2: geração assíncrona; parse, reparo e correção do OllamaService._validar_toon"""
+        if self.formato_construcao == 'json':
+            return await self.construir_json(lista_extraida, participantes, data_hora, local,
+                                             convocado_por, max_retries)
+
+        prompt_atual = mensagens_construcao(lista_extraida, participantes, data_hora, local, convocado_por)
+        for tentativa in range(max_retries + 1):
+            instrucoes, conteudo = prompt_atual
+            toon_gerado, abort = '', None
+            try:
+                if self.stream_validation:
+                    toon_gerado = await self.generate_completion_stream(
+                        conteudo, expected_output=config.SAIDA_CONSTRUCAO, system=instrucoes,
+                        cachear=False)
+                else:
+                    toon_gerado = await self.generate_completion(conteudo, config.SAIDA_CONSTRUCAO,
+                                                                 system=instrucoes, cachear=False)
+            except TOONStreamAbort as e:
+                abort = e
+            # Parse e reparo são CPU; o cache (SQLite) roda fora do event loop
+            resultado, prompt_atual = await asyncio.to_thread(
+                self._validar_toon, prompt_atual, toon_gerado, abort, tentativa, max_retries)
+            if resultado:
+                return resultado
+
+        raise OllamaServiceError("Falha ao gerar TOON válido")
+
+    async def construir_json(
+        self,
+        lista_extraida: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """FASE 2 com saída restrita pelo JSON schema da ata (validação do OllamaService._validar_json)"""
+        erro = None
+        for tentativa in range(max_retries + 1):
+            prompt = mensagens_construcao_json(lista_extraida, participantes, erro)
+            instrucoes, conteudo = prompt
+            resposta = await self.generate_completion(conteudo, config.SAIDA_CONSTRUCAO, system=instrucoes,
+                                                      formato=ATA_SCHEMA, cachear=False)
+            resultado, erro = await asyncio.to_thread(
+                self._validar_json, prompt, resposta, participantes, data_hora, local,
+                convocado_por, tentativa, max_retries)
+            if resultado:
+                return resultado
+
+        raise OllamaServiceError("Falha ao gerar a ata em JSON")
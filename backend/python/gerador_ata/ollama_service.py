@@ -3,19 +3,42 @@ Serviço de comunicação com Ollama para geração de atas
 SDC-Ata-Generator
 """
 
+import json
 import requests
 import logging
+import threading
 import time
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 try:
     from . import config_ata as config
-    from .prompts import criar_prompt_extracao, criar_prompt_construcao, criar_prompt_correcao_toon
+    from .prompts import (mensagens_extracao, mensagens_construcao, mensagens_correcao_toon,
+                          mensagens_construcao_json)
     from .toon_parser import parse_toon, TOONParserError
+    from .toon_stream import TOONStreamValidator, TOONStreamAbort
+    from .ollama_health import OllamaHealthMonitor
+    from .extracao_chunks import dividir_transcricao, mesclar_topicos
+    from .token_budget import budget, estimar_tokens
+    from .response_cache import ResponseCache, make_key
+    from .extracao_store import ExtracaoStore, extracao_id
+    from .toon_repair import reparar_toon
+    from .ata_json import ATA_SCHEMA, AtaJSONError, json_para_dados, dados_para_toon
 except ImportError:
     import config_ata as config
-    from prompts import criar_prompt_extracao, criar_prompt_construcao, criar_prompt_correcao_toon
+    from prompts import (mensagens_extracao, mensagens_construcao, mensagens_correcao_toon,
+                         mensagens_construcao_json)
     from toon_parser import parse_toon, TOONParserError
+    from toon_stream import TOONStreamValidator, TOONStreamAbort
+    from ollama_health import OllamaHealthMonitor
+    from extracao_chunks import dividir_transcricao, mesclar_topicos
+    from token_budget import budget, estimar_tokens
+    from response_cache import ResponseCache, make_key
+    from extracao_store import ExtracaoStore, extracao_id
+    from toon_repair import reparar_toon
+    from ata_json import ATA_SCHEMA, AtaJSONError, json_para_dados, dados_para_toon
 
 
 logger = logging.getLogger(__name__)
@@ -36,11 +59,58 @@ class OllamaService:
         self.temperature = config.OLLAMA_TEMPERATURE
         self.max_tokens = config.OLLAMA_MAX_TOKENS
         self.top_p = config.OLLAMA_TOP_P
+        self.stream_validation = config.OLLAMA_STREAM_VALIDATION
+        self.formato_construcao = config.OLLAMA_CONSTRUCAO_FORMATO
+        self.use_chat = config.OLLAMA_USE_CHAT
+        self.keep_alive = config.OLLAMA_KEEP_ALIVE
+        self.cache = ResponseCache() if config.OLLAMA_CACHE_ENABLED else None
+        self.extracoes = ExtracaoStore()
+
+        # Um adapter (pool urllib3, thread-safe) compartilhado pelas sessões
+        # de cada thread: conexões keep-alive reaproveitadas entre chamadas
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.OLLAMA_POOL_SIZE,
+            max_retries=Retry(
+                total=config.OLLAMA_RETRIES,
+                connect=config.OLLAMA_RETRIES,
+                read=0,  # nunca repetir uma geração que já chegou ao Ollama
+                status=config.OLLAMA_RETRIES,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                backoff_factor=config.OLLAMA_RETRY_BACKOFF,
+                raise_on_status=False,
+            ),
+        )
+        self._local = threading.local()
+
+        self.health = OllamaHealthMonitor(
+            self.check_health,
+            state_file=config.OLLAMA_HEALTH_STATE_FILE,
+            ttl=config.OLLAMA_HEALTH_TTL,
+            threshold=config.OLLAMA_BREAKER_THRESHOLD,
+            cooldown=config.OLLAMA_BREAKER_COOLDOWN,
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """Sessão da thread atual (requests.Session não é thread-safe; o pool é compartilhado)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+
+    def close(self) -> None:
+        """Fecha as conexões do pool"""
+        self._adapter.close()
 
     def check_health(self) -> bool:
         """Verifica se Ollama está online"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except Exception as e:
             logger.warning(f"Ollama não disponível: {e}")
@@ -49,7 +119,7 @@ class OllamaService:
     def list_models(self) -> list:
         """Lista modelos disponíveis no Ollama"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=10)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return [model['name'] for model in data.get('models', [])]
@@ -58,9 +128,91 @@ class OllamaService:
             logger.error(f"Erro ao listar modelos: {e}")
             return []
 
-    def generate_completion(self, prompt: str) -> str:
-        """Envia prompt para Ollama e retorna resposta"""
+    def _options(self, prompt: str, expected_output: Optional[int] = None) -> dict:
+        """Opções de amostragem com num_ctx/num_predict dimensionados para o prompt"""
+        num_ctx, num_predict = budget.size(prompt, expected_output)
+        return {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "num_predict": num_predict,
+            "num_ctx": num_ctx
+        }
+
+    def _request(self, prompt: str, system: Optional[str], options: dict,
+                 stream: bool, formato: Optional[dict] = None) -> Tuple[str, dict]:
+        """
+        URL e payload da geração
+
+        Com OLLAMA_USE_CHAT as instruções fixas vão como mensagem de sistema
+        no /api/chat; sem ele, no campo system do /api/generate. Nos dois
+        casos ficam antes do conteúdo variável, e keep_alive mantém o modelo
+        (e o KV cache desse prefixo) carregado entre requisições.
+        formato (JSON schema) restringe a saída via campo format do Ollama.
+        """
+        if self.use_chat:
+            messages = []
+            if system:
+                messages.append({"role": "system", "content": system})
+            messages.append({"role": "user", "content": prompt})
+            endpoint = "/api/chat"
+            payload = {"model": self.model, "messages": messages}
+        else:
+            endpoint = "/api/generate"
+            payload = {"model": self.model, "prompt": prompt}
+            if system:
+                payload["system"] = system
+        payload.update(stream=stream, options=options, keep_alive=self.keep_alive)
+        if formato is not None:
+            payload["format"] = formato
+        return f"{self.base_url}{endpoint}", payload
+
+    def _cached(self, url: str, payload: dict) -> Tuple[Optional[str], Optional[str]]:
+        """(chave, resposta em cache) da requisição; (None, None) com o cache desligado"""
+        if self.cache is None:
+            return None, None
+        key = make_key(url[len(self.base_url):], payload)
+        return key, self.cache.get(key)
+
+    def _guardar_em_cache(self, prompt: str, system: Optional[str], expected_output: Optional[int],
+                          texto: str, formato: Optional[dict] = None) -> None:
+        """
+        Guarda uma resposta da Fase 2 depois de validada
+
+        A construção e a correção geram com cachear=False: uma saída que não
+        passa no parse nunca entra no cache (senão toda nova tentativa com o
+        mesmo prompt devolveria a mesma resposta quebrada). Guarda-se o texto
+        validado (após limpeza ou reparo local) sob a chave da requisição
+        original; stream não entra na chave.
+        """
+        if self.cache is None:
+            return
+        options = self._options((system or '') + prompt, expected_output)
+        url, payload = self._request(prompt, system, options, stream=False, formato=formato)
+        self.cache.put(make_key(url[len(self.base_url):], payload), self.model, texto)
+
+    @staticmethod
+    def _response_text(data: dict) -> str:
+        """Texto gerado de uma resposta (ou linha NDJSON) do /api/chat ou /api/generate"""
+        if 'message' in data:
+            return data['message'].get('content', '')
+        return data.get('response', '')
+
+    def generate_completion(self, prompt: str, expected_output: Optional[int] = None,
+                            system: Optional[str] = None, formato: Optional[dict] = None,
+                            cachear: bool = True) -> str:
+        """
+        Envia prompt para Ollama e retorna resposta
+
+        Args:
+            prompt: conteúdo variável enviado ao modelo
+            expected_output: tokens de saída esperados (dimensiona num_predict/num_ctx)
+            system: instruções fixas (prefixo reaproveitado pelo cache do Ollama)
+            formato: JSON schema da saída (geração restrita pelo Ollama)
+            cachear: False deixa a resposta fora do cache (a Fase 2 só guarda
+                o que passou no parse, via _guardar_em_cache)
+        """
         try:
+            options = self._options((system or '') + prompt, expected_output)
             # Log detalhado do prompt
             prompt_size = len(prompt)
             prompt_preview = prompt[:200].replace('\n', ' ')
@@ -68,29 +220,27 @@ class OllamaService:
             logger.info(f"📊 INICIANDO GERAÇÃO COM OLLAMA")
             logger.info(f"   Modelo: {self.model}")
             logger.info(f"   Tamanho do prompt: {prompt_size:,} caracteres")
+            if system:
+                logger.info(f"   Instruções fixas: {len(system):,} caracteres")
             logger.info(f"   Preview: {prompt_preview}...")
             logger.info(f"   Temperature: {self.temperature}")
             logger.info(f"   Top P: {self.top_p}")
-            logger.info(f"   Max tokens: {self.max_tokens}")
+            logger.info(f"   Tokens estimados: {estimar_tokens((system or '') + prompt):,}")
+            logger.info(f"   num_ctx: {options['num_ctx']} | num_predict: {options['num_predict']}")
             logger.info("="*60)
 
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": self.temperature,
-                    "top_p": self.top_p,
-                    "num_predict": self.max_tokens
-                }
-            }
+            url, payload = self._request(prompt, system, options, stream=False, formato=formato)
+            cache_key, cached = self._cached(url, payload)
+            if cached:
+                logger.info(f"💾 Resposta em cache ({len(cached):,} caracteres) - Ollama não consultado")
+                return cached.strip()
 
             # Marcar início da geração
             start_time = time.time()
             logger.info("⏱️  Enviando requisição para Ollama...")
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
+            response = self.session.post(
+                url,
                 json=payload,
                 timeout=self.timeout
             )
@@ -103,9 +253,10 @@ class OllamaService:
                 raise OllamaServiceError(
                     f"Ollama retornou status {response.status_code}: {response.text}"
                 )
+            self.health.record_success()
 
             data = response.json()
-            generated_text = data.get('response', '')
+            generated_text = self._response_text(data)
 
             if not generated_text:
                 logger.error("❌ Ollama retornou resposta vazia")
@@ -119,6 +270,9 @@ class OllamaService:
             total_duration = data.get('total_duration', 0) / 1_000_000_000  # Converter de ns para s
             eval_count = data.get('eval_count', 0)  # Tokens gerados
             eval_duration = data.get('eval_duration', 0) / 1_000_000_000
+            # Tokens do prompt realmente avaliados (o prefixo em cache não entra)
+            prompt_eval_count = data.get('prompt_eval_count', 0)
+            prompt_eval_duration = data.get('prompt_eval_duration', 0) / 1_000_000_000
 
             tokens_per_sec = eval_count / eval_duration if eval_duration > 0 else 0
 
@@ -126,11 +280,15 @@ class OllamaService:
             logger.info(f"✅ RESPOSTA RECEBIDA DO OLLAMA")
             logger.info(f"   Tempo total: {elapsed_time:.2f}s")
             logger.info(f"   Tamanho da resposta: {response_size:,} caracteres")
+            logger.info(f"   Prompt avaliado: {prompt_eval_count} tokens em {prompt_eval_duration:.2f}s")
             logger.info(f"   Tokens gerados: {eval_count}")
             logger.info(f"   Velocidade: {tokens_per_sec:.1f} tokens/s")
             logger.info(f"   Preview: {response_preview}...")
             logger.info("="*60)
 
+            if cache_key and cachear:
+                self.cache.put(cache_key, self.model, generated_text)
+
             # PRINT COMPLETO DO OUTPUT DA IA
             # Output completo removido para logs mais limpos
             # Se precisar debug, descomente as linhas abaixo:
@@ -143,16 +301,198 @@ class OllamaService:
             return generated_text.strip()
 
         except requests.exceptions.Timeout:
+            # Ollama travado (runner preso, fila cheia) conta para o circuit breaker
+            self.health.record_failure(f"Timeout ({self.timeout}s)")
             raise OllamaServiceError(
                 f"Timeout ao aguardar resposta do Ollama ({self.timeout}s)"
             )
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.ConnectionError as e:
+            self.health.record_failure(str(e))
             raise OllamaServiceError(
                 f"Não foi possível conectar ao Ollama em {self.base_url}"
             )
         except Exception as e:
             raise OllamaServiceError(f"Erro ao gerar completion: {str(e)}")
 
+    def generate_completion_stream(self, prompt: str,
+                                   validator: Optional[TOONStreamValidator] = None,
+                                   expected_output: Optional[int] = None,
+                                   system: Optional[str] = None, cachear: bool = True) -> str:
+        """
+        Gera em streaming (NDJSON) validando o TOON à medida que chega
+
+        A conexão é fechada assim que o validador detecta estrutura
+        irrecuperável (o Ollama interrompe a geração ao perder o cliente)
+        ou quando o TOON fica completo.
+
+        Raises:
+            TOONStreamAbort: estrutura inválida; .partial contém o texto gerado até ali
+            OllamaServiceError: erro de comunicação com o Ollama
+        """
+        validator = validator or TOONStreamValidator()
+        options = self._options((system or '') + prompt, expected_output)
+        url, payload = self._request(prompt, system, options, stream=True)
+        cache_key, cached = self._cached(url, payload)
+        if cached:
+            logger.info(f"💾 Resposta em cache ({len(cached):,} caracteres) - Ollama não consultado")
+            # A resposta guardada passa pelo mesmo validador (pode vir do modo sem streaming)
+            if not validator.feed(cached):
+                validator.finish()
+            return cached.strip()
+
+        logger.info("="*60)
+        logger.info(f"📊 INICIANDO GERAÇÃO EM STREAMING COM OLLAMA")
+        logger.info(f"   Modelo: {self.model}")
+        logger.info(f"   Tamanho do prompt: {len(prompt):,} caracteres")
+        logger.info(f"   num_ctx: {options['num_ctx']} | num_predict: {options['num_predict']}")
+        logger.info("="*60)
+
+        start_time = time.time()
+        first_token_time = None
+        stats = {}
+        early_stop = False
+
+        try:
+            # Timeout de leitura vale entre chunks, não para a geração inteira
+            response = self.session.post(
+                url,
+                json=payload,
+                stream=True,
+                timeout=(10, self.timeout)
+            )
+        except requests.exceptions.Timeout:
+            # Ollama travado (runner preso, fila cheia) conta para o circuit breaker
+            self.health.record_failure(f"Timeout ({self.timeout}s)")
+            raise OllamaServiceError(
+                f"Timeout ao aguardar resposta do Ollama ({self.timeout}s)"
+            )
+        except requests.exceptions.ConnectionError as e:
+            self.health.record_failure(str(e))
+            raise OllamaServiceError(
+                f"Não foi possível conectar ao Ollama em {self.base_url}"
+            )
+
+        try:
+            if response.status_code != 200:
+                logger.error(f"❌ Ollama retornou erro {response.status_code}")
+                raise OllamaServiceError(
+                    f"Ollama retornou status {response.status_code}: {response.text}"
+                )
+            self.health.record_success()
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('error'):
+                    raise OllamaServiceError(f"Ollama retornou erro: {data['error']}")
+
+                piece = self._response_text(data)
+                if piece:
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    if validator.feed(piece):
+                        early_stop = True
+                        break
+
+                if data.get('done'):
+                    stats = data
+                    break
+
+            if not early_stop:
+                validator.finish()
+
+        except TOONStreamAbort as e:
+            logger.warning("="*60)
+            logger.warning(f"✂️  GERAÇÃO ABORTADA após {time.time() - start_time:.2f}s")
+            logger.warning(f"   Motivo: {e}")
+            logger.warning(f"   Texto gerado até o abort: {len(e.partial):,} caracteres")
+            logger.warning("="*60)
+            raise
+        except requests.exceptions.Timeout:
+            # Ollama travado (runner preso, fila cheia) conta para o circuit breaker
+            self.health.record_failure(f"Timeout ({self.timeout}s)")
+            raise OllamaServiceError(
+                f"Timeout ao aguardar resposta do Ollama ({self.timeout}s)"
+            )
+        except requests.exceptions.ConnectionError as e:
+            # Timeout de leitura entre chunks chega como ConnectionError
+            self.health.record_failure(str(e))
+            raise OllamaServiceError(f"Erro no streaming do Ollama: {str(e)}")
+        except requests.exceptions.RequestException as e:
+            raise OllamaServiceError(f"Erro no streaming do Ollama: {str(e)}")
+        except ValueError as e:
+            raise OllamaServiceError(f"Resposta de streaming inválida do Ollama: {str(e)}")
+        finally:
+            # Fechar a conexão interrompe a geração no Ollama
+            response.close()
+
+        generated_text = validator.text
+        if not generated_text.strip():
+            logger.error("❌ Ollama retornou resposta vazia")
+            raise OllamaServiceError("Ollama retornou resposta vazia")
+
+        elapsed_time = time.time() - start_time
+        eval_count = stats.get('eval_count', 0)
+        eval_duration = stats.get('eval_duration', 0) / 1_000_000_000
+        tokens_per_sec = eval_count / eval_duration if eval_duration > 0 else 0
+
+        logger.info("="*60)
+        logger.info(f"✅ RESPOSTA RECEBIDA DO OLLAMA (streaming)")
+        logger.info(f"   Tempo total: {elapsed_time:.2f}s")
+        if first_token_time is not None:
+            logger.info(f"   Primeiro token: {first_token_time:.2f}s")
+        logger.info(f"   Tamanho da resposta: {len(generated_text):,} caracteres")
+        if early_stop:
+            logger.info("   TOON completo - geração encerrada antes do fim do stream")
+        else:
+            logger.info(f"   Prompt avaliado: {stats.get('prompt_eval_count', 0)} tokens")
+            logger.info(f"   Tokens gerados: {eval_count}")
+            logger.info(f"   Velocidade: {tokens_per_sec:.1f} tokens/s")
+        logger.info("="*60)
+
+        if cache_key and cachear:
+            self.cache.put(cache_key, self.model, generated_text)
+
+        return generated_text.strip()
+
+    def extrair_topicos(self, transcricao: str) -> str:
+        """
+        FASE 1: lista numerada de tópicos da transcrição
+
+        Transcrições que cabem em EXTRACAO_TOKENS_POR_TRECHO usam um único
+        prompt. As maiores são divididas em trechos (fim de frase), extraídas
+        em paralelo (EXTRACAO_PARALELISMO prompts simultâneos) e as listas
+        parciais são unidas sem tópicos duplicados.
+        """
+        tokens = estimar_tokens(transcricao)
+        if tokens <= config.EXTRACAO_TOKENS_POR_TRECHO:
+            instrucoes, conteudo = mensagens_extracao(transcricao)
+            logger.info(f"📝 Prompt de extração criado: {len(instrucoes) + len(conteudo):,} caracteres")
+            return self.generate_completion(conteudo, config.SAIDA_EXTRACAO, system=instrucoes)
+
+        trechos = dividir_transcricao(transcricao, config.EXTRACAO_TOKENS_POR_TRECHO)
+        paralelismo = max(1, min(config.EXTRACAO_PARALELISMO, len(trechos)))
+        logger.info(f"✂️  Transcrição longa (~{tokens:,} tokens): {len(trechos)} trechos, "
+                    f"{paralelismo} em paralelo")
+
+        def extrair_trecho(indice: int) -> str:
+            instrucoes, conteudo = mensagens_extracao(trechos[indice], indice + 1, len(trechos))
+            lista = self.generate_completion(conteudo, config.SAIDA_EXTRACAO, system=instrucoes)
+            logger.info(f"   ✅ Trecho {indice + 1}/{len(trechos)} extraído")
+            return lista
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=paralelismo, thread_name_prefix='extracao') as executor:
+            # map preserva a ordem dos trechos; o primeiro erro é propagado
+            listas = list(executor.map(extrair_trecho, range(len(trechos))))
+
+        lista_extraida = mesclar_topicos(listas)
+        total_itens = sum(len([l for l in lista.split('\n') if l.strip()]) for lista in listas)
+        logger.info(f"🔗 REDUCE: {total_itens} itens parciais -> "
+                    f"{len(lista_extraida.splitlines())} tópicos em {time.time() - start_time:.2f}s")
+        return lista_extraida
+
     def gerar_toon_from_dados(
         self,
         participantes: str,
@@ -185,10 +525,7 @@ class OllamaService:
         logger.info("🔵 FASE 1: EXTRAÇÃO FIEL DE TÓPICOS")
         logger.info("🔵"*35)
 
-        prompt_extracao = criar_prompt_extracao(transcricao)
-        logger.info(f"📝 Prompt de extração criado: {len(prompt_extracao):,} caracteres")
-
-        lista_extraida = self.generate_completion(prompt_extracao)
+        _, lista_extraida = self.obter_extracao(transcricao)
 
         logger.info("="*70)
         logger.info("✅ FASE 1 CONCLUÍDA - Lista extraída com sucesso")
@@ -196,6 +533,77 @@ class OllamaService:
         logger.info(f"   📋 Preview: {lista_extraida[:150].replace(chr(10), ' ')}...")
         logger.info("="*70 + "\n")
 
+        return self.construir_toon(lista_extraida, participantes, data_hora, local,
+                                   convocado_por, max_retries)
+
+    def extracao_id(self, transcricao: str) -> str:
+        """Identificador da extração da Fase 1 desta transcrição (para regerar a ata)"""
+        return extracao_id(transcricao, self.model)
+
+    def obter_extracao(self, transcricao: str) -> Tuple[str, str]:
+        """
+        FASE 1 com reaproveitamento: (extracao_id, lista extraída)
+
+        A lista fica guardada sob o hash da transcrição; a mesma transcrição
+        (ata regerada com outros metadados) não passa de novo pela Fase 1.
+        """
+        id_ = self.extracao_id(transcricao)
+        lista_extraida = self.extracoes.get(id_)
+        if lista_extraida:
+            logger.info(f"♻️  Extração reaproveitada ({id_}) - Fase 1 não executada")
+            return id_, lista_extraida
+
+        lista_extraida = self.extrair_topicos(transcricao)
+        self.extracoes.put(id_, self.model, lista_extraida, len(transcricao))
+        return id_, lista_extraida
+
+    def regenerar_toon(
+        self,
+        id_extracao: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """
+        Regera a ata só com a Fase 2, a partir de uma extração guardada
+
+        Raises:
+            OllamaServiceError: se a extração não existe (transcrição precisa ser reenviada)
+        """
+        lista_extraida = self.extracoes.get(id_extracao)
+        if not lista_extraida:
+            raise OllamaServiceError(
+                f"Extração {id_extracao} não encontrada. Envie a transcrição para gerar a ata novamente."
+            )
+
+        logger.info("\n" + "="*70)
+        logger.info("♻️  REGERANDO ATA A PARTIR DA EXTRAÇÃO GUARDADA (somente Fase 2)")
+        logger.info(f"🆔 Extração: {id_extracao}")
+        logger.info(f"👥 Participantes: {participantes}")
+        logger.info(f"📅 Data/Hora: {data_hora}")
+        logger.info(f"📍 Local: {local}")
+        logger.info(f"📢 Convocado por: {convocado_por}")
+        logger.info("="*70 + "\n")
+
+        return self.construir_toon(lista_extraida, participantes, data_hora, local,
+                                   convocado_por, max_retries)
+
+    def construir_toon(
+        self,
+        lista_extraida: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """FASE 2: monta e valida o TOON a partir da lista extraída"""
+        if self.formato_construcao == 'json':
+            return self.construir_json(lista_extraida, participantes, data_hora, local,
+                                       convocado_por, max_retries)
+
         # ===================================================================
         # FASE 2: CONSTRUÇÃO DO TOON A PARTIR DA LISTA EXTRAÍDA
         # ===================================================================
@@ -203,83 +611,33 @@ class OllamaService:
         logger.info("🟢 FASE 2: CONSTRUÇÃO DO TOON")
         logger.info("🟢"*35 + "\n")
 
-        prompt_atual = None  # Controle de prompt (construção ou correção)
+        # Prompt da tentativa (construção ou correção): (instruções, conteúdo)
+        prompt_atual = mensagens_construcao(lista_extraida, participantes, data_hora, local, convocado_por)
+        logger.info(f"📝 Prompt de construção criado: {sum(map(len, prompt_atual)):,} caracteres")
 
         for tentativa in range(max_retries + 1):
             try:
                 logger.info(f"\n🔄 TENTATIVA {tentativa + 1}/{max_retries + 1}")
                 logger.info("-"*70)
-
-                # Se não há prompt de correção pendente, criar prompt de construção
-                if prompt_atual is None:
-                    prompt_atual = criar_prompt_construcao(
-                        lista_extraida,
-                        participantes,
-                        data_hora,
-                        local,
-                        convocado_por
-                    )
-                    logger.info(f"📝 Prompt de construção criado: {len(prompt_atual):,} caracteres")
-                else:
-                    logger.info(f"🔧 Usando prompt de correção: {len(prompt_atual):,} caracteres")
-
-                # Gerar TOON
-                toon_gerado = self.generate_completion(prompt_atual)
-
-                # Limpar markdown
-                logger.info("🧹 Limpando markdown da resposta...")
-                toon_gerado = self._limpar_markdown(toon_gerado)
-                logger.info(f"   TOON limpo: {len(toon_gerado):,} caracteres")
-
-                # PRINT DO TOON LIMPO
-                # TOON limpo removido para logs mais limpos
-                # Se precisar debug, descomente as linhas abaixo:
-                # print("\n" + "📄"*40)
-                # print("📄 TOON APÓS LIMPEZA DE MARKDOWN:")
-                # print("📄"*40)
-                # print(toon_gerado)
-                # print("📄"*40 + "\n")
-
-                # Log do TOON gerado (primeiras linhas)
-                toon_preview = '\n'.join(toon_gerado.split('\n')[:10])
-                logger.debug(f"📄 Preview do TOON gerado:\n{toon_preview}\n...")
-
-                # Tentar parsear
-                logger.info("🔍 Parseando TOON...")
-                dados_parseados = parse_toon(toon_gerado)
-
-                # Extrair estatísticas
-                num_pontos = len(dados_parseados.get('pontos', []))
-                num_proximos_passos = len(dados_parseados.get('proximos_passos', []))
-
-                logger.info("="*70)
-                logger.info("✅ SUCESSO! ATA GERADA COM SUCESSO (FASE 2 CONCLUÍDA)")
-                logger.info(f"   📊 Pontos discutidos: {num_pontos}")
-                logger.info(f"   📋 Próximos passos: {num_proximos_passos}")
-                logger.info(f"   🎯 Tentativa bem-sucedida: {tentativa + 1}/{max_retries + 1}")
-                logger.info("="*70 + "\n")
-
-                return toon_gerado, dados_parseados
-
-            except TOONParserError as e:
-                logger.warning("="*70)
-                logger.warning(f"⚠️  ERRO NO PARSE (tentativa {tentativa + 1})")
-                logger.warning(f"   Erro: {str(e)}")
-                logger.warning("="*70)
-
-                if tentativa < max_retries:
-                    logger.info(f"🔧 Tentando corrigir TOON (tentativa {tentativa + 2}/{max_retries + 1})...")
-                    prompt_atual = criar_prompt_correcao_toon(toon_gerado, str(e))
-                else:
-                    logger.error("="*70)
-                    logger.error("❌ FALHA TOTAL - Todas as tentativas esgotadas")
-                    logger.error(f"   Total de tentativas: {max_retries + 1}")
-                    logger.error(f"   Último erro: {e}")
-                    logger.error("="*70)
-                    raise OllamaServiceError(
-                        f"Não foi possível gerar TOON válido após {max_retries + 1} tentativas. "
-                        f"Último erro: {e}"
-                    )
+                instrucoes, conteudo = prompt_atual
+
+                # Gerar TOON (em streaming, abortando cedo se a estrutura quebrar)
+                toon_gerado, abort = '', None
+                try:
+                    if self.stream_validation:
+                        toon_gerado = self.generate_completion_stream(
+                            conteudo, expected_output=config.SAIDA_CONSTRUCAO, system=instrucoes,
+                            cachear=False)
+                    else:
+                        toon_gerado = self.generate_completion(conteudo, config.SAIDA_CONSTRUCAO,
+                                                               system=instrucoes, cachear=False)
+                except TOONStreamAbort as e:
+                    abort = e
+
+                resultado, prompt_atual = self._validar_toon(prompt_atual, toon_gerado, abort,
+                                                             tentativa, max_retries)
+                if resultado:
+                    return resultado
 
             except OllamaServiceError:
                 raise
@@ -293,6 +651,183 @@ class OllamaService:
 
         raise OllamaServiceError("Falha ao gerar TOON válido")
 
+    def _validar_toon(
+        self,
+        prompt: Tuple[str, str],
+        toon_gerado: str,
+        abort: Optional[TOONStreamAbort],
+        tentativa: int,
+        max_retries: int
+    ) -> Tuple[Optional[Tuple[str, dict]], Optional[Tuple[str, str]]]:
+        """
+        Parse, reparo local e correção de uma tentativa da Fase 2
+
+        Comum ao serviço síncrono e ao AsyncOllamaService, que só fazem a
+        geração. O TOON validado vai para o cache sob o prompt que o gerou.
+
+        Args:
+            prompt: (instruções, conteúdo) que gerou toon_gerado
+            toon_gerado: resposta do modelo
+            abort: TOONStreamAbort do streaming (toon_gerado vazio)
+
+        Returns:
+            ((toon, dados), None) no sucesso ou (None, prompt de correção)
+
+        Raises:
+            OllamaServiceError: tentativas esgotadas
+        """
+        instrucoes, conteudo = prompt
+        erro = abort
+        if erro is None:
+            # Limpar markdown
+            logger.info("🧹 Limpando markdown da resposta...")
+            toon_gerado = self._limpar_markdown(toon_gerado)
+            logger.info(f"   TOON limpo: {len(toon_gerado):,} caracteres")
+
+            # Log do TOON gerado (primeiras linhas)
+            toon_preview = '\n'.join(toon_gerado.split('\n')[:10])
+            logger.debug(f"📄 Preview do TOON gerado:\n{toon_preview}\n...")
+
+            logger.info("🔍 Parseando TOON...")
+            try:
+                dados_parseados = parse_toon(toon_gerado)
+            except TOONParserError as e:
+                erro = e
+            else:
+                self._guardar_em_cache(conteudo, instrucoes, config.SAIDA_CONSTRUCAO, toon_gerado)
+                self._log_sucesso(dados_parseados, tentativa, max_retries)
+                return (toon_gerado, dados_parseados), None
+
+        logger.warning("="*70)
+        logger.warning(f"⚠️  ERRO NO PARSE (tentativa {tentativa + 1})")
+        logger.warning(f"   Erro: {str(erro)}")
+        logger.warning("="*70)
+
+        reparado, toon_gerado, erro = self._reparar(toon_gerado, erro)
+        if reparado:
+            self._guardar_em_cache(conteudo, instrucoes, config.SAIDA_CONSTRUCAO, reparado[0])
+            return reparado, None
+
+        if tentativa < max_retries:
+            logger.info(f"🔧 Tentando corrigir TOON (tentativa {tentativa + 2}/{max_retries + 1})...")
+            prompt_correcao = mensagens_correcao_toon(toon_gerado, str(erro))
+            logger.info(f"🔧 Usando prompt de correção: {sum(map(len, prompt_correcao)):,} caracteres")
+            return None, prompt_correcao
+
+        logger.error("="*70)
+        logger.error("❌ FALHA TOTAL - Todas as tentativas esgotadas")
+        logger.error(f"   Total de tentativas: {max_retries + 1}")
+        logger.error(f"   Último erro: {erro}")
+        logger.error("="*70)
+        raise OllamaServiceError(
+            f"Não foi possível gerar TOON válido após {max_retries + 1} tentativas. "
+            f"Último erro: {erro}"
+        )
+
+    @staticmethod
+    def _log_sucesso(dados_parseados: dict, tentativa: int, max_retries: int) -> None:
+        logger.info("="*70)
+        logger.info("✅ SUCESSO! ATA GERADA COM SUCESSO (FASE 2 CONCLUÍDA)")
+        logger.info(f"   📊 Pontos discutidos: {len(dados_parseados.get('pontos', []))}")
+        logger.info(f"   📋 Próximos passos: {len(dados_parseados.get('proximos_passos', []))}")
+        logger.info(f"   🎯 Tentativa bem-sucedida: {tentativa + 1}/{max_retries + 1}")
+        logger.info("="*70 + "\n")
+
+    def _reparar(self, toon_gerado: str, erro: TOONParserError
+                 ) -> Tuple[Optional[Tuple[str, dict]], str, TOONParserError]:
+        """
+        Reparo local de um TOON que falhou no parse
+
+        Returns:
+            ((toon, dados) se o reparo bastou, TOON para a correção via LLM, erro atual)
+        """
+        if isinstance(erro, TOONStreamAbort):
+            # A correção trabalha sobre o que foi gerado até o abort
+            toon_gerado = self._limpar_markdown(erro.partial)
+
+        # Erros mecânicos são corrigidos localmente, sem nova geração
+        toon_reparado, correcoes = reparar_toon(toon_gerado)
+        if not correcoes:
+            return None, toon_gerado, erro
+        try:
+            dados_parseados = parse_toon(toon_reparado)
+        except TOONParserError as erro_reparo:
+            logger.info(f"🩹 Reparo local insuficiente: {erro_reparo}")
+            return None, toon_reparado, erro_reparo
+        logger.info(f"🩹 TOON reparado localmente ({len(correcoes)} correções), correção via LLM dispensada")
+        for correcao in correcoes:
+            logger.info(f"   - {correcao}")
+        return (toon_reparado, dados_parseados), toon_reparado, erro
+
+    def construir_json(
+        self,
+        lista_extraida: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        max_retries: int = 2
+    ) -> Tuple[str, dict]:
+        """
+        FASE 2 com saída restrita pelo JSON schema da ata (format do Ollama)
+
+        A gramática garante JSON válido; novas tentativas só ocorrem se o
+        modelo devolver listas vazias. Retorna o TOON equivalente e o mesmo
+        dict do parse_toon.
+        """
+        logger.info("🟢"*35)
+        logger.info("🟢 FASE 2: CONSTRUÇÃO DA ATA (JSON SCHEMA)")
+        logger.info("🟢"*35 + "\n")
+
+        erro = None
+        for tentativa in range(max_retries + 1):
+            logger.info(f"\n🔄 TENTATIVA {tentativa + 1}/{max_retries + 1}")
+            prompt = mensagens_construcao_json(lista_extraida, participantes, erro)
+            instrucoes, conteudo = prompt
+            resposta = self.generate_completion(conteudo, config.SAIDA_CONSTRUCAO, system=instrucoes,
+                                                formato=ATA_SCHEMA, cachear=False)
+            resultado, erro = self._validar_json(prompt, resposta, participantes, data_hora, local,
+                                                 convocado_por, tentativa, max_retries)
+            if resultado:
+                return resultado
+
+        raise OllamaServiceError("Falha ao gerar a ata em JSON")
+
+    def _validar_json(
+        self,
+        prompt: Tuple[str, str],
+        resposta: str,
+        participantes: str,
+        data_hora: str,
+        local: str,
+        convocado_por: str,
+        tentativa: int,
+        max_retries: int
+    ) -> Tuple[Optional[Tuple[str, dict]], Optional[str]]:
+        """
+        Validação de uma tentativa da Fase 2 em JSON (comum ao serviço assíncrono)
+
+        Returns:
+            ((toon, dados), None) no sucesso ou (None, erro para o próximo prompt)
+
+        Raises:
+            OllamaServiceError: tentativas esgotadas
+        """
+        try:
+            dados_parseados = json_para_dados(resposta, participantes, data_hora, local, convocado_por)
+        except AtaJSONError as e:
+            logger.warning(f"⚠️  JSON da ata inválido (tentativa {tentativa + 1}): {e}")
+            if tentativa < max_retries:
+                return None, str(e)
+            raise OllamaServiceError(
+                f"Não foi possível gerar a ata em JSON após {max_retries + 1} tentativas. Último erro: {e}"
+            )
+
+        instrucoes, conteudo = prompt
+        self._guardar_em_cache(conteudo, instrucoes, config.SAIDA_CONSTRUCAO, resposta, ATA_SCHEMA)
+        self._log_sucesso(dados_parseados, tentativa, max_retries)
+        return (dados_para_toon(dados_parseados), dados_parseados), None
+
     def _limpar_markdown(self, texto: str) -> str:
         """Remove marcadores markdown e texto extra da resposta do LLM"""
         # Remover blocos de código ```
@@ -9,35 +9,36 @@ FASE 2 - CONSTRUÇÃO:
 - Recebe a lista extraída da FASE 1.
 - Monta a ATA em formato TOON, com estilo corporativo, mais rica e organizada.
 - Não acessa a transcrição diretamente, apenas a lista.
+- Alternativa: saída em JSON restrita por schema (format do Ollama), com
+  os metadados preenchidos pelo código (mensagens_construcao_json).
 
 FIXER - CORREÇÃO TOON:
 - Ajusta apenas formato, sem mudar conteúdo.
 
+LAYOUT PARA CACHE DE PREFIXO:
+Cada prompt é um par (instruções, conteúdo). As instruções são texto fixo,
+idêntico em todas as requisições, e vão primeiro (mensagem de sistema no
+/api/chat); transcrição, lista extraída e metadados vão só no conteúdo.
+Assim o Ollama reaproveita o KV cache das instruções entre atas em vez de
+reprocessar milhares de tokens iguais a cada requisição.
+
 Modelo recomendado: gemma2:9b
 """
 
 from datetime import datetime
+from typing import Tuple
+
+
+def juntar_prompt(instrucoes: str, conteudo: str) -> str:
+    """Prompt único (/api/generate) com as instruções fixas como prefixo"""
+    return instrucoes + conteudo
 
 
 # =========================================================
 # FASE 1: EXTRAÇÃO DETALHADA E SEM REDUNDÂNCIA
 # =========================================================
 
-def criar_prompt_extracao(transcricao: str) -> str:
-    """
-    Extrai TODOS os tópicos relevantes presentes na transcrição,
-    com alta riqueza, sem inventar nada, sem interpretar,
-    sem perder detalhes e sem repetir conteúdo.
-    
-    Esta versão:
-    - Evita redundância
-    - Consolida temas repetidos
-    - Garante nível elevado de detalhamento
-    - Separa temas distintos em tópicos distintos
-    - Produz entre 8 e 20 tópicos reais
-    """
-
-    return f"""
+INSTRUCOES_EXTRACAO = """
 Você está em MODO DE EXTRAÇÃO DETALHADA, SEM REDUNDÂNCIA E SEM ALUCINAÇÃO.
 
 OBJETIVO:
@@ -106,18 +107,56 @@ N. [tópico]
 • Sem frases enormes.
 • Cada linha = 1 tópico único.
 
-------------------------------------------------------------
-TRANSCRIÇÃO
-------------------------------------------------------------
+"""
+
+
+def mensagens_extracao(transcricao: str, parte: int = None,
+                       total_partes: int = None) -> Tuple[str, str]:
+    """
+    Extrai TODOS os tópicos relevantes presentes na transcrição,
+    com alta riqueza, sem inventar nada, sem interpretar,
+    sem perder detalhes e sem repetir conteúdo.
+    
+    Esta versão:
+    - Evita redundância
+    - Consolida temas repetidos
+    - Garante nível elevado de detalhamento
+    - Separa temas distintos em tópicos distintos
+    - Produz entre 8 e 20 tópicos reais
+
+    Com parte/total_partes (extração em map-reduce de reuniões longas), o
+    texto é apenas um trecho e o prompt pede os tópicos daquele trecho.
+    """
+
+    if parte is not None:
+        titulo_transcricao = f"TRECHO {parte} DE {total_partes} DA TRANSCRIÇÃO"
+        aviso_trecho = (
+            "\nATENÇÃO: este é apenas um trecho da reunião. Os demais trechos são\n"
+            "processados separadamente. Extraia SOMENTE o que aparece neste trecho.\n"
+        )
+        quantidade = "entre 3 e 12 TÓPICOS"
+    else:
+        titulo_transcricao = "TRANSCRIÇÃO"
+        aviso_trecho = ""
+        quantidade = "entre 8 e 20 TÓPICOS"
+
+    return INSTRUCOES_EXTRACAO, f"""------------------------------------------------------------
+{titulo_transcricao}
+------------------------------------------------------------{aviso_trecho}
 <INICIO_TRANSCRICAO>
 {transcricao}
 <FIM_TRANSCRICAO>
 
-Agora EXTRAIA entre 8 e 20 TÓPICOS, TODOS distintos,
+Agora EXTRAIA {quantidade}, TODOS distintos,
 TODOS fiéis à transcrição, SEM redundância e SEM inventar nada.
 """
 
 
+def criar_prompt_extracao(transcricao: str, parte: int = None, total_partes: int = None) -> str:
+    """Prompt único de extração (instruções + transcrição)"""
+    return juntar_prompt(*mensagens_extracao(transcricao, parte, total_partes))
+
+
 
 
 # =========================================================
@@ -138,26 +177,7 @@ def _formatar_data(data_hora: str) -> str:
     return data_hora
 
 
-def criar_prompt_construcao(lista_extraida: str,
-                            participantes: str,
-                            data_hora: str,
-                            local: str,
-                            convocado_por: str) -> str:
-    """
-    Constrói a ata em formato TOON usando a lista extraída pela Fase 1.
-    A Fase 2 consolida temas repetidos, separa conteúdos em categorias 
-    corretas e gera uma ata rica, organizada e sem redundância.
-    """
-
-    data_formatada = _formatar_data(data_hora)
-
-    lista_participantes = [p.strip() for p in participantes.split(",") if p.strip()]
-    num_participantes = len(lista_participantes)
-    participantes_formatados = "\n".join(
-        f"{i+1},{nome}" for i, nome in enumerate(lista_participantes)
-    )
-
-    return f"""
+INSTRUCOES_CONSTRUCAO = """
 Você está em MODO DE CONSTRUÇÃO DE ATA PROFISSIONAL.
 
 IMPORTANTE:
@@ -240,7 +260,29 @@ A ata deve:
 ✓ Conter próximos passos fiéis à lista  
 ✓ Ter tom corporativo e técnico  
 
-============================================================
+"""
+
+
+def mensagens_construcao(lista_extraida: str,
+                         participantes: str,
+                         data_hora: str,
+                         local: str,
+                         convocado_por: str) -> Tuple[str, str]:
+    """
+    Constrói a ata em formato TOON usando a lista extraída pela Fase 1.
+    A Fase 2 consolida temas repetidos, separa conteúdos em categorias 
+    corretas e gera uma ata rica, organizada e sem redundância.
+    """
+
+    data_formatada = _formatar_data(data_hora)
+
+    lista_participantes = [p.strip() for p in participantes.split(",") if p.strip()]
+    num_participantes = len(lista_participantes)
+    participantes_formatados = "\n".join(
+        f"{i+1},{nome}" for i, nome in enumerate(lista_participantes)
+    )
+
+    return INSTRUCOES_CONSTRUCAO, f"""============================================================
 LISTA EXTRAÍDA (BASE ÚNICA PARA A ATA)
 ============================================================
 {lista_extraida}
@@ -275,21 +317,62 @@ local:
 """
 
 
+def criar_prompt_construcao(lista_extraida: str,
+                            participantes: str,
+                            data_hora: str,
+                            local: str,
+                            convocado_por: str) -> str:
+    """Prompt único de construção (instruções + lista extraída e metadados)"""
+    return juntar_prompt(*mensagens_construcao(lista_extraida, participantes, data_hora,
+                                               local, convocado_por))
+
+
+def mensagens_construcao_json(lista_extraida: str, participantes: str,
+                              erro_anterior: str = None) -> Tuple[str, str]:
+    """
+    Construção da ata em JSON (geração restrita pelo schema da ata).
 
-    return prompt
+    Mesmas instruções fixas da construção TOON (prefixo em cache). O modelo
+    gera só objetivo, pontos e próximos passos; local, data, convocador e
+    participantes são preenchidos pelo código a partir dos dados recebidos.
+    """
+    lista_participantes = ", ".join(p.strip() for p in participantes.split(",") if p.strip())
+    aviso = ""
+    if erro_anterior:
+        aviso = f"""
+A RESPOSTA ANTERIOR FOI REJEITADA: {erro_anterior}
+"""
+
+    return INSTRUCOES_CONSTRUCAO, f"""============================================================
+LISTA EXTRAÍDA (BASE ÚNICA PARA A ATA)
+============================================================
+{lista_extraida}
+
+============================================================
+PARTICIPANTES (use estes nomes como responsáveis)
+============================================================
+{lista_participantes}
+
+============================================================
+FORMATO FINAL JSON (OBRIGATÓRIO)
+============================================================
+{{
+  "objetivo": "frase clara e objetiva",
+  "pontos": ["ponto consolidado", "..."],
+  "proximos_passos": [
+    {{"acao": "ação", "responsavel": "responsável da lista", "data": "A definir"}}
+  ]
+}}
+{aviso}
+Responda SOMENTE com o JSON.
+"""
 
 
 # =========================================================
 # FASE 3: CORREÇÃO DE FORMATO TOON (FIXER)
 # =========================================================
 
-def criar_prompt_correcao_toon(toon_invalido: str, erro: str) -> str:
-    """
-    Prompt para corrigir TOON inválido.
-    Mantém o conteúdo original e ajusta apenas o formato/layout.
-    """
-
-    return f"""
+INSTRUCOES_CORRECAO = """
 Você está em MODO DE CORREÇÃO DE FORMATO TOON.
 
 NÃO reescreva conteúdo.
@@ -298,35 +381,29 @@ NÃO interprete.
 NÃO altere o texto interno de cada campo.
 Apenas ajuste a estrutura para o formato TOON correto.
 
-TOON COM ERRO:
-{toon_invalido}
-
-ERRO IDENTIFICADO:
-{erro}
-
 INSTRUÇÕES:
 1. Mantenha TODOS os valores de texto como estão (não resuma, não melhore, não modifique).
 2. Ajuste apenas:
    - quebras de linha
    - numeração
    - cabeçalhos de blocos
-   - sintaxe de arrays (pontos[N]{{item,topico}}, etc.)
+   - sintaxe de arrays (pontos[N]{item,topico}, etc.)
 3. Cada campo deve ficar em linha separada.
 4. Arrays devem ter o formato:
 
-   participantes[N]{{num,nome}}:
+   participantes[N]{num,nome}:
    1,[nome]
    2,[nome]
 
-   pontos[N]{{item,topico}}:
+   pontos[N]{item,topico}:
    1,[texto]
    2,[texto]
 
-   proximos_passos[N]{{item,acao,responsavel,data}}:
+   proximos_passos[N]{item,acao,responsavel,data}:
    1,[acao],[responsavel],[data]
    2,[acao],[responsavel],[data]
 
-5. Use chave SIMPLES {{campos}} (não use chave dupla).
+5. Use chave SIMPLES {campos} (não use chave dupla).
 6. Substitua [N] pela quantidade real de itens em cada bloco.
 7. Garanta numeração sequencial: 1, 2, 3, ... sem pular números.
 8. NÃO adicione ``` markdown, nem explicações antes ou depois do TOON.
@@ -338,23 +415,43 @@ data_horario: [valor]
 convocado_por: [valor]
 objetivo: [valor]
 
-participantes[N]{{num,nome}}:
+participantes[N]{num,nome}:
 1,[nome]
 2,[nome]
 
-pontos[N]{{item,topico}}:
+pontos[N]{item,topico}:
 1,[descrição]
 2,[descrição]
 
-proximos_passos[N]{{item,acao,responsavel,data}}:
+proximos_passos[N]{item,acao,responsavel,data}:
 1,[ação],[responsável],[data]
 2,[ação],[responsável],[data]
 
+"""
+
+
+def mensagens_correcao_toon(toon_invalido: str, erro: str) -> Tuple[str, str]:
+    """
+    Prompt para corrigir TOON inválido.
+    Mantém o conteúdo original e ajusta apenas o formato/layout.
+    """
+
+    return INSTRUCOES_CORRECAO, f"""TOON COM ERRO:
+{toon_invalido}
+
+ERRO IDENTIFICADO:
+{erro}
+
 AGORA RETORNE APENAS O TOON CORRIGIDO, INICIANDO COM:
 local:
 """
 
 
+def criar_prompt_correcao_toon(toon_invalido: str, erro: str) -> str:
+    """Prompt único de correção (instruções + TOON com erro)"""
+    return juntar_prompt(*mensagens_correcao_toon(toon_invalido, erro))
+
+
 # =========================================================
 # FIM DO ARQUIVO
 # =========================================================
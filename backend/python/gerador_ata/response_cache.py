@@ -0,0 +1,191 @@
+"""
+Cache persistente de respostas do Ollama
+SDC-Ata-Generator
+
+Gerar de novo a ata da mesma transcrição (ex.: depois de corrigir o local)
+repetia as duas fases no Ollama. Com temperature baixa (0.1) uma resposta
+anterior para exatamente a mesma requisição é aceitável, então ela é
+guardada em SQLite (modo WAL, compartilhado entre os processos do
+gerar_ata.py) e reaproveitada.
+
+Chave: sha256 de endpoint + modelo + opções (temperature, top_p,
+num_predict, num_ctx) + instruções + prompt. Quando o total armazenado
+passa de max_bytes, as respostas usadas há mais tempo são removidas.
+Acertos e falhas são contados no próprio banco.
+
+Erros do cache nunca interrompem a geração: só são registrados no log.
+
+Uso via CLI:
+    python response_cache.py stats
+    python response_cache.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Optional
+
+try:
+    from . import config_ata as config
+except ImportError:
+    import config_ata as config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_key(endpoint: str, payload: dict) -> str:
+    """Chave da requisição (stream e keep_alive não mudam a resposta)"""
+    relevant = {k: v for k, v in payload.items() if k not in ('stream', 'keep_alive')}
+    relevant['endpoint'] = endpoint
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Respostas do LLM em SQLite com remoção LRU por tamanho total"""
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.db_path = db_path or config.OLLAMA_CACHE_DB
+        self.max_bytes = max_bytes if max_bytes is not None else config.OLLAMA_CACHE_MAX_MB * 1024 * 1024
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Aberto só no primeiro uso: importar o serviço não cria o banco
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.executescript(SCHEMA)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            # Só guardada depois do schema: uma falha aqui é tentada de novo no próximo uso
+            self._conn = conn
+        return self._conn
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, key: str) -> Optional[str]:
+        """Resposta guardada ou None (conta acerto/falha)"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        self._count(conn, 'misses')
+                        return None
+                    conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                                 (time.time(), key))
+                    self._count(conn, 'hits')
+                    return row[0]
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Falha ao ler o cache de respostas: {e}")
+                return None
+
+    def put(self, key: str, model: str, response: str) -> None:
+        """Guarda a resposta e remove as menos usadas se passar de max_bytes"""
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", (key, model, response, size, now, now))
+                    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                    if total > self.max_bytes:
+                        self._evict(conn, total - self.max_bytes)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Falha ao gravar no cache de respostas: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, excess: int) -> None:
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        conn.execute("INSERT INTO counters (name, value) VALUES ('evictions', ?) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + ?", (len(victims), len(victims)))
+        logger.info(f"🧹 Cache de respostas: {len(victims)} entradas removidas ({freed / 1024:.0f} KB)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        return {
+            'entries': entries,
+            'size_mb': round(size / 1024 ** 2, 2),
+            'max_mb': round(self.max_bytes / 1024 ** 2, 2),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            'evictions': counters.get('evictions', 0),
+        }
+
+    def clear(self) -> int:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                removed = conn.execute("DELETE FROM responses").rowcount
+                conn.execute("DELETE FROM counters")
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache de respostas do Ollama')
+    parser.add_argument('--db', default=None, help='Caminho do banco do cache')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='Entradas, tamanho e taxa de acerto')
+    sub.add_parser('clear', help='Remove todas as respostas e zera os contadores')
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.db)
+    try:
+        if args.command == 'stats':
+            print(json.dumps(cache.stats(), indent=2))
+        else:
+            print(f"🧹 {cache.clear()} respostas removidas do cache", file=sys.stderr)
+    except (sqlite3.Error, OSError) as e:
+        print(f"❌ Cache de respostas indisponível ({cache.db_path}): {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Orçamento de tokens por requisição ao Ollama
+SDC-Ata-Generator
+
+Estima os tokens do prompt a partir do número de caracteres (razão
+caracteres/token do modelo) e dimensiona por requisição:
+
+- num_predict: saída esperada para o tipo de prompt (extração, construção,
+  correção), limitada por OLLAMA_MAX_TOKENS;
+- num_ctx: prompt + saída com margem, arredondado para a próxima potência
+  de 2 entre OLLAMA_MIN_CTX e OLLAMA_MAX_CTX.
+
+Sem num_ctx o Ollama usa o contexto padrão e corta o início de prompts
+longos sem aviso. Dimensionar por requisição (padrão) aloca só o KV cache
+que cada prompt precisa, mas cada mudança de num_ctx faz o Ollama
+recarregar o modelo e descartar o cache de prefixo das instruções
+(OLLAMA_USE_CHAT + keep_alive). OLLAMA_NUM_CTX fixa o mesmo contexto em
+todas as requisições: o prefixo é reaproveitado entre fases e atas, mas
+toda requisição reserva memória para o contexto inteiro, inclusive as de
+reuniões curtas. Vale ligar quando há memória de sobra e as instruções
+pesam mais que as transcrições; com VRAM apertada ou vários modelos
+carregados, o dimensionamento por requisição é mais seguro. Quando
+prompt + saída não cabem no contexto o estouro é registrado no log.
+
+A razão caracteres/token vem da calibração contra o tokenizer real do
+modelo (prompt_eval_count do Ollama), gravada em TOKEN_CALIBRATION_FILE:
+
+    python token_budget.py calibrate transcricao1.txt transcricao2.txt
+    python token_budget.py estimate prompt.txt
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from typing import Dict, Optional, Tuple
+
+try:
+    from . import config_ata as config
+except ImportError:
+    import config_ata as config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHARS_PER_TOKEN = 3.5  # português, tokenizers SentencePiece/BPE (conservador)
+
+
+def load_calibration(path: Optional[str] = None) -> Dict[str, float]:
+    """{modelo: caracteres por token} (vazio se não calibrado)"""
+    try:
+        with open(path or config.TOKEN_CALIBRATION_FILE, 'r', encoding='utf-8') as f:
+            return {model: float(ratio) for model, ratio in json.load(f).items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def save_calibration(calibration: Dict[str, float], path: Optional[str] = None) -> None:
+    path = path or config.TOKEN_CALIBRATION_FILE
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2, sort_keys=True)
+
+
+class TokenBudget:
+    """Estimativa de tokens e dimensionamento de num_ctx/num_predict"""
+
+    def __init__(self, model: Optional[str] = None, chars_per_token: Optional[float] = None):
+        self.model = model or config.OLLAMA_MODEL
+        self.chars_per_token = (chars_per_token
+                                or load_calibration().get(self.model)
+                                or DEFAULT_CHARS_PER_TOKEN)
+        self.max_ctx = config.OLLAMA_MAX_CTX
+        self.min_ctx = config.OLLAMA_MIN_CTX
+        self.fixed_ctx = min(config.OLLAMA_NUM_CTX, self.max_ctx) if config.OLLAMA_NUM_CTX else None
+        self.max_predict = config.OLLAMA_MAX_TOKENS
+        self.margin = config.TOKEN_SAFETY_MARGIN
+
+    def estimate(self, text: str) -> int:
+        """Tokens estimados do texto"""
+        return int(len(text) / self.chars_per_token) + 1
+
+    def size(self, prompt: str, expected_output: Optional[int] = None) -> Tuple[int, int]:
+        """
+        num_ctx e num_predict para um prompt
+
+        Args:
+            prompt: texto enviado ao modelo
+            expected_output: tokens de saída esperados (None = OLLAMA_MAX_TOKENS)
+
+        Returns:
+            (num_ctx, num_predict)
+        """
+        prompt_tokens = int(self.estimate(prompt) * self.margin)
+        num_predict = min(expected_output or self.max_predict, self.max_predict)
+
+        needed = prompt_tokens + num_predict
+        limit = self.fixed_ctx or self.max_ctx
+        if needed > limit:
+            room = limit - prompt_tokens
+            if room < config.OLLAMA_MIN_PREDICT:
+                logger.warning(
+                    f"⚠️ Prompt (~{prompt_tokens:,} tokens) excede o contexto de {limit:,} tokens "
+                    f"do {self.model}: o Ollama vai cortar o início da entrada")
+                num_predict = config.OLLAMA_MIN_PREDICT
+            else:
+                logger.warning(
+                    f"⚠️ Prompt (~{prompt_tokens:,} tokens) + saída ({num_predict:,}) excedem o "
+                    f"contexto de {limit:,} tokens: saída limitada a {room:,} tokens")
+                num_predict = room
+            return limit, num_predict
+
+        if self.fixed_ctx:
+            return self.fixed_ctx, num_predict
+
+        num_ctx = self.min_ctx
+        while num_ctx < needed:
+            num_ctx *= 2
+        return min(num_ctx, self.max_ctx), num_predict
+
+
+budget = TokenBudget()
+
+
+def estimar_tokens(texto: str) -> int:
+    """Tokens estimados do texto para o modelo configurado"""
+    return budget.estimate(texto)
+
+
+def calibrate(texts, base_url: Optional[str] = None, model: Optional[str] = None) -> float:
+    """
+    Mede caracteres/token do modelo via prompt_eval_count do Ollama
+
+    Cada texto é avaliado com num_predict=1; o custo fixo do template do
+    modelo é descontado avaliando também um prompt mínimo.
+    """
+    import requests
+
+    base_url = base_url or config.OLLAMA_BASE_URL
+    model = model or config.OLLAMA_MODEL
+
+    def prompt_tokens(prompt):
+        response = requests.post(f"{base_url}/api/generate", json={
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"num_predict": 1, "num_ctx": config.OLLAMA_MAX_CTX, "temperature": 0},
+        }, timeout=config.OLLAMA_TIMEOUT)
+        response.raise_for_status()
+        return response.json().get('prompt_eval_count', 0)
+
+    overhead = prompt_tokens('.')
+    total_chars = 0
+    total_tokens = 0
+    for text in texts:
+        # Só o que cabe no contexto é contado pelo Ollama
+        text = text[:int(config.OLLAMA_MAX_CTX * DEFAULT_CHARS_PER_TOKEN * 0.8)]
+        tokens = prompt_tokens(text) - overhead
+        if tokens > 0:
+            total_chars += len(text)
+            total_tokens += tokens
+            print(f"   {len(text):,} caracteres -> {tokens:,} tokens ({len(text) / tokens:.2f} caracteres/token)",
+                  file=sys.stderr)
+    if not total_tokens:
+        raise ValueError("Nenhum token medido")
+    return total_chars / total_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Orçamento de tokens das requisições ao Ollama')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    cal = sub.add_parser('calibrate', help='Calibra caracteres/token com o tokenizer do modelo (via Ollama)')
+    cal.add_argument('files', nargs='+', help='Arquivos de texto representativos (transcrições)')
+    cal.add_argument('--model', default=None)
+
+    est = sub.add_parser('estimate', help='Estima tokens, num_ctx e num_predict de um prompt')
+    est.add_argument('file')
+    est.add_argument('--output', type=int, default=None, help='Tokens de saída esperados')
+
+    args = parser.parse_args()
+
+    if args.command == 'calibrate':
+        model = args.model or config.OLLAMA_MODEL
+        texts = []
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+        try:
+            ratio = calibrate(texts, model=model)
+        except Exception as e:
+            print(f"❌ Falha na calibração: {e}", file=sys.stderr)
+            sys.exit(1)
+        calibration = load_calibration()
+        calibration[model] = round(ratio, 3)
+        save_calibration(calibration)
+        print(f"✅ {model}: {ratio:.3f} caracteres/token salvos em {config.TOKEN_CALIBRATION_FILE}",
+              file=sys.stderr)
+    else:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            prompt = f.read()
+        num_ctx, num_predict = budget.size(prompt, args.output)
+        print(json.dumps({
+            'model': budget.model,
+            'chars_per_token': budget.chars_per_token,
+            'prompt_tokens': budget.estimate(prompt),
+            'num_ctx': num_ctx,
+            'num_predict': num_predict,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
@@ -0,0 +1,187 @@
+"""
+Reparo local (determinístico) de TOON inválido
+SDC-Ata-Generator
+
+Quando o parse_toon falha, a maior parte dos erros é mecânica e não
+precisa de outra geração completa no LLM:
+
+- contagem [N] do cabeçalho diferente do número de linhas
+- cabeçalho com chaves duplas {{...}}, sem ':' ou sem a contagem
+- markdown (blocos ```, títulos #, negrito **, marcadores "- ")
+- linhas numeradas como lista ("1. texto") ou sem número (só com todas as
+  colunas e dentro da contagem declarada; um fence ``` fecha o array)
+- vírgulas a mais dentro do texto (colunas excedentes) ou última coluna
+  faltando (data/responsável -> "A definir")
+- nomes de campos simples fora do padrão ("Local:", "Data Horario:")
+
+reparar_toon reescreve o TOON no formato canônico e devolve a lista de
+correções aplicadas. Se o resultado ainda não passa no parse_toon, o
+OllamaService segue para a rodada de correção via LLM.
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .toon_stream import ARRAY_FIELDS, REQUIRED_FIELDS, unnumbered_row
+except ImportError:
+    from toon_stream import ARRAY_FIELDS, REQUIRED_FIELDS, unnumbered_row
+
+VALOR_PADRAO = 'A definir'
+
+# Cabeçalho tolerante: contagem opcional, 1+ chaves, ':' opcional
+_CABECALHO = re.compile(r'^([a-zA-Z_]+)\s*\[\s*(\d*)\s*\]\s*(?:\{+([^}]*)\}+)?\s*:?\s*$')
+_LINHA_CSV = re.compile(r'^(\d+)\s*,\s*(.*)$')
+_LINHA_LISTA = re.compile(r'^(\d+)\s*[.)\-:]\s+(.+)$')
+_MARCADOR = re.compile(r'^[-*•]\s+')
+_CAMPO = re.compile(r'^([A-Za-zÀ-ÿ_/ ]+?)\s*:\s*(.*)$')
+
+
+def _chave(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', texto.strip().lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'[\s\-/]+', '_', texto)
+
+
+def _limpar_linha(linha: str) -> Optional[str]:
+    """Linha sem markdown (None para linhas que são só markdown)"""
+    linha = linha.replace('**', '').replace('`', '').strip()
+    if not linha or linha.startswith('#'):
+        return None
+    return _MARCADOR.sub('', linha).strip() or None
+
+
+def _montar_linha(valores: List[str], campos: List[str]) -> Tuple[List[str], bool]:
+    """
+    Ajusta os valores ao número de campos
+
+    Colunas a mais (vírgulas dentro do texto) voltam para a primeira coluna
+    descritiva (tópico, ação) com ';' no lugar da vírgula; as colunas finais
+    (responsável, data) são mantidas. Colunas finais faltando recebem
+    VALOR_PADRAO.
+    """
+    total = len(campos)
+    if len(valores) > total:
+        finais = total - 2
+        if not finais:
+            # Vírgulas na última coluna: o parser já as preserva
+            return [valores[0], ', '.join(valores[1:])], False
+        texto = '; '.join(v for v in valores[1:len(valores) - finais] if v)
+        return [valores[0], texto] + valores[len(valores) - finais:], True
+    if len(valores) < total:
+        return valores + [VALOR_PADRAO] * (total - len(valores)), True
+    return valores, False
+
+
+def reparar_toon(toon: str) -> Tuple[str, List[str]]:
+    """
+    Corrige erros mecânicos do TOON gerado
+
+    Args:
+        toon: TOON que falhou no parse_toon
+
+    Returns:
+        (TOON reescrito, correções aplicadas). Lista vazia = nada a corrigir.
+    """
+    correcoes: List[str] = []
+    texto = toon.replace('\\n', '\n')
+    if '```' in texto or '**' in texto:
+        correcoes.append("markdown removido")
+
+    campos: Dict[str, str] = {}
+    arrays: Dict[str, dict] = {}
+    atual: Optional[dict] = None
+    iniciado = False
+
+    for bruta in texto.split('\n'):
+        if bruta.strip().startswith('```'):
+            # Fence fecha o array: texto depois dele é comentário do modelo
+            atual = None
+            continue
+        linha = _limpar_linha(bruta)
+        if linha is None:
+            continue
+
+        cabecalho = _CABECALHO.match(linha)
+        if cabecalho and (cabecalho.group(1) in ARRAY_FIELDS or cabecalho.group(3)):
+            nome, contagem, declarados = cabecalho.groups()
+            esperados = ARRAY_FIELDS.get(nome)
+            campos_array = [c.strip() for c in (declarados or '').split(',') if c.strip()]
+            if esperados and campos_array != esperados:
+                if campos_array and len(campos_array) != len(esperados):
+                    # Layout de colunas diferente: não dá para remapear com segurança
+                    return toon, []
+                correcoes.append(f"campos do cabeçalho '{nome}' padronizados")
+                campos_array = esperados
+            if linha != linha.replace('{{', '{').replace('}}', '}') or not linha.endswith(':') or not contagem:
+                correcoes.append(f"cabeçalho de '{nome}' normalizado")
+            atual = arrays.setdefault(nome, {'campos': campos_array, 'declarado': None, 'linhas': []})
+            if contagem:
+                atual['declarado'] = (atual['declarado'] or 0) + int(contagem)
+            iniciado = True
+            continue
+
+        campo = _CAMPO.match(linha)
+        chave = _chave(campo.group(1)) if campo else None
+        if chave in REQUIRED_FIELDS:
+            if campo.group(1) != chave:
+                correcoes.append(f"campo '{campo.group(1).strip()}' renomeado para '{chave}'")
+            campos[chave] = campo.group(2).strip()
+            atual = None
+            iniciado = True
+            continue
+
+        if not iniciado or atual is None:
+            # Texto antes do TOON ou entre seções (introdução, comentários)
+            continue
+
+        csv = _LINHA_CSV.match(linha)
+        if csv:
+            valores = [csv.group(1)] + [v.strip() for v in csv.group(2).split(',')]
+        else:
+            lista = _LINHA_LISTA.match(linha)
+            if lista:
+                valores = [lista.group(1)] + [v.strip() for v in lista.group(2).split(',')]
+            elif (atual['declarado'] is not None and len(atual['linhas']) < atual['declarado']
+                  and unnumbered_row(linha, atual['campos'])):
+                # Linha sem número (com todas as colunas) dentro da contagem declarada
+                valores = [''] + [v.strip() for v in linha.split(',')]
+            else:
+                # Texto depois das linhas declaradas ("Espero ter ajudado")
+                continue
+            correcoes.append(f"linha de '{_nome_array(arrays, atual)}' reformatada: {linha}")
+
+        valores = [v.strip().strip('"').strip() for v in valores]
+        if not any(valores[1:]):
+            continue
+        valores, ajustada = _montar_linha(valores, atual['campos'])
+        if ajustada:
+            correcoes.append(f"colunas ajustadas em '{_nome_array(arrays, atual)}': {linha}")
+        atual['linhas'].append(valores)
+
+    if not iniciado:
+        return toon, []
+
+    saida = [f"{chave}: {valor}" for chave, valor in campos.items()]
+    for nome, array in arrays.items():
+        linhas = array['linhas']
+        if not linhas:
+            continue
+        if array['declarado'] != len(linhas):
+            correcoes.append(
+                f"contagem de '{nome}' corrigida: [{array['declarado']}] -> [{len(linhas)}]")
+        for i, valores in enumerate(linhas, 1):
+            if valores[0] != str(i):
+                correcoes.append(f"itens de '{nome}' renumerados")
+                break
+        saida.append('')
+        saida.append(f"{nome}[{len(linhas)}]{{{','.join(array['campos'])}}}:")
+        saida.extend(','.join([str(i)] + valores[1:]) for i, valores in enumerate(linhas, 1))
+
+    # Correções repetidas (mesma regra em várias linhas) aparecem uma vez
+    return '\n'.join(saida), list(dict.fromkeys(correcoes))
+
+
+def _nome_array(arrays: Dict[str, dict], array: dict) -> str:
+    return next(nome for nome, existente in arrays.items() if existente is array)
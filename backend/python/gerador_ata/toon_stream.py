@@ -0,0 +1,228 @@
+"""
+Validação incremental de TOON durante a geração em streaming
+SDC-Ata-Generator
+
+O validador recebe os pedaços de texto à medida que o Ollama os gera e
+verifica cada linha completa contra a estrutura que o parse_toon exige.
+Assim que a estrutura fica irrecuperável (cabeçalho de array inválido,
+seção faltando, array desconhecido ou com outras colunas) levanta
+TOONStreamAbort e a geração é interrompida, em vez de esperar a resposta
+completa para só então descobrir o erro.
+
+Erros mecânicos que o reparo local (toon_repair) corrige não interrompem
+a geração: contagem [N] diferente do número de linhas, cabeçalho sem ':'
+ou sem contagem, colunas a mais ou faltando, linhas numeradas como lista
+("1. Ana") ou sem número, marcadores "- ", "Local:" em vez de "local:".
+As linhas são contadas com as mesmas regras do reparo, para que uma seção
+reparável não pareça vazia e aborte a seção seguinte; um fence ``` fecha
+o array corrente nos dois.
+
+Também sinaliza quando o TOON está completo (último array com todas as
+linhas declaradas), o que permite encerrar a geração sem esperar texto
+extra que o modelo às vezes adiciona no final.
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+try:
+    from .toon_parser import TOONParserError
+except ImportError:
+    from toon_parser import TOONParserError
+
+
+# Mesma regra do TOONParser (aceita {campo} e {{campo}})
+ARRAY_HEADER = re.compile(r'^([a-zA-Z_]+)\[(\d+)\]\{+([^}]+)\}+:')
+# Variações que o reparo local normaliza: contagem e ':' opcionais
+ARRAY_HEADER_TOLERANT = re.compile(r'^([a-zA-Z_]+)\s*\[\s*(\d*)\s*\]\s*(?:\{+([^}]*)\}+)?\s*:?\s*$')
+ARRAY_LIKE = re.compile(r'^([a-zA-Z_]+)\s*\[')
+# Linhas de dados nas formas que o reparo local aceita (ver toon_repair)
+DATA_ROW = re.compile(r'^\d+\s*,')
+LIST_ROW = re.compile(r'^\d+\s*[.)\-:]\s+\S')
+ROW_NUMBER = re.compile(r'^\d+\s*[,.)\-:]?\s*')
+BULLET = re.compile(r'^[-*•]\s+')
+
+REQUIRED_FIELDS = ['local', 'data_horario', 'convocado_por', 'objetivo']
+
+# Arrays na ordem do prompt, com os campos esperados
+ARRAY_FIELDS = {
+    'participantes': ['num', 'nome'],
+    'pontos': ['item', 'topico'],
+    'proximos_passos': ['item', 'acao', 'responsavel', 'data'],
+}
+ARRAY_ORDER = list(ARRAY_FIELDS)
+
+MAX_PREAMBLE_LINES = 8  # texto antes de "local:" (markdown, frases de introdução)
+
+
+def normalizar_campo(nome: str) -> str:
+    """'Data Horário' -> 'data_horario'"""
+    nome = unicodedata.normalize('NFKD', nome.strip().lower())
+    nome = ''.join(c for c in nome if not unicodedata.combining(c))
+    return re.sub(r'[\s\-/]+', '_', nome)
+
+
+def unnumbered_row(line: str, fields: List[str]) -> bool:
+    """
+    Linha sem número aceita como linha do array: precisa de todas as colunas
+    depois do número (vírgulas suficientes), para que frases soltas do modelo
+    ("Espero ter ajudado") não virem itens
+    """
+    return len(line.split(',')) >= len(fields) - 1
+
+
+class TOONStreamAbort(TOONParserError):
+    """Estrutura TOON irrecuperável detectada durante o streaming"""
+
+    def __init__(self, message: str, partial: str = ''):
+        super().__init__(message)
+        self.partial = partial
+
+
+class TOONStreamValidator:
+    """Valida o TOON linha a linha enquanto é gerado"""
+
+    def __init__(self):
+        self.text = ''
+        self._pending = ''
+        self._started = False
+        self._preamble_lines = 0
+        self.fields: Dict[str, str] = {}
+        self.arrays: Dict[str, int] = {}
+        self._current: Optional[str] = None
+        self._current_fields: List[str] = []
+        self._expected: Optional[int] = 0
+        self._rows = 0
+        self.complete = False
+        self.lines_checked = 0
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Adiciona texto gerado e valida as linhas completas
+
+        Returns:
+            True quando o TOON já está completo
+
+        Raises:
+            TOONStreamAbort: se a estrutura ficou irrecuperável
+        """
+        self.text += chunk
+        self._pending += chunk
+        while '\n' in self._pending:
+            line, self._pending = self._pending.split('\n', 1)
+            self._check_line(line)
+        return self.complete
+
+    def finish(self) -> None:
+        """Valida a última linha (sem quebra de linha final) e o fechamento"""
+        if self._pending:
+            line, self._pending = self._pending, ''
+            self._check_line(line)
+        self._close_array()
+        missing = [field for field in REQUIRED_FIELDS if field not in self.fields]
+        missing += [name for name in ARRAY_ORDER if not self.arrays.get(name)]
+        if missing:
+            self._abort(f"Campos obrigatórios faltando: {', '.join(missing)}")
+
+    def _abort(self, reason: str) -> None:
+        raise TOONStreamAbort(reason, self.text)
+
+    def _check_line(self, raw: str) -> None:
+        # Mesma limpeza do reparo local: fences, headers, negrito, crases e marcadores
+        line = raw.strip()
+        if line.startswith('```'):
+            # Fence fecha o array: o que vem depois é comentário do modelo
+            self._close_array()
+            return
+        line = BULLET.sub('', line.replace('**', '').replace('`', '').strip()).strip()
+        if not line or line.startswith('#'):
+            return
+        if self.complete:
+            return
+        self.lines_checked += 1
+
+        if not self._started:
+            if ':' in line and normalizar_campo(line.split(':', 1)[0]) == 'local':
+                self._started = True
+            else:
+                self._preamble_lines += 1
+                if self._preamble_lines > MAX_PREAMBLE_LINES:
+                    self._abort(f"Resposta não iniciou com 'local:' após {MAX_PREAMBLE_LINES} linhas")
+                return
+
+        header = ARRAY_HEADER.match(line)
+        if header:
+            self._open_array(header.group(1), int(header.group(2)),
+                             [f.strip() for f in header.group(3).split(',')], line)
+            return
+
+        array_like = ARRAY_LIKE.match(line)
+        if array_like and array_like.group(1) in ARRAY_FIELDS:
+            tolerant = ARRAY_HEADER_TOLERANT.match(line)
+            if not tolerant:
+                self._abort(f"Cabeçalho de array inválido: {line}")
+            name, count, fields = tolerant.groups()
+            fields = [f.strip() for f in (fields or '').split(',') if f.strip()] or ARRAY_FIELDS[name]
+            self._open_array(name, int(count) if count else None, fields, line)
+            return
+
+        key = normalizar_campo(line.split(':', 1)[0]) if ':' in line else None
+        if key in REQUIRED_FIELDS:
+            self._close_array()
+            self.fields[key] = line.split(':', 1)[1].strip()
+            return
+
+        if self._current is not None:
+            # Sem número, a linha só conta dentro da contagem declarada e com todas as colunas
+            if (DATA_ROW.match(line) or LIST_ROW.match(line)
+                    or (self._expected is not None and unnumbered_row(line, self._current_fields))):
+                self._data_row(line)
+            return
+
+        if key:
+            self.fields[key] = line.split(':', 1)[1].strip()
+
+    def _open_array(self, name: str, count: Optional[int], fields: List[str], line: str) -> None:
+        self._close_array()
+
+        expected_fields = ARRAY_FIELDS.get(name)
+        if expected_fields is None:
+            self._abort(f"Array desconhecido: {line}")
+        if len(fields) != len(expected_fields):
+            self._abort(f"Campos do array '{name}' inválidos: {fields} (esperado {expected_fields})")
+        if count == 0:
+            self._abort(f"Array '{name}' declarado vazio")
+
+        # Seções anteriores do formato precisam ter aparecido
+        missing = [field for field in REQUIRED_FIELDS if field not in self.fields]
+        missing += [previous for previous in ARRAY_ORDER[:ARRAY_ORDER.index(name)]
+                    if previous not in self.arrays]
+        if missing:
+            self._abort(f"Seção '{name}' iniciada sem: {', '.join(missing)}")
+
+        self._current = name
+        self._current_fields = fields
+        self._expected = count
+        self._rows = 0
+
+    def _data_row(self, line: str) -> None:
+        if self._current is None or (self._expected is not None and self._rows >= self._expected):
+            # Linha extra: o parser a ignora
+            return
+        if not ROW_NUMBER.sub('', line, count=1).strip(' ,"'):
+            # Linha sem valores: o reparo local a descarta
+            return
+        # Colunas a mais ou a menos são ajustadas pelo reparo local
+        self._rows += 1
+        if self._rows == self._expected:
+            self.arrays[self._current] = self._rows
+            if self._current == ARRAY_ORDER[-1]:
+                self.complete = True
+            self._current = None
+
+    def _close_array(self) -> None:
+        """Fecha o array corrente (contagem [N] errada fica para o reparo local)"""
+        if self._current is not None and self._rows:
+            self.arrays[self._current] = self._rows
+        self._current = None
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journal durável de jobs do worker de transcrição
+
+SQLite em modo WAL com o ciclo de vida de cada job:
+
+    submitted -> running -> (chunk completado ...) -> done | failed
+
+Os segmentos de cada janela de 30s concluída são gravados assim que saem da
+inferência. Um worker reiniciado relê os jobs não concluídos, re-enfileira
+cada um e só decodifica as janelas que ainda não têm resultado.
+
+Cada retomada conta como tentativa, também para jobs que nunca saíram de
+submitted (um job cuja reentrada derruba o worker na partida). Jobs que
+chegam a MAX_ATTEMPTS são marcados como failed para não travar a fila em
+todo restart.
+
+Uso via CLI:
+    python job_journal.py list [--state running]
+    python job_journal.py purge --days 7
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get('TRANSCRIBE_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+DB_PATH = os.environ.get('TRANSCRIBE_JOURNAL_DB', os.path.join(DATA_DIR, 'job_journal.db'))
+
+MAX_ATTEMPTS = 3
+
+SUBMITTED = 'submitted'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, submitted_at);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    segments TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (job_id, chunk_index)
+);
+"""
+
+
+class JobJournalError(Exception):
+    """Exceção para erros no journal de jobs"""
+    pass
+
+
+class JobJournal:
+    """Registro durável (SQLite WAL) do estado dos jobs e das janelas concluídas"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # Uma conexão compartilhada entre threads, serializada pelo lock
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            # WAL + NORMAL: commit durável contra crash do processo, fsync no checkpoint
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            try:
+                with self._conn:
+                    return self._conn.execute(sql, params).rowcount
+            except sqlite3.Error as e:
+                raise JobJournalError(f"Journal write failed: {e}") from e
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def submit(self, job_id, payload):
+        """Registra um job novo (idempotente: reenvio do mesmo id é ignorado)"""
+        if not isinstance(job_id, str) or not job_id:
+            # A chave TEXT do SQLite aceita NULL: a linha nunca mais seria atualizada
+            raise JobJournalError(f"Invalid job id: {job_id!r}")
+        return self._execute(
+            "INSERT OR IGNORE INTO jobs (id, payload, state, submitted_at) VALUES (?, ?, ?, ?)",
+            (job_id, json.dumps(payload, ensure_ascii=False), SUBMITTED, time.time())) == 1
+
+    def get(self, job_id):
+        """Dict com state, attempts, payload e result (None se desconhecido)"""
+        rows = self._query("SELECT state, attempts, payload, result, error FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        state, attempts, payload, result, error = rows[0]
+        return {
+            'id': job_id,
+            'state': state,
+            'attempts': attempts,
+            'payload': json.loads(payload),
+            'result': json.loads(result) if result else None,
+            'error': error,
+        }
+
+    def mark_running(self, job_id):
+        self._execute("UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                      (RUNNING, time.time(), job_id))
+
+    def record_chunk(self, job_id, chunk_index, segments):
+        """Grava os segmentos de uma janela concluída"""
+        self._execute(
+            "INSERT OR REPLACE INTO chunks (job_id, chunk_index, segments, completed_at) VALUES (?, ?, ?, ?)",
+            (job_id, chunk_index, json.dumps(segments, ensure_ascii=False), time.time()))
+
+    def completed_chunks(self, job_id):
+        """{índice da janela: segmentos} das janelas já concluídas"""
+        return {index: json.loads(segments) for index, segments in self._query(
+            "SELECT chunk_index, segments FROM chunks WHERE job_id = ?", (job_id,))}
+
+    def mark_done(self, job_id, result):
+        """Finaliza o job; os segmentos por janela não são mais necessários"""
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = ?, finished_at = ?, result = ?, error = NULL WHERE id = ?",
+                        (DONE, time.time(), json.dumps(result, ensure_ascii=False), job_id))
+                    self._conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            except sqlite3.Error as e:
+                raise JobJournalError(f"Journal write failed: {e}") from e
+
+    def mark_failed(self, job_id, error):
+        self._execute("UPDATE jobs SET state = ?, finished_at = ?, error = ? WHERE id = ?",
+                      (FAILED, time.time(), str(error), job_id))
+
+    def recover(self, max_attempts=MAX_ATTEMPTS):
+        """
+        Jobs a retomar após um restart (submitted ou running), em ordem de chegada
+
+        Jobs que já esgotaram as tentativas são marcados como failed; os
+        demais têm a tentativa contada antes de voltar à fila (um job
+        submitted que derruba o worker na reentrada também se esgota).
+
+        Returns:
+            Lista de (job_id, payload)
+        """
+        # Jobs gravados sem id (versões antigas) não podem ser atualizados por id
+        orphans = self._execute("UPDATE jobs SET state = ?, finished_at = ?, error = ? "
+                                "WHERE id IS NULL AND state IN (?, ?)",
+                                (FAILED, time.time(), "Job without id", SUBMITTED, RUNNING))
+        if orphans:
+            print(f"⚠️ {orphans} journaled jobs without id marked as failed", file=sys.stderr)
+
+        pending = []
+        for job_id, payload, state, attempts in self._query(
+                "SELECT id, payload, state, attempts FROM jobs WHERE state IN (?, ?) ORDER BY submitted_at",
+                (SUBMITTED, RUNNING)):
+            if attempts >= max_attempts:
+                print(f"⚠️ Job {job_id} interrupted {attempts} times, marking as failed", file=sys.stderr)
+                self.mark_failed(job_id, f"Interrupted {attempts} times (worker restarts)")
+                continue
+            if state == SUBMITTED:
+                self._execute("UPDATE jobs SET attempts = attempts + 1 WHERE id = ?", (job_id,))
+            try:
+                pending.append((job_id, json.loads(payload)))
+            except ValueError as e:
+                self.mark_failed(job_id, f"Unreadable payload: {e}")
+        return pending
+
+    def list(self, state=None):
+        sql = "SELECT id, state, attempts, submitted_at, finished_at FROM jobs"
+        params = ()
+        if state:
+            sql += " WHERE state = ?"
+            params = (state,)
+        return [dict(zip(('id', 'state', 'attempts', 'submitted_at', 'finished_at'), row))
+                for row in self._query(sql + " ORDER BY submitted_at", params)]
+
+    def purge(self, older_than_seconds):
+        """Remove jobs finalizados (done/failed) mais antigos que o limite"""
+        cutoff = time.time() - older_than_seconds
+        removed = self._execute("DELETE FROM jobs WHERE state IN (?, ?) AND finished_at < ?",
+                                (DONE, FAILED, cutoff))
+        self._execute("DELETE FROM chunks WHERE job_id NOT IN (SELECT id FROM jobs)")
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Journal de jobs do worker de transcrição')
+    parser.add_argument('--db', default=None, help='Caminho do journal')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = sub.add_parser('list', help='Lista jobs')
+    list_parser.add_argument('--state', choices=[SUBMITTED, RUNNING, DONE, FAILED])
+
+    purge_parser = sub.add_parser('purge', help='Remove jobs finalizados antigos')
+    purge_parser.add_argument('--days', type=float, default=7)
+
+    args = parser.parse_args()
+    journal = JobJournal(args.db)
+    try:
+        if args.command == 'list':
+            print(json.dumps(journal.list(args.state), indent=2))
+        else:
+            removed = journal.purge(args.days * 86400)
+            print(f"🧹 {removed} finished jobs removed", file=sys.stderr)
+    except JobJournalError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        journal.close()
+
+
+if __name__ == '__main__':
+    main()
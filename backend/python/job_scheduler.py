@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escalonamento shortest-expected-job-first (SEJF) com envelhecimento
+
+Os jobs são ordenados pelo custo previsto (job_stats.predict_cost) em vez da
+ordem de chegada, para que uma reunião de 5 minutos não espere atrás de uma
+gravação de 3 horas.
+
+Envelhecimento: a prioridade efetiva de um job é
+
+    custo - AGING_RATE * tempo_esperando
+
+e, como todos os jobs envelhecem na mesma taxa, comparar prioridades
+efetivas equivale a comparar a chave fixa custo + AGING_RATE * chegada. Um
+job longo é ultrapassado apenas por jobs que chegam antes de ele ter esperado
+a diferença de custo, então nunca fica parado indefinidamente.
+
+Raia de jobs pequenos: até `tiny_workers` threads atendem apenas jobs com
+custo previsto <= tiny_threshold, garantindo vazão para áudios curtos mesmo
+com todos os workers gerais ocupados por jobs longos.
+"""
+
+import sys
+import time
+import heapq
+import itertools
+import threading
+
+AGING_RATE = 1.0          # segundos de prioridade ganhos por segundo de espera
+TINY_JOB_SECONDS = 120.0  # custo previsto abaixo do qual o job vai para a raia rápida
+
+
+class JobSchedulerError(Exception):
+    """Exceção para erros do escalonador de jobs"""
+    pass
+
+
+class ScheduledJob:
+    """Job aguardando (ou em) execução"""
+
+    __slots__ = ('id', 'payload', 'cost', 'lane', 'key', 'submitted_at', 'started_at', 'finished_at')
+
+    def __init__(self, job_id, payload, cost, lane, key):
+        self.id = job_id
+        self.payload = payload
+        self.cost = cost
+        self.lane = lane
+        self.key = key
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+
+class JobScheduler:
+    """Fila SEJF com envelhecimento e raia dedicada a jobs pequenos"""
+
+    def __init__(self, handler, workers=2, tiny_workers=1,
+                 tiny_threshold=TINY_JOB_SECONDS, aging_rate=AGING_RATE):
+        """
+        Args:
+            handler: função(ScheduledJob) executada por um worker
+            workers: threads gerais (atendem qualquer job, menor chave primeiro)
+            tiny_workers: threads exclusivas da raia de jobs pequenos
+            tiny_threshold: custo previsto (s) máximo de um job pequeno
+            aging_rate: taxa de envelhecimento (0 = SEJF puro)
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.handler = handler
+        self.workers = workers
+        self.tiny_workers = tiny_workers
+        self.tiny_threshold = tiny_threshold
+        self.aging_rate = aging_rate
+
+        self._heaps = {'tiny': [], 'normal': []}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closing = False
+        self._started = time.time()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'turnaround': {'tiny': 0.0, 'normal': 0.0},
+            'completed_by_lane': {'tiny': 0, 'normal': 0},
+            'max_wait': 0.0,
+        }
+
+    def start(self):
+        lanes = ['any'] * self.workers + ['tiny'] * self.tiny_workers
+        for index, lane in enumerate(lanes):
+            thread = threading.Thread(target=self._run, args=(lane,), name=f'job-{lane}-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def priority_key(self, cost, submitted_at):
+        """Chave fixa equivalente à prioridade envelhecida (menor = antes)"""
+        return cost + self.aging_rate * (submitted_at - self._started)
+
+    def submit(self, job_id, payload, cost):
+        """
+        Enfileira um job com custo previsto (segundos)
+
+        Returns:
+            ScheduledJob
+        """
+        with self._cond:
+            if self._closing:
+                raise JobSchedulerError("Scheduler is shutting down")
+            lane = 'tiny' if cost <= self.tiny_threshold else 'normal'
+            job = ScheduledJob(job_id, payload, cost, lane, 0.0)
+            job.key = self.priority_key(cost, job.submitted_at)
+            heapq.heappush(self._heaps[lane], (job.key, next(self._seq), job))
+            self.stats['submitted'] += 1
+            self._cond.notify_all()
+        print(f"📥 Job {job_id} queued (lane={lane}, predicted {cost:.0f}s, "
+              f"pending={self.pending()})", file=sys.stderr)
+        return job
+
+    def pending(self):
+        return sum(len(heap) for heap in self._heaps.values())
+
+    def _pop(self, lane):
+        """Próximo job para um worker da raia (None se nada disponível)"""
+        if lane == 'tiny':
+            candidates = [self._heaps['tiny']]
+        else:
+            candidates = [heap for heap in self._heaps.values() if heap]
+        candidates = [heap for heap in candidates if heap]
+        if not candidates:
+            return None
+        heap = min(candidates, key=lambda h: h[0][0])
+        return heapq.heappop(heap)[2]
+
+    def _run(self, lane):
+        while True:
+            with self._cond:
+                job = self._pop(lane)
+                while job is None:
+                    if self._closing:
+                        return
+                    self._cond.wait()
+                    job = self._pop(lane)
+
+            job.started_at = time.time()
+            waited = job.started_at - job.submitted_at
+            try:
+                self.handler(job)
+                failed = False
+            except Exception as e:
+                print(f"❌ Job {job.id} handler failed: {e}", file=sys.stderr)
+                failed = True
+            job.finished_at = time.time()
+
+            with self._cond:
+                self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+                self.stats['failed' if failed else 'completed'] += 1
+                self.stats['completed_by_lane'][job.lane] += 1
+                self.stats['turnaround'][job.lane] += job.finished_at - job.submitted_at
+
+    def stop(self):
+        """Para de aceitar jobs, aguarda a fila esvaziar e encerra os workers"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def summary(self):
+        """Estatísticas (turnaround médio por raia)"""
+        with self._cond:
+            summary = {key: value for key, value in self.stats.items()
+                       if key not in ('turnaround', 'completed_by_lane')}
+            for lane, total in self.stats['turnaround'].items():
+                count = self.stats['completed_by_lane'][lane]
+                summary[f'{lane}_jobs'] = count
+                summary[f'{lane}_mean_turnaround'] = round(total / count, 2) if count else 0.0
+            summary['max_wait'] = round(summary['max_wait'], 2)
+            return summary
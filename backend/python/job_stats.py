@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histórico de execuções e modelo de custo de transcrição
+
+Cada execução do transcribe.py registra duração do áudio, modelo e tempo de
+processamento em um SQLite local. A partir do histórico é ajustado, por
+modelo, um custo linear:
+
+    tempo_estimado = overhead + rtf * duração_do_áudio
+
+(mínimos quadrados sobre as últimas execuções bem-sucedidas). Sem histórico
+suficiente usa uma estimativa conservadora por modelo (PRIOR_RTF).
+
+Uso via CLI:
+    python job_stats.py predict --duration 3600 --model medium
+    python job_stats.py admit --duration 10800 --model medium --deadline 7200 [--queued 1800]
+    python job_stats.py fit
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get('TRANSCRIBE_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+DB_PATH = os.environ.get('TRANSCRIBE_STATS_DB', os.path.join(DATA_DIR, 'job_stats.db'))
+
+# Estimativa sem histórico (CPU, int8): segundos de processamento por segundo de áudio
+PRIOR_RTF = {
+    'tiny': 0.05,
+    'base': 0.08,
+    'small': 0.15,
+    'medium': 0.35,
+    'large': 0.8,
+    'large-v2': 0.8,
+    'large-v3': 0.8,
+}
+PRIOR_OVERHEAD = 20.0  # carga do modelo, extração de áudio etc.
+DEFAULT_PRIOR_RTF = 0.5
+
+MIN_SAMPLES = 3      # execuções necessárias para confiar no ajuste
+FIT_WINDOW = 200     # últimas execuções consideradas por modelo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at REAL NOT NULL,
+    model_size TEXT NOT NULL,
+    compute_type TEXT,
+    mode TEXT,
+    audio_duration REAL NOT NULL,
+    processing_time REAL NOT NULL,
+    decode_time REAL,
+    success INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model_size, success, recorded_at);
+"""
+
+
+class JobStats:
+    """Armazena execuções e estima o custo de novos jobs"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=10)
+        self._conn.executescript(SCHEMA)
+        self._fits = {}
+
+    def close(self):
+        self._conn.close()
+
+    def record_run(self, model_size, audio_duration, processing_time,
+                   compute_type=None, mode=None, decode_time=None, success=True):
+        """Registra uma execução"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (recorded_at, model_size, compute_type, mode, audio_duration, "
+                "processing_time, decode_time, success) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), model_size, compute_type, mode, float(audio_duration),
+                 float(processing_time), decode_time, 1 if success else 0))
+        self._fits.pop(model_size, None)
+
+    def fit(self, model_size):
+        """
+        Ajusta overhead + rtf * duração para o modelo
+
+        Returns:
+            Dict com overhead, rtf, samples e source ('history' ou 'prior')
+        """
+        if model_size in self._fits:
+            return self._fits[model_size]
+
+        rows = self._conn.execute(
+            "SELECT audio_duration, processing_time FROM runs "
+            "WHERE model_size = ? AND success = 1 AND audio_duration > 0 "
+            "AND (mode IS NULL OR mode != 'distributed') "
+            "ORDER BY recorded_at DESC LIMIT ?", (model_size, FIT_WINDOW)).fetchall()
+
+        estimate = None
+        if len(rows) >= MIN_SAMPLES:
+            estimate = _least_squares(rows)
+        if estimate is None:
+            estimate = {
+                'overhead': PRIOR_OVERHEAD,
+                'rtf': PRIOR_RTF.get(model_size, DEFAULT_PRIOR_RTF),
+                'source': 'prior',
+            }
+        estimate['samples'] = len(rows)
+        self._fits[model_size] = estimate
+        return estimate
+
+    def predict_cost(self, audio_duration, model_size='medium'):
+        """Tempo de processamento estimado (segundos) para um áudio"""
+        estimate = self.fit(model_size)
+        seconds = estimate['overhead'] + estimate['rtf'] * audio_duration
+        return dict(estimate, model_size=model_size, audio_duration=audio_duration,
+                    seconds=round(seconds, 1))
+
+    def admit(self, audio_duration, model_size, deadline_seconds, queued_seconds=0.0):
+        """
+        Verifica se o job termina dentro do prazo considerando a fila à frente
+
+        Returns:
+            Dict de predict_cost com admitted, finish_in e deadline
+        """
+        prediction = self.predict_cost(audio_duration, model_size)
+        finish_in = queued_seconds + prediction['seconds']
+        return dict(prediction, admitted=finish_in <= deadline_seconds,
+                    finish_in=round(finish_in, 1), deadline=deadline_seconds)
+
+    def models(self):
+        return [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT model_size FROM runs ORDER BY model_size")]
+
+
+def _least_squares(rows):
+    """Regressão linear simples; None se degenerada (ex.: durações iguais)"""
+    n = len(rows)
+    mean_x = sum(x for x, _ in rows) / n
+    mean_y = sum(y for _, y in rows) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in rows)
+    if var_x <= 0:
+        return None
+    rtf = sum((x - mean_x) * (y - mean_y) for x, y in rows) / var_x
+    overhead = mean_y - rtf * mean_x
+    if rtf <= 0:
+        return None
+    return {'overhead': round(max(overhead, 0.0), 2), 'rtf': round(rtf, 4), 'source': 'history'}
+
+
+def record_transcription(**kwargs):
+    """Registra uma execução sem nunca falhar o job que a chamou"""
+    try:
+        stats = JobStats()
+        try:
+            stats.record_run(**kwargs)
+        finally:
+            stats.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not record job stats: {e}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Histórico e modelo de custo de transcrições')
+    parser.add_argument('--db', default=None, help='Caminho do banco de estatísticas')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    predict = sub.add_parser('predict', help='Estima o tempo de processamento')
+    predict.add_argument('--duration', type=float, required=True, help='Duração do áudio (s)')
+    predict.add_argument('--model', default='medium')
+
+    admit = sub.add_parser('admit', help='Verifica se o job cabe no prazo (exit 0 = sim, 2 = não)')
+    admit.add_argument('--duration', type=float, required=True, help='Duração do áudio (s)')
+    admit.add_argument('--model', default='medium')
+    admit.add_argument('--deadline', type=float, required=True, help='Prazo (s a partir de agora)')
+    admit.add_argument('--queued', type=float, default=0.0, help='Trabalho já na fila à frente (s)')
+
+    sub.add_parser('fit', help='Mostra o ajuste de cada modelo')
+
+    args = parser.parse_args()
+    stats = JobStats(args.db)
+    try:
+        if args.command == 'predict':
+            print(json.dumps(stats.predict_cost(args.duration, args.model)))
+        elif args.command == 'admit':
+            decision = stats.admit(args.duration, args.model, args.deadline, args.queued)
+            print(json.dumps(decision))
+            sys.exit(0 if decision['admitted'] else 2)
+        else:
+            models = sorted(set(stats.models()) | set(PRIOR_RTF))
+            print(json.dumps({model: stats.fit(model) for model in models}, indent=2))
+    finally:
+        stats.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Degradação controlada sob pressão de memória
+
+Monitora o RSS do processo contra um teto configurado (TRANSCRIBE_MEMORY_LIMIT_MB
+ou o limite do cgroup). Ao se aproximar do teto, ou diante de um MemoryError,
+o transcribe.py troca para uma configuração mais leve e continua do ponto em
+que parou, em vez de morrer e ser re-enfileirado do zero pelo Node.
+
+Escada de degradação:
+    1. compute_type menor (float32 -> int8_float32 -> int8)
+    2. modelo menor (large-v3 -> medium -> small)
+    3. janelas mais curtas (chunk_length 30 -> 15)
+"""
+
+import os
+import sys
+
+from capacity_planner import cgroup_memory_limit_mb
+
+# Fração do teto a partir da qual a degradação é disparada
+DEFAULT_THRESHOLD = 0.9
+
+# Próximo degrau (mais leve) de cada configuração
+COMPUTE_TYPE_FALLBACK = {
+    'float32': 'int8_float32',
+    'float16': 'int8_float16',
+    'int8_float32': 'int8',
+    'int8_float16': 'int8',
+}
+MODEL_FALLBACK = {
+    'large-v3': 'medium',
+    'large-v2': 'medium',
+    'large': 'medium',
+    'medium': 'small',
+}
+CHUNK_LENGTH_FALLBACK = {
+    30: 15,
+}
+DEFAULT_CHUNK_LENGTH = 30
+
+
+class MemoryPressure(Exception):
+    """RSS próximo do teto configurado"""
+    pass
+
+
+def current_rss_mb():
+    """RSS atual do processo em MB (None se não for possível medir)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def memory_ceiling_mb():
+    """Teto de memória: TRANSCRIBE_MEMORY_LIMIT_MB ou limite do cgroup"""
+    configured = os.environ.get('TRANSCRIBE_MEMORY_LIMIT_MB')
+    if configured:
+        return float(configured)
+    return cgroup_memory_limit_mb()
+
+
+class MemoryGuard:
+    """Compara o RSS com o teto e sinaliza pressão de memória"""
+
+    def __init__(self, ceiling_mb=None, threshold=None):
+        self.ceiling_mb = ceiling_mb if ceiling_mb is not None else memory_ceiling_mb()
+        if threshold is None:
+            threshold = float(os.environ.get('TRANSCRIBE_MEMORY_THRESHOLD', DEFAULT_THRESHOLD))
+        self.threshold = threshold
+        self.peak_rss_mb = 0.0
+        self._baseline_mb = None
+
+    @property
+    def enabled(self):
+        return self.ceiling_mb is not None
+
+    def rearm(self):
+        """
+        Registra o RSS atual como linha de base (após carregar/recarregar o modelo)
+
+        O alocador nem sempre devolve ao SO a memória do modelo anterior; sem a
+        linha de base a degradação dispararia em cascata logo após a recarga.
+        """
+        self._baseline_mb = current_rss_mb()
+
+    def check(self):
+        """Levanta MemoryPressure se o RSS passou de threshold * teto (e cresceu)"""
+        if not self.enabled:
+            return
+        rss = current_rss_mb()
+        if rss is None:
+            return
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if self._baseline_mb is not None and rss <= self._baseline_mb:
+            return
+        if rss >= self.ceiling_mb * self.threshold:
+            raise MemoryPressure(
+                f"RSS {rss:.0f}MB reached {self.threshold:.0%} of {self.ceiling_mb:.0f}MB ceiling"
+            )
+
+
+def next_degradation(state):
+    """
+    Aplica o próximo degrau de degradação ao estado
+
+    Args:
+        state: dict com model_size, compute_type e chunk_length (alterado in-place)
+
+    Returns:
+        Dict descrevendo a mudança (setting, from, to) ou None se não há mais degraus
+    """
+    for setting, fallback in (('compute_type', COMPUTE_TYPE_FALLBACK),
+                              ('model_size', MODEL_FALLBACK),
+                              ('chunk_length', CHUNK_LENGTH_FALLBACK)):
+        current = state.get(setting)
+        if setting == 'chunk_length' and current is None:
+            current = DEFAULT_CHUNK_LENGTH
+        following = fallback.get(current)
+        if following is not None:
+            state[setting] = following
+            return {'setting': setting, 'from': current, 'to': following}
+    return None
+
+
+def describe_rss():
+    """Texto curto para logs"""
+    rss = current_rss_mb()
+    return f"{rss:.0f}MB" if rss is not None else "unknown"
+
+
+def log_degradation(step, reason):
+    print(f"🪫 Memory pressure ({reason}): degrading {step['setting']} "
+          f"{step['from']} -> {step['to']} (RSS {describe_rss()})", file=sys.stderr)
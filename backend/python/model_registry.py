@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro local de modelos faster-whisper pré-convertidos
+
+Mapeia nomes (medium, small, large-v3...) para diretórios CTranslate2 já
+convertidos em disco, evitando a resolução pelo cache do Hugging Face a cada
+carga (lenta e frágil em ambiente sem internet).
+
+Formato do registro (JSON, padrão: <WHISPER_MODELS_DIR>/registry.json):
+
+    {
+      "models": {
+        "medium": {
+          "path": "faster-whisper-medium",
+          "compute_type": "int8",
+          "sha256": "..."
+        }
+      }
+    }
+
+Caminhos relativos são resolvidos a partir do diretório do registro.
+A verificação do checksum é preguiçosa: o hash completo só é calculado na
+primeira carga (ou quando tamanho/mtime dos arquivos mudam); o resultado fica
+gravado em um arquivo .verified dentro do diretório do modelo.
+
+Uso via CLI:
+    python model_registry.py register medium /models/faster-whisper-medium --compute-type int8
+    python model_registry.py verify [nome] [--force]
+    python model_registry.py list
+"""
+
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+
+DEFAULT_MODELS_DIR = os.environ.get(
+    'WHISPER_MODELS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+)
+DEFAULT_REGISTRY_PATH = os.environ.get(
+    'WHISPER_MODEL_REGISTRY',
+    os.path.join(DEFAULT_MODELS_DIR, 'registry.json')
+)
+
+VERIFIED_STAMP = '.verified'
+HASH_BLOCK_SIZE = 1024 * 1024  # 1MB
+WARMUP_SECONDS = 1.0
+SAMPLE_RATE = 16000
+
+
+class ModelRegistryError(Exception):
+    """Exceção para erros do registro de modelos"""
+    pass
+
+
+def _model_files(model_dir):
+    """Lista (ordenada) dos arquivos do modelo que entram no checksum"""
+    files = []
+    for root, _dirs, names in os.walk(model_dir):
+        for name in names:
+            if name == VERIFIED_STAMP:
+                continue
+            full_path = os.path.join(root, name)
+            files.append(os.path.relpath(full_path, model_dir))
+    return sorted(files)
+
+
+def _stat_signature(model_dir):
+    """Assinatura barata (nome, tamanho, mtime) usada para pular o re-hash"""
+    signature = []
+    for rel_path in _model_files(model_dir):
+        st = os.stat(os.path.join(model_dir, rel_path))
+        signature.append([rel_path.replace(os.sep, '/'), st.st_size, st.st_mtime_ns])
+    return signature
+
+
+def compute_checksum(model_dir):
+    """Calcula sha256 de todos os arquivos do diretório do modelo (ordem estável)"""
+    digest = hashlib.sha256()
+    for rel_path in _model_files(model_dir):
+        digest.update(rel_path.replace(os.sep, '/').encode('utf-8'))
+        with open(os.path.join(model_dir, rel_path), 'rb') as f:
+            while True:
+                block = f.read(HASH_BLOCK_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Registro de modelos locais com verificação de integridade preguiçosa"""
+
+    def __init__(self, registry_path=None):
+        self.registry_path = registry_path or DEFAULT_REGISTRY_PATH
+        self.base_dir = os.path.dirname(os.path.abspath(self.registry_path))
+        self.models = {}
+        self._verified = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.registry_path):
+            return
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ModelRegistryError(f"Invalid model registry {self.registry_path}: {e}")
+        self.models = data.get('models', {})
+
+    def save(self):
+        """Grava o registro de forma atômica"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_path = self.registry_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'models': self.models}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.registry_path)
+
+    def has(self, name):
+        return name in self.models
+
+    def model_path(self, name):
+        """Caminho absoluto do diretório do modelo registrado"""
+        entry = self.models.get(name)
+        if entry is None:
+            raise ModelRegistryError(f"Model '{name}' not found in registry {self.registry_path}")
+        path = entry['path']
+        if not os.path.isabs(path):
+            path = os.path.join(self.base_dir, path)
+        return path
+
+    def register(self, name, path, compute_type='int8'):
+        """Registra (ou atualiza) um modelo, calculando o checksum completo"""
+        abs_path = os.path.abspath(path)
+        if not os.path.isfile(os.path.join(abs_path, 'model.bin')):
+            raise ModelRegistryError(f"{abs_path} is not a CTranslate2 model directory (model.bin missing)")
+
+        checksum = compute_checksum(abs_path)
+        try:
+            stored_path = os.path.relpath(abs_path, self.base_dir)
+            if stored_path.startswith('..'):
+                stored_path = abs_path
+        except ValueError:
+            # Drives diferentes no Windows
+            stored_path = abs_path
+
+        self.models[name] = {
+            'path': stored_path,
+            'compute_type': compute_type,
+            'sha256': checksum,
+        }
+        self._write_stamp(abs_path, checksum)
+        self.save()
+        return self.models[name]
+
+    def _read_stamp(self, model_dir):
+        try:
+            with open(os.path.join(model_dir, VERIFIED_STAMP), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_stamp(self, model_dir, checksum):
+        stamp = {
+            'sha256': checksum,
+            'files': _stat_signature(model_dir),
+            'verified_at': time.time(),
+        }
+        try:
+            with open(os.path.join(model_dir, VERIFIED_STAMP), 'w', encoding='utf-8') as f:
+                json.dump(stamp, f)
+        except OSError as e:
+            # Diretório somente leitura: verificação volta a ser completa na próxima carga
+            print(f"⚠️ Could not write verification stamp in {model_dir}: {e}", file=sys.stderr)
+
+    def verify(self, name, force=False):
+        """
+        Verifica a integridade do modelo registrado
+
+        Só recalcula o hash completo se os arquivos mudaram desde a última
+        verificação (ou se force=True). Levanta ModelRegistryError se divergir.
+        """
+        if name in self._verified and not force:
+            return True
+
+        entry = self.models.get(name)
+        if entry is None:
+            raise ModelRegistryError(f"Model '{name}' not found in registry {self.registry_path}")
+
+        model_dir = self.model_path(name)
+        if not os.path.isdir(model_dir):
+            raise ModelRegistryError(f"Model directory not found for '{name}': {model_dir}")
+
+        expected = entry.get('sha256')
+        if not expected:
+            print(f"⚠️ Model '{name}' has no checksum in registry, skipping verification", file=sys.stderr)
+            self._verified.add(name)
+            return True
+
+        stamp = self._read_stamp(model_dir)
+        if (not force and stamp and stamp.get('sha256') == expected
+                and stamp.get('files') == _stat_signature(model_dir)):
+            self._verified.add(name)
+            return True
+
+        print(f"🔍 Verifying checksum for model '{name}' ({model_dir})...", file=sys.stderr)
+        start = time.time()
+        actual = compute_checksum(model_dir)
+        if actual != expected:
+            raise ModelRegistryError(
+                f"Checksum mismatch for model '{name}': expected {expected}, got {actual}"
+            )
+        print(f"✅ Model '{name}' verified in {time.time() - start:.1f}s", file=sys.stderr)
+
+        self._write_stamp(model_dir, actual)
+        self._verified.add(name)
+        return True
+
+
+_registry = None
+
+
+def get_registry():
+    """Instância compartilhada do registro (carregada uma vez por processo)"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
+
+
+def warmup_model(model):
+    """
+    Executa uma inferência curta (silêncio) para absorver custos únicos de
+    alocação/inicialização antes do primeiro job real
+    """
+    import numpy as np
+
+    start = time.time()
+    silence = np.zeros(int(SAMPLE_RATE * WARMUP_SECONDS), dtype=np.float32)
+    segments, _info = model.transcribe(silence, language='pt', beam_size=1, temperature=0.0)
+    for _ in segments:
+        pass
+    elapsed = time.time() - start
+    print(f"🔥 Model warm-up completed in {elapsed:.2f}s", file=sys.stderr)
+    return elapsed
+
+
+def load_whisper_model(model_size, device='cpu', compute_type=None, cpu_threads=0, warmup=None):
+    """
+    Carrega WhisperModel usando o registro local quando o modelo está registrado
+
+    Args:
+        model_size: nome do modelo (medium, small, large-v3...) ou caminho
+        device: dispositivo ("cpu" ou "cuda")
+        compute_type: força um compute_type; se None usa o do registro (ou int8)
+        cpu_threads: threads do CTranslate2 (0 = padrão da biblioteca)
+        warmup: executa inferência de aquecimento; se None usa WHISPER_WARMUP
+
+    Returns:
+        (model, compute_type efetivo)
+    """
+    from faster_whisper import WhisperModel
+
+    if warmup is None:
+        warmup = os.environ.get('WHISPER_WARMUP', '0') == '1'
+
+    registry = get_registry()
+    if registry.has(model_size):
+        registry.verify(model_size)
+        model_path = registry.model_path(model_size)
+        compute_type = compute_type or registry.models[model_size].get('compute_type', 'int8')
+        print(f"📦 Using registered model '{model_size}': {model_path} (compute_type={compute_type})", file=sys.stderr)
+        model = WhisperModel(model_path, device=device, compute_type=compute_type,
+                             cpu_threads=cpu_threads, local_files_only=True)
+    else:
+        compute_type = compute_type or 'int8'
+        print(f"⚠️ Model '{model_size}' not in local registry, resolving via Hugging Face cache", file=sys.stderr)
+        model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                             cpu_threads=cpu_threads)
+
+    if warmup:
+        warmup_model(model)
+
+    return model, compute_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Registro local de modelos faster-whisper')
+    parser.add_argument('--registry', default=None, help='Caminho do registry.json')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    reg = sub.add_parser('register', help='Registra um diretório de modelo convertido')
+    reg.add_argument('name')
+    reg.add_argument('path')
+    reg.add_argument('--compute-type', default='int8')
+
+    ver = sub.add_parser('verify', help='Verifica checksum dos modelos')
+    ver.add_argument('name', nargs='?')
+    ver.add_argument('--force', action='store_true')
+
+    sub.add_parser('list', help='Lista modelos registrados')
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.registry)
+
+    try:
+        if args.command == 'register':
+            entry = registry.register(args.name, args.path, args.compute_type)
+            print(json.dumps({args.name: entry}, ensure_ascii=False, indent=2))
+        elif args.command == 'verify':
+            names = [args.name] if args.name else list(registry.models)
+            for name in names:
+                registry.verify(name, force=args.force)
+                print(f"✅ {name}")
+        else:
+            print(json.dumps(registry.models, ensure_ascii=False, indent=2))
+    except ModelRegistryError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
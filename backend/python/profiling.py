@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling opcional para transcribe.py e gerador_ata/gerar_ata.py
+
+Desligado por padrão (custo: uma leitura de variável de ambiente). Para ligar:
+
+    SDC_PROFILE=cprofile   (ou 1)  -> cProfile determinístico
+    SDC_PROFILE=sample             -> amostragem da pilha da thread principal
+    --profile / --profile=sample   -> o mesmo, pela linha de comando
+
+Arquivos gerados ao lado das saídas do job:
+
+    <base>.prof           estatísticas do cProfile (pstats / snakeviz)
+    <base>.collapsed.txt  pilhas no formato "f1;f2;f3 valor" (flamegraph.pl,
+                          speedscope). No modo cprofile o cProfile não guarda
+                          pilhas completas, então cada linha é um par
+                          chamador;chamado com o tempo próprio em µs; no modo
+                          sample são pilhas completas com o número de amostras.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_ENV = 'SDC_PROFILE'
+INTERVAL_ENV = 'SDC_PROFILE_INTERVAL_MS'
+DEFAULT_INTERVAL_MS = 5
+
+MODE_ALIASES = {
+    '1': 'cprofile',
+    'true': 'cprofile',
+    'cprofile': 'cprofile',
+    'deterministic': 'cprofile',
+    'sample': 'sample',
+    'sampling': 'sample',
+}
+
+
+def profile_mode(argv=None):
+    """
+    Modo de profiling pedido pela linha de comando ou pelo ambiente
+
+    Returns:
+        'cprofile', 'sample' ou None (desligado)
+    """
+    argv = sys.argv if argv is None else argv
+    for arg in argv:
+        if arg == '--profile':
+            return 'cprofile'
+        if arg.startswith('--profile='):
+            return MODE_ALIASES.get(arg.split('=', 1)[1].lower(), 'cprofile')
+
+    value = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if not value or value in ('0', 'false', 'off'):
+        return None
+    return MODE_ALIASES.get(value, 'cprofile')
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _pstats_label(func):
+    filename, line, name = func
+    return f"{os.path.basename(filename)}:{name}" if line else name
+
+
+class StackSampler:
+    """Amostra periodicamente a pilha de uma thread (padrão: a atual)"""
+
+    def __init__(self, interval_ms=DEFAULT_INTERVAL_MS, thread_id=None):
+        self.interval = interval_ms / 1000.0
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def write_cprofile_collapsed(profiler, path):
+    """Converte as arestas chamador -> chamado do cProfile em linhas colapsadas"""
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    with open(path, 'w', encoding='utf-8') as f:
+        for func, (_cc, _nc, tottime, _ct, callers) in stats.items():
+            label = _pstats_label(func)
+            if not callers:
+                if tottime > 0:
+                    f.write(f"{label} {int(tottime * 1e6)}\n")
+                continue
+            for caller, edge in callers.items():
+                edge_tottime = edge[2]
+                if edge_tottime > 0:
+                    f.write(f"{_pstats_label(caller)};{label} {int(edge_tottime * 1e6)}\n")
+
+
+@contextmanager
+def profiled(output_base, mode=None):
+    """
+    Executa o bloco sob profiling se mode estiver definido
+
+    Args:
+        output_base: caminho base dos arquivos (sem extensão)
+        mode: 'cprofile', 'sample' ou None (sem overhead)
+    """
+    if mode is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    if mode == 'sample':
+        interval = float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL_MS))
+        sampler = StackSampler(interval_ms=interval)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            collapsed_path = output_base + '.collapsed.txt'
+            try:
+                sampler.write_collapsed(collapsed_path)
+                print(f"🔬 Profile ({sum(sampler.samples.values())} samples, "
+                      f"{time.perf_counter() - started:.1f}s): {collapsed_path}", file=sys.stderr)
+            except OSError as e:
+                print(f"⚠️ Could not write profile {collapsed_path}: {e}", file=sys.stderr)
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        prof_path = output_base + '.prof'
+        collapsed_path = output_base + '.collapsed.txt'
+        try:
+            profiler.dump_stats(prof_path)
+            write_cprofile_collapsed(profiler, collapsed_path)
+            print(f"🔬 Profile ({time.perf_counter() - started:.1f}s): {prof_path}, {collapsed_path}",
+                  file=sys.stderr)
+        except OSError as e:
+            print(f"⚠️ Could not write profile {prof_path}: {e}", file=sys.stderr)
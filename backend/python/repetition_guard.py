@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de loops de repetição durante a decodificação
+
+Em gravações ruidosas o Whisper às vezes repete a mesma frase por uma janela
+inteira. O guard inspeciona cada segmento assim que ele sai do gerador:
+taxa de compressão (zlib) do texto recente e repetição de n-gramas. Ao
+detectar degeneração, o transcribe.py interrompe a janela e a re-decodifica
+uma única vez com configuração mais barata.
+"""
+
+import zlib
+from collections import deque
+
+# Mesmo limiar padrão usado pelo Whisper para descartar janelas degeneradas
+COMPRESSION_RATIO_THRESHOLD = 2.4
+NGRAM_SIZE = 3
+NGRAM_REPEAT_THRESHOLD = 0.5  # fração de n-gramas repetidos no histórico recente
+HISTORY_SEGMENTS = 6
+MIN_WORDS = 12                # abaixo disso não há evidência suficiente
+
+
+def compression_ratio(text):
+    """Razão tamanho bruto / tamanho comprimido (texto repetitivo comprime muito)"""
+    data = text.encode('utf-8')
+    if not data:
+        return 0.0
+    return len(data) / len(zlib.compress(data))
+
+
+def ngram_repetition(words, n=NGRAM_SIZE):
+    """Fração de n-gramas que são repetições de um n-grama anterior"""
+    if len(words) < n + 1:
+        return 0.0
+    ngrams = [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+    return 1.0 - len(set(ngrams)) / len(ngrams)
+
+
+class RepetitionGuard:
+    """Avalia segmentos em streaming e sinaliza janelas degeneradas"""
+
+    def __init__(self,
+                 compression_threshold=COMPRESSION_RATIO_THRESHOLD,
+                 ngram_threshold=NGRAM_REPEAT_THRESHOLD,
+                 history=HISTORY_SEGMENTS):
+        self.compression_threshold = compression_threshold
+        self.ngram_threshold = ngram_threshold
+        self._recent = deque(maxlen=history)
+        self.stats = {
+            'activations': 0,
+            'redecoded_windows': 0,
+            'dropped_segments': 0,
+            'recovered_segments': 0,
+        }
+
+    def reset(self):
+        """Limpa o histórico (início de janela nova ou após re-decodificação)"""
+        self._recent.clear()
+
+    def is_degenerate(self, text):
+        """
+        Adiciona o segmento ao histórico e avalia o texto recente
+
+        Returns:
+            Motivo (str) se o texto recente é degenerado, senão None
+        """
+        self._recent.append(text.strip())
+        return self.evaluate(' '.join(self._recent))
+
+    def evaluate(self, text):
+        """Avalia um texto isolado (sem alterar o histórico)"""
+        words = text.lower().split()
+        if len(words) < MIN_WORDS:
+            return None
+
+        ratio = compression_ratio(text)
+        if ratio > self.compression_threshold:
+            return f"compression ratio {ratio:.2f} > {self.compression_threshold}"
+
+        repetition = ngram_repetition(words)
+        if repetition > self.ngram_threshold:
+            return f"{NGRAM_SIZE}-gram repetition {repetition:.0%} > {self.ngram_threshold:.0%}"
+
+        return None
+
+    def record_activation(self, dropped_segments):
+        self.stats['activations'] += 1
+        self.stats['dropped_segments'] += dropped_segments
+
+    def summary(self):
+        return dict(self.stats)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escrita incremental do resultado da transcrição
+
+Em vez de montar um dict com o texto inteiro e serializá-lo com json.dump no
+final, o texto é escrito no arquivo _transcription.json à medida que os
+segmentos são decodificados. O arquivo é gravado em <saida>.tmp e só aparece
+com o nome final (os.replace atômico) quando está completo.
+
+Layout do arquivo (o Node lê apenas "text"):
+
+    {"success": true, "text": "...", "segments": [...], <metadados>}
+
+Enquanto o texto é pequeno (<= spill_threshold) ele também fica em memória,
+para que o resultado possa ir direto pelo stdout sem arquivo.
+
+Compressão opcional (TRANSCRIBE_RESULT_COMPRESSION=gzip|zstd): zstd usa o
+pacote opcional `zstandard`; sem ele, cai para gzip.
+"""
+
+import os
+import io
+import sys
+import json
+import gzip
+import shutil
+import tempfile
+
+DEFAULT_SPILL_THRESHOLD = 30_000  # mesmo limite do stdout no transcribe.py
+COMPRESSION_SUFFIX = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def _json_fragment(text):
+    """Conteúdo de uma string JSON sem as aspas (para escrever em partes)"""
+    return json.dumps(text, ensure_ascii=False)[1:-1]
+
+
+class StreamingResultWriter:
+    """Escreve o JSON do resultado incrementalmente e finaliza de forma atômica"""
+
+    def __init__(self, output_path, compression=None, spill_threshold=DEFAULT_SPILL_THRESHOLD):
+        compression = (compression or '').lower() or None
+        if compression == 'zstd':
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                print("⚠️ zstandard not installed, falling back to gzip", file=sys.stderr)
+                compression = 'gzip'
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.compression = compression
+        self.output_path = output_path + COMPRESSION_SUFFIX.get(compression, '')
+        self.tmp_path = self.output_path + '.tmp'
+        self.spill_threshold = spill_threshold
+
+        self.text_length = 0
+        self.segment_count = 0
+        self._buffer = []          # texto em memória enquanto pequeno
+        self._spilled = bool(compression)
+        self._pending_ws = ''      # espaços finais ainda não escritos (equivale ao strip())
+        self._started_text = False
+        self._closed = False
+
+        self._raw = None
+        self._file = self._open_output()
+        self._file.write('{"success": true, "text": "')
+
+        # Segmentos vão para um arquivo lateral e são copiados no final
+        segments_fd, self._segments_path = tempfile.mkstemp(
+            prefix='segments_', suffix='.jsonl', dir=os.path.dirname(os.path.abspath(self.output_path)))
+        self._segments = io.open(segments_fd, 'w', encoding='utf-8')
+
+    def _open_output(self):
+        if self.compression == 'gzip':
+            return gzip.open(self.tmp_path, 'wt', encoding='utf-8')
+        if self.compression == 'zstd':
+            import zstandard
+            self._raw = open(self.tmp_path, 'wb')
+            stream = zstandard.ZstdCompressor().stream_writer(self._raw)
+            return io.TextIOWrapper(stream, encoding='utf-8')
+        return open(self.tmp_path, 'w', encoding='utf-8')
+
+    @property
+    def spilled(self):
+        """True se o resultado precisa ir por arquivo (texto grande ou comprimido)"""
+        return self._spilled
+
+    @property
+    def buffered_text(self):
+        """Texto completo, disponível apenas enquanto não houve spill"""
+        return None if self._spilled else ''.join(self._buffer)
+
+    def _write_text(self, piece):
+        if not self._started_text:
+            piece = piece.lstrip()
+            if not piece:
+                return
+            self._started_text = True
+
+        body = piece.rstrip()
+        if not body:
+            self._pending_ws += piece
+            return
+
+        chunk = self._pending_ws + body
+        self._pending_ws = piece[len(body):]
+        self._file.write(_json_fragment(chunk))
+        self.text_length += len(chunk)
+
+        if not self._spilled:
+            self._buffer.append(chunk)
+            if self.text_length > self.spill_threshold:
+                self._spilled = True
+                self._buffer = []
+
+    def add_segment(self, start, end, text, avg_logprob=None):
+        """Adiciona um segmento (texto unido com ' ', como o join original)"""
+        self._write_text((' ' if self.segment_count else '') + text)
+
+        record = {'start': round(start, 3), 'end': round(end, 3), 'text': text}
+        if avg_logprob is not None:
+            record['avg_logprob'] = round(avg_logprob, 4)
+        if self.segment_count:
+            self._segments.write(',')
+        self._segments.write(json.dumps(record, ensure_ascii=False))
+        self.segment_count += 1
+
+    def add_segments(self, segments):
+        """Adiciona objetos com start, end, text e avg_logprob"""
+        for segment in segments:
+            self.add_segment(segment.start, segment.end, segment.text, getattr(segment, 'avg_logprob', None))
+
+    def write_text(self, text):
+        """Escreve texto sem segmentos (modos que só devolvem o texto final)"""
+        self._write_text(text)
+
+    def finish(self, metadata=None):
+        """
+        Completa o JSON com segmentos e metadados e publica o arquivo
+
+        Returns:
+            Caminho final do arquivo
+        """
+        self._file.write('", "segments": [')
+        self._segments.close()
+        with open(self._segments_path, 'r', encoding='utf-8') as segments:
+            shutil.copyfileobj(segments, self._file)
+        self._file.write(']')
+
+        for key, value in (metadata or {}).items():
+            if key in ('success', 'text', 'segments'):
+                continue
+            self._file.write(f', {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}')
+        self._file.write('}')
+
+        self._close_output(sync=True)
+        os.replace(self.tmp_path, self.output_path)
+        self._remove(self._segments_path)
+        return self.output_path
+
+    def abort(self):
+        """Descarta os arquivos temporários (resultado irá pelo stdout ou falhou)"""
+        if self._closed:
+            return
+        self._segments.close()
+        self._close_output(sync=False)
+        self._remove(self.tmp_path)
+        self._remove(self._segments_path)
+
+    def _close_output(self, sync):
+        self._file.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+        self._closed = True
+        if sync:
+            # fsync após fechar: inclui trailers de gzip/zstd
+            fd = os.open(self.tmp_path, os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            if os.path.exists(path):
+                os.unlink(path)
+        except OSError as e:
+            print(f"⚠️ Could not remove temporary file {path}: {e}", file=sys.stderr)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas estruturadas por etapa da transcrição
+
+Registra tempo de cada etapa (descoberta do ffmpeg, leitura da duração,
+extração de áudio, carga do modelo, decodificação), latência até o primeiro
+segmento, RTF da decodificação, pico de RSS e tempo de CPU.
+
+O resultado vai no JSON final (chave "metrics") e em uma linha de stderr
+legível por máquina, no mesmo estilo das linhas PROGRESS:
+
+    METRICS:{"stages": {...}, "decode_rtf": 0.21, ...}
+"""
+
+import sys
+import json
+import time
+from contextlib import contextmanager
+
+
+def peak_rss_mb():
+    """Pico de RSS do processo em MB (None se indisponível)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB; macOS reporta bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class RunMetrics:
+    """Acumula métricas de uma execução"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self.values = {}
+        self._decode_started = None
+
+    @contextmanager
+    def stage(self, name):
+        """Mede a duração de uma etapa (acumula se a etapa se repetir)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start)
+
+    def record(self, name, value):
+        self.values[name] = value
+
+    def decode_started(self):
+        """Marca o início da decodificação (base da latência do primeiro segmento)"""
+        self._decode_started = time.perf_counter()
+
+    def decode_finished(self):
+        """Fecha a etapa 'decode' aberta por decode_started()"""
+        if self._decode_started is not None:
+            elapsed = time.perf_counter() - self._decode_started
+            self.stages['decode'] = self.stages.get('decode', 0.0) + elapsed
+            self._decode_started = None
+
+    def first_segment(self):
+        """Registra a latência do primeiro segmento (apenas a primeira chamada conta)"""
+        if self._decode_started is not None and 'first_segment_latency' not in self.values:
+            self.values['first_segment_latency'] = round(time.perf_counter() - self._decode_started, 3)
+
+    def snapshot(self):
+        """Dict serializável com todas as métricas"""
+        cpu = time.process_time()
+        try:
+            import os
+            times = os.times()
+            cpu_user, cpu_system = times.user, times.system
+        except (AttributeError, OSError):
+            cpu_user, cpu_system = cpu, 0.0
+
+        data = {
+            'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            'wall_time': round(time.perf_counter() - self.started_at, 3),
+            'cpu_time': {
+                'user': round(cpu_user, 3),
+                'system': round(cpu_system, 3),
+            },
+        }
+        data.update(self.values)
+
+        duration = self.values.get('audio_duration')
+        decode = self.stages.get('decode')
+        if duration and decode:
+            data['decode_rtf'] = round(decode / duration, 4)
+
+        peak = peak_rss_mb()
+        if peak is not None:
+            data['peak_rss_mb'] = round(peak, 1)
+        return data
+
+    def emit(self, **extra):
+        """Escreve a linha METRICS:{json} no stderr e devolve o snapshot"""
+        data = self.snapshot()
+        data.update(extra)
+        print(f"METRICS:{json.dumps(data)}", file=sys.stderr, flush=True)
+        return data
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento compacto de segmentos para transcrições muito longas
+
+Em vez de uma lista de dicts por segmento (centenas de bytes de overhead
+cada), os segmentos ficam em arrays NumPy float32 (start, end, avg_logprob)
+e um único buffer UTF-8 com offsets para o texto. Uma transcrição de 50 mil
+segmentos ocupa poucos MB.
+
+Suporta indexação, fatiamento, busca por intervalo de tempo (busca binária)
+e serialização para um único arquivo binário:
+
+    header  : MAGIC (8 bytes) + versão (uint32) + count (uint64) + text_bytes (uint64)
+    starts  : float32[count]
+    ends    : float32[count]
+    logprob : float32[count]
+    offsets : int64[count + 1]
+    text    : bytes[text_bytes] (UTF-8)
+"""
+
+import struct
+from array import array
+
+import numpy as np
+
+MAGIC = b'SDCSEG01'
+VERSION = 1
+HEADER = struct.Struct('<8sIQQ')
+
+FLOAT_DTYPE = np.dtype('<f4')
+OFFSET_DTYPE = np.dtype('<i8')
+
+
+class SegmentStoreError(Exception):
+    """Exceção para erros no armazenamento de segmentos"""
+    pass
+
+
+class SegmentStore:
+    """Conjunto imutável de segmentos em arrays compactos"""
+
+    def __init__(self, starts, ends, avg_logprobs, offsets, text_buffer):
+        self.starts = np.asarray(starts, dtype=FLOAT_DTYPE)
+        self.ends = np.asarray(ends, dtype=FLOAT_DTYPE)
+        self.avg_logprobs = np.asarray(avg_logprobs, dtype=FLOAT_DTYPE)
+        self.offsets = np.asarray(offsets, dtype=OFFSET_DTYPE)
+        self.text_buffer = bytes(text_buffer)
+
+        count = len(self.starts)
+        if not (len(self.ends) == len(self.avg_logprobs) == count and len(self.offsets) == count + 1):
+            raise SegmentStoreError("Inconsistent segment arrays")
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Cria a partir de objetos com start, end, text e avg_logprob"""
+        builder = SegmentStoreBuilder()
+        for segment in segments:
+            builder.append(segment.start, segment.end, segment.text, getattr(segment, 'avg_logprob', 0.0))
+        return builder.build()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, index):
+        """Texto do segmento index"""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.text_buffer[start:end].decode('utf-8')
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            first, last, step = key.indices(len(self))
+            if step != 1:
+                raise SegmentStoreError("Slices with step are not supported")
+            last = max(first, last)
+            base = self.offsets[first]
+            return SegmentStore(
+                self.starts[first:last],
+                self.ends[first:last],
+                self.avg_logprobs[first:last],
+                self.offsets[first:last + 1] - base,
+                self.text_buffer[base:self.offsets[last]],
+            )
+
+        index = int(key)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return {
+            'start': float(self.starts[index]),
+            'end': float(self.ends[index]),
+            'avg_logprob': float(self.avg_logprobs[index]),
+            'text': self.text(index),
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def index_range(self, t_start, t_end):
+        """
+        Índices [first, last) dos segmentos que se sobrepõem a [t_start, t_end)
+
+        Usa busca binária: os segmentos do Whisper são ordenados por tempo.
+        """
+        first = int(np.searchsorted(self.ends, t_start, side='right'))
+        last = int(np.searchsorted(self.starts, t_end, side='left'))
+        return first, max(first, last)
+
+    def time_range(self, t_start, t_end):
+        """Sub-conjunto de segmentos que se sobrepõem a [t_start, t_end)"""
+        first, last = self.index_range(t_start, t_end)
+        return self[first:last]
+
+    def full_text(self, separator=' '):
+        """Texto completo (segmentos unidos por separator, como o join original)"""
+        return separator.join(self.text(i) for i in range(len(self))).strip()
+
+    @property
+    def nbytes(self):
+        return (self.starts.nbytes + self.ends.nbytes + self.avg_logprobs.nbytes
+                + self.offsets.nbytes + len(self.text_buffer))
+
+    def save(self, path):
+        """Grava o conjunto em um único arquivo binário"""
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self), len(self.text_buffer)))
+            f.write(self.starts.tobytes())
+            f.write(self.ends.tobytes())
+            f.write(self.avg_logprobs.tobytes())
+            f.write(self.offsets.tobytes())
+            f.write(self.text_buffer)
+
+    @classmethod
+    def load(cls, path):
+        """Lê um arquivo gravado por save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < HEADER.size:
+            raise SegmentStoreError(f"Truncated segment file: {path}")
+        magic, version, count, text_bytes = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SegmentStoreError(f"Not a segment store file (or unsupported version): {path}")
+
+        position = HEADER.size
+        arrays = []
+        for dtype, length in ((FLOAT_DTYPE, count), (FLOAT_DTYPE, count),
+                              (FLOAT_DTYPE, count), (OFFSET_DTYPE, count + 1)):
+            size = dtype.itemsize * length
+            arrays.append(np.frombuffer(data, dtype=dtype, count=length, offset=position))
+            position += size
+
+        text_buffer = data[position:position + text_bytes]
+        if len(text_buffer) != text_bytes:
+            raise SegmentStoreError(f"Truncated segment file: {path}")
+
+        return cls(arrays[0], arrays[1], arrays[2], arrays[3], text_buffer)
+
+
+class SegmentStoreBuilder:
+    """Acumula segmentos em buffers compactos durante a decodificação"""
+
+    def __init__(self):
+        self._starts = array('f')
+        self._ends = array('f')
+        self._logprobs = array('f')
+        self._offsets = array('q', [0])
+        self._text = bytearray()
+
+    def __len__(self):
+        return len(self._starts)
+
+    def append(self, start, end, text, avg_logprob=0.0):
+        encoded = text.encode('utf-8')
+        self._starts.append(start)
+        self._ends.append(end)
+        self._logprobs.append(avg_logprob)
+        self._text.extend(encoded)
+        self._offsets.append(len(self._text))
+
+    def extend(self, segments):
+        """Adiciona objetos com start, end, text e avg_logprob"""
+        for segment in segments:
+            self.append(segment.start, segment.end, segment.text, getattr(segment, 'avg_logprob', 0.0))
+
+    @property
+    def text_length(self):
+        return len(self._text)
+
+    def build(self):
+        """Cria o SegmentStore (cópia: o builder pode continuar recebendo segmentos)"""
+        return SegmentStore(
+            np.array(self._starts, dtype=FLOAT_DTYPE),
+            np.array(self._ends, dtype=FLOAT_DTYPE),
+            np.array(self._logprobs, dtype=FLOAT_DTYPE),
+            np.array(self._offsets, dtype=OFFSET_DTYPE),
+            self._text,
+        )
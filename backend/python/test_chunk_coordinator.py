@@ -0,0 +1,176 @@
+"""
+Testes do coordenador de chunks contra workers HTTP stub locais
+
+Cada stub implementa o protocolo do chunk_worker.py (/health e
+/transcribe) sem modelo: devolve um segmento com o índice do chunk.
+
+    python -m pytest test_chunk_coordinator.py -q
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from chunk_coordinator import Chunk, ChunkCoordinator, ChunkCoordinatorError
+
+
+class StubWorker:
+    """
+    Worker HTTP local
+
+    fail_transcribe: /transcribe responde 500
+    truncate: corpo mais curto que o Content-Length (http.client.IncompleteRead)
+    malformed: sucesso sem 'segments'
+    """
+
+    def __init__(self, delay=0.05, fail_transcribe=False, truncate=False, malformed=False):
+        self.delay = delay
+        self.fail_transcribe = fail_transcribe
+        self.truncate = truncate
+        self.malformed = malformed
+        self.transcribed = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._send(200, {'status': 'ok', 'busy': False})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                if stub.fail_transcribe:
+                    self._send(500, {'success': False, 'error': 'stub failure'})
+                    return
+                chunk = int(parse_qs(urlparse(self.path).query)['chunk'][0])
+                time.sleep(stub.delay)
+                if stub.truncate:
+                    self.send_response(200)
+                    self.send_header('Content-Length', '1000')
+                    self.end_headers()
+                    self.wfile.write(b'{"success": true, "segm')
+                    self.close_connection = True
+                    return
+                if stub.malformed:
+                    self._send(200, {'success': True, 'chunk': chunk})
+                    return
+                stub.transcribed.append(chunk)
+                self._send(200, {'success': True, 'chunk': chunk,
+                                 'segments': [{'start': 0.0, 'end': 1.0, 'text': f'chunk {chunk}'}]})
+
+            def _send(self, status, data):
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ChunkCoordinatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.workers = []
+
+    def tearDown(self):
+        for worker in self.workers:
+            try:
+                worker.stop()
+            except OSError:
+                pass
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _worker(self, **kwargs):
+        worker = StubWorker(**kwargs)
+        self.workers.append(worker)
+        return worker
+
+    def _chunks(self, count, duration=30.0):
+        chunks = []
+        for index in range(count):
+            path = os.path.join(self.tmp, f'chunk_{index}.mp3')
+            with open(path, 'wb') as f:
+                f.write(b'\0' * 64)
+            chunks.append(Chunk(index, path, index * duration, duration))
+        return chunks
+
+    def test_results_in_order_across_workers(self):
+        workers = [self._worker(), self._worker()]
+        received = []
+        coordinator = ChunkCoordinator([w.url for w in workers], retry_backoff=0.05)
+        stats = coordinator.run(self._chunks(6), lambda index, segments: received.append((index, segments)))
+
+        self.assertEqual([index for index, _ in received], list(range(6)))
+        self.assertEqual(received[2][1][0]['start'], 60.0)
+        self.assertEqual(sum(stat['chunks'] for stat in stats.values()), 6)
+        self.assertTrue(all(w.transcribed for w in workers))
+
+    def test_failing_worker_chunks_are_reassigned(self):
+        good = self._worker()
+        bad = self._worker(fail_transcribe=True)
+        received = []
+        coordinator = ChunkCoordinator([good.url, bad.url], retry_backoff=0.05)
+        stats = coordinator.run(self._chunks(5), lambda index, segments: received.append(index))
+
+        self.assertEqual(received, list(range(5)))
+        self.assertEqual(sorted(good.transcribed), list(range(5)))
+        self.assertGreater(stats[bad.url]['failures'], 0)
+
+    def test_truncated_response_chunks_are_reassigned(self):
+        for kwargs in ({'truncate': True}, {'malformed': True}):
+            with self.subTest(**kwargs):
+                good = self._worker()
+                broken = self._worker(**kwargs)
+                received = []
+                coordinator = ChunkCoordinator([broken.url, good.url], retry_backoff=0.05)
+                done = threading.Event()
+
+                def run():
+                    coordinator.run(self._chunks(4), lambda index, segments: received.append(index))
+                    done.set()
+                threading.Thread(target=run, daemon=True).start()
+
+                self.assertTrue(done.wait(10), "coordinator hung")
+                self.assertEqual(received, list(range(4)))
+                self.assertGreater(coordinator.stats[broken.url]['failures'], 0)
+
+    def test_unreachable_workers_fail_the_job_instead_of_hanging(self):
+        worker = self._worker(fail_transcribe=True)
+        coordinator = ChunkCoordinator([worker.url], retry_backoff=0.05, max_health_probes=5)
+        chunks = self._chunks(3)
+
+        # O worker passa na verificação inicial e cai de vez na primeira falha
+        original = coordinator._transcribe_remote
+
+        def transcribe_then_die(url, chunk):
+            try:
+                return original(url, chunk)
+            finally:
+                worker.stop()
+        coordinator._transcribe_remote = transcribe_then_die
+
+        start = time.time()
+        with self.assertRaises(ChunkCoordinatorError) as ctx:
+            coordinator.run(chunks, lambda index, segments: None)
+        self.assertIn('All chunk workers failed', str(ctx.exception))
+        self.assertLess(time.time() - start, 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,268 @@
+"""
+Testes do AsyncOllamaService contra um Ollama stub local
+
+O stub responde /api/chat e /api/generate com o mesmo formato do Ollama
+(JSON com Content-Length, NDJSON chunked no streaming ou corpo delimitado
+pelo fechamento da conexão) e cobre o cliente HTTP/1.1 do ollama_async e
+a sobreposição das atas no mesmo event loop.
+
+    python -m pytest test_ollama_async.py -q
+"""
+
+import os
+import json
+import time
+import socket
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gerador_ata.ollama_async import AsyncOllamaService
+from gerador_ata.ollama_service import OllamaServiceError
+from gerador_ata.ollama_health import OllamaHealthMonitor
+from gerador_ata.extracao_store import ExtracaoStore
+from gerador_ata.response_cache import ResponseCache
+from gerador_ata.toon_stream import TOONStreamAbort
+
+TOON = ("local: Sala 1\ndata_horario: 01/01/2025 - 10:00\nconvocado_por: Ana\n"
+        "objetivo: Alinhar o projeto\n\nparticipantes[2]{num,nome}:\n1,Ana\n2,Bruno\n\n"
+        "pontos[2]{item,topico}:\n1,Cronograma revisado\n2,Orçamento aprovado\n\n"
+        "proximos_passos[1]{item,acao,responsavel,data}:\n1,Enviar relatório,Ana,A definir\n")
+LISTA = "1. Cronograma revisado\n2. Orçamento aprovado"
+
+
+class StubOllama:
+    """
+    Servidor Ollama falso
+
+    mode: 'length' (Content-Length), 'close' (HTTP/1.0, corpo até o fechamento)
+    ou 'chunked'; requisições com stream=True sempre respondem NDJSON chunked.
+    """
+
+    def __init__(self, delay=0.0, status=200, mode='length', toon=TOON):
+        self.delay = delay
+        self.status = status
+        self.mode = mode
+        self.toon = toon
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.0' if mode == 'close' else 'HTTP/1.1'
+
+            def do_GET(self):
+                self._send_json(200, {'models': []})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    if stub.status != 200:
+                        self._send_json(stub.status, {'error': 'model not found'})
+                    elif body.get('stream'):
+                        self._send_stream(stub.toon.split('\n'))
+                    else:
+                        extracao = 'EXTRAÇÃO' in json.dumps(body, ensure_ascii=False)
+                        text = LISTA if extracao else stub.toon
+                        self._send_json(200, {'message': {'role': 'assistant', 'content': text},
+                                              'done': True, 'prompt_eval_count': 100, 'eval_count': 50})
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _send_json(self, status, data):
+                payload = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if stub.mode == 'chunked':
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    self._chunk(payload[:10])
+                    self._chunk(payload[10:])
+                    self._chunk(b'')
+                    return
+                if stub.mode != 'close':
+                    self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_stream(self, lines):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for line in lines:
+                    piece = {'message': {'role': 'assistant', 'content': line + '\n'}, 'done': False}
+                    self._chunk((json.dumps(piece) + '\n').encode('utf-8'))
+                self._chunk((json.dumps({'done': True}) + '\n').encode('utf-8'))
+                self._chunk(b'')
+
+            def _chunk(self, data):
+                self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SlowExtracaoStore(ExtracaoStore):
+    """ExtracaoStore com leitura lenta (disco ocupado): não pode travar o event loop"""
+
+    def get(self, extracao_id):
+        time.sleep(0.3)
+        return super().get(extracao_id)
+
+
+class AsyncOllamaServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.stubs = []
+
+    def tearDown(self):
+        for stub in self.stubs:
+            stub.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _stub(self, **kwargs):
+        stub = StubOllama(**kwargs)
+        self.stubs.append(stub)
+        return stub
+
+    def _service(self, url, max_concurrency=None, extracoes=None):
+        service = AsyncOllamaService(max_concurrency=max_concurrency)
+        service.base_url = url
+        service.cache = None
+        service.extracoes = extracoes or ExtracaoStore(os.path.join(self.tmp, 'extracoes.db'))
+        service.health = OllamaHealthMonitor(service.check_health)
+        service.stream_validation = True
+        service.formato_construcao = 'toon'
+        return service
+
+    @staticmethod
+    def _atas(service, count):
+        async def uma_ata(i):
+            transcricao = f"Reunião {i}. Revisamos o cronograma e aprovamos o orçamento do projeto."
+            _, dados = await service.gerar_toon_from_dados('Ana, Bruno', '2025-01-01T10:00',
+                                                           'Sala 1', 'Ana', transcricao)
+            return dados
+
+        async def todas():
+            return await asyncio.gather(*(uma_ata(i) for i in range(count)))
+
+        start = time.time()
+        results = asyncio.run(todas())
+        return results, time.time() - start
+
+    def test_concurrent_atas_overlap(self):
+        delay, count = 0.3, 6
+        stub = self._stub(delay=delay)
+        results, wall = self._atas(self._service(stub.url, max_concurrency=count), count)
+
+        self.assertEqual([len(dados['pontos']) for dados in results], [2] * count)
+        self.assertEqual(stub.requests, count * 2)  # Fase 1 + Fase 2 por ata
+        # Sequencial levaria count * 2 * delay (3.6s)
+        self.assertLess(wall, count * 2 * delay / 3)
+
+    def test_semaphore_limits_requests_in_flight(self):
+        stub = self._stub(delay=0.1)
+        self._atas(self._service(stub.url, max_concurrency=2), 6)
+        self.assertEqual(stub.max_in_flight, 2)
+
+    def test_blocking_store_runs_off_the_event_loop(self):
+        stub = self._stub()
+        store = SlowExtracaoStore(os.path.join(self.tmp, 'lento.db'))
+        _, wall = self._atas(self._service(stub.url, max_concurrency=4, extracoes=store), 4)
+        # Leituras em série no event loop somariam 4 * 0.3s
+        self.assertLess(wall, 0.9)
+
+    def test_stream_stops_when_toon_is_complete(self):
+        stub = self._stub(toon=TOON + "\nEspero ter ajudado!\n")
+        text = asyncio.run(self._service(stub.url).generate_completion_stream('ata'))
+        self.assertTrue(text.endswith('1,Enviar relatório,Ana,A definir'))
+
+    def test_stream_abort_on_invalid_structure(self):
+        stub = self._stub(toon=TOON.replace('pontos[2]', 'pontos[N]'))
+        with self.assertRaises(TOONStreamAbort) as ctx:
+            asyncio.run(self._service(stub.url).generate_completion_stream('ata'))
+        self.assertIn('participantes[2]', ctx.exception.partial)
+
+    def test_response_bodies(self):
+        for mode in ('length', 'chunked', 'close'):
+            with self.subTest(mode=mode):
+                stub = self._stub(mode=mode)
+                text = asyncio.run(self._service(stub.url).generate_completion('ata'))
+                self.assertEqual(text, TOON.strip())
+
+    def test_error_status_raises_with_details(self):
+        stub = self._stub(status=404)
+        with self.assertRaises(OllamaServiceError) as ctx:
+            asyncio.run(self._service(stub.url).generate_completion('ata'))
+        self.assertIn('404', str(ctx.exception))
+        self.assertIn('model not found', str(ctx.exception))
+
+    def test_connection_refused_counts_as_failure(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        service = self._service(f'http://127.0.0.1:{port}')
+        with self.assertRaises(OllamaServiceError):
+            asyncio.run(service.generate_completion('ata'))
+        self.assertEqual(service.health.status()['falhas_consecutivas'], 1)
+
+    def test_timeout_counts_as_failure(self):
+        stub = self._stub(delay=1.0)
+        service = self._service(stub.url)
+        service.timeout = 0.2
+        with self.assertRaises(OllamaServiceError) as ctx:
+            asyncio.run(service.generate_completion('ata'))
+        self.assertIn('Timeout', str(ctx.exception))
+        self.assertEqual(service.health.status()['falhas_consecutivas'], 1)
+
+    def test_cached_response_skips_ollama(self):
+        stub = self._stub()
+        service = self._service(stub.url)
+        service.cache = ResponseCache(os.path.join(self.tmp, 'cache.db'))
+        first = asyncio.run(service.generate_completion('ata'))
+        second = asyncio.run(service.generate_completion('ata'))
+        self.assertEqual(first, second)
+        self.assertEqual(stub.requests, 1)
+
+    def test_phase2_caches_only_parsed_output(self):
+        for toon, requests in ((TOON, 1), ("Não consegui montar a ata.", 6)):
+            with self.subTest(toon=toon):
+                stub = self._stub(toon=toon)
+                service = self._service(stub.url)
+                service.cache = ResponseCache(os.path.join(self.tmp, f'cache_{requests}.db'))
+                for _ in range(2):
+                    try:
+                        asyncio.run(service.construir_toon(LISTA, 'Ana, Bruno', '01/01/2025 - 10:00',
+                                                           'Sala 1', 'Ana'))
+                    except OllamaServiceError:
+                        pass
+                # Saída inválida nunca é servida do cache: cada tentativa consulta o Ollama
+                self.assertEqual(stub.requests, requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
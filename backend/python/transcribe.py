@@ -16,9 +16,32 @@ import tempfile
 import subprocess
 from pathlib import Path
 from moviepy import VideoFileClip, AudioFileClip
-from faster_whisper import WhisperModel
+from model_registry import load_whisper_model
+from capacity_planner import apply_cpu_affinity, parse_cpu_list, slot_assignment
+from memory_guard import MemoryGuard, MemoryPressure, next_degradation, log_degradation
+from repetition_guard import RepetitionGuard
+from segment_store import SegmentStoreBuilder
+from result_writer import StreamingResultWriter
+from run_metrics import RunMetrics
+from profiling import profile_mode, profiled
+from whisper_tiers import load_tiers, select_tier
+from job_stats import record_transcription
+from chunk_coordinator import Chunk, ChunkCoordinator, parse_workers
 import torch
 
+# Acima deste tamanho o resultado vai por arquivo (_transcription.json), não pelo stdout
+OUTPUT_FILE_THRESHOLD = 30_000  # 30KB
+
+# Re-decodificação de janelas com loop de repetição
+REDECODE_WINDOW_SECONDS = 30
+REDECODE_NO_REPEAT_NGRAM = 3
+
+# Duração dos chunks no modo distribuído (--workers): menores balanceiam melhor
+DISTRIBUTED_CHUNK_SECONDS = 300
+
+# Tempo por etapa, RTF, pico de RSS e CPU (ver run_metrics.py)
+metrics = RunMetrics()
+
 # Forçar UTF-8 no stdout e stderr ANTES de qualquer print
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
@@ -27,6 +50,50 @@ def send_progress(progress: int, message: str):
     """Envia mensagem de progresso para stderr"""
     print(f"PROGRESS:{progress}:{message}", file=sys.stderr, flush=True)
 
+def get_cli_option(name, default=None):
+    """Lê opção '--name valor' ou '--name=valor' do argv (fallback: default)"""
+    flag = f'--{name}'
+    for i, arg in enumerate(sys.argv):
+        if arg == flag and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(flag + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def configure_cpu_resources(model_size):
+    """
+    Aplica threads/afinidade de CPU antes de carregar o modelo
+
+    Ordem: --slot N (consulta o capacity_planner), ou --cpu-threads/--cpu-affinity
+    (também via TRANSCRIBE_CPU_THREADS/TRANSCRIBE_CPU_AFFINITY).
+
+    Returns:
+        cpu_threads para o WhisperModel (0 = padrão da biblioteca)
+    """
+    slot = get_cli_option('slot', os.environ.get('TRANSCRIBE_SLOT'))
+    if slot is not None:
+        cpu_threads, cores = slot_assignment(model_size, int(slot))
+        print(f"🧮 Capacity plan slot {slot}: cpu_threads={cpu_threads}", file=sys.stderr)
+    else:
+        cpu_threads = int(get_cli_option('cpu-threads', os.environ.get('TRANSCRIBE_CPU_THREADS', 0)))
+        affinity = get_cli_option('cpu-affinity', os.environ.get('TRANSCRIBE_CPU_AFFINITY'))
+        cores = parse_cpu_list(affinity) if affinity else None
+
+    if cores:
+        apply_cpu_affinity(cores)
+        if not cpu_threads:
+            cpu_threads = len(cores)
+
+    if cpu_threads:
+        # Bibliotecas com OpenMP (torch/ctranslate2) respeitam OMP_NUM_THREADS
+        os.environ['OMP_NUM_THREADS'] = str(cpu_threads)
+        try:
+            torch.set_num_threads(cpu_threads)
+        except Exception:
+            pass
+
+    return cpu_threads
+
 def is_audio_file(file_path):
     """Verifica se o arquivo é áudio puro"""
     audio_extensions = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.wma']
@@ -215,40 +282,110 @@ def split_audio_into_chunks(audio_path, chunk_duration=720):
     return chunk_files, temp_dir
 
 def get_whisper_options(duration):
-    """Opções de transcrição baseadas na duração do áudio"""
+    """
+    Opções de transcrição baseadas na duração do áudio
+
+    Os tiers vêm de whisper_tiers.json (gerado por benchmark_whisper.py) ou da
+    tabela padrão em whisper_tiers.py.
+    """
+    tier = select_tier(duration, load_tiers())
     options = {
         'language': 'pt',
         'verbose': False,
-        'condition_on_previous_text': True,
+        'condition_on_previous_text': tier.get('condition_on_previous_text', True),
         'temperature': 0.0,
+        'beam_size': tier['beam_size'],
     }
 
-    if duration >= 3600:  # > 1 hora
-        options.update({
-            'condition_on_previous_text': False,
-            'beam_size': 1,
-        })
-        print(f"⚠️ Very long video ({duration/3600:.1f}h): using minimal config", file=sys.stderr)
-    elif duration >= 1800:  # 30-60 minutos
-        options.update({
-            'condition_on_previous_text': False,
-            'beam_size': 3,
-        })
-        print(f"⚠️ Long video ({duration/60:.1f}min): using conservative config", file=sys.stderr)
-    elif duration >= 600:  # 10-30 minutos
-        options.update({
-            'beam_size': 5,
-        })
-        print(f"📊 Medium video ({duration/60:.1f}min): using balanced config", file=sys.stderr)
-    else:
-        print(f"✅ Short video ({duration/60:.1f}min): using quality config", file=sys.stderr)
+    print(f"📊 Audio of {duration/60:.1f}min: using {tier.get('config', 'custom')} config "
+          f"(beam_size={options['beam_size']}, "
+          f"condition_on_previous_text={options['condition_on_previous_text']})", file=sys.stderr)
 
     return options
 
-def transcribe_audio_streaming(audio_path, model_size='medium'):
+def degrade_on_memory_pressure(state, degradations, reason, position):
+    """
+    Aplica o próximo degrau de degradação (memory_guard) e registra no resultado
+
+    Levanta MemoryError se não houver mais degraus disponíveis.
+    """
+    step = next_degradation(state)
+    if step is None:
+        raise MemoryError(f"Out of memory and no lighter configuration left ({reason})")
+    log_degradation(step, reason)
+    degradations.append(dict(step, reason=reason, at_seconds=round(position, 2)))
+    return step
+
+def load_model_degrading(state, degradations, device, cpu_threads, position=0.0):
+    """
+    Carrega o modelo descrito em state, descendo a escada de degradação
+    (compute_type -> modelo -> chunk_length) enquanto o load der MemoryError
+
+    Levanta MemoryError se nenhuma configuração couber.
+    """
+    while True:
+        try:
+            model, state['compute_type'] = load_whisper_model(
+                state['model_size'], device=device, compute_type=state['compute_type'],
+                cpu_threads=cpu_threads)
+            return model
+        except MemoryError:
+            gc.collect()
+            degrade_on_memory_pressure(state, degradations, 'MemoryError while loading model', position)
+
+def redecode_window(model, audio_path, options, window_start, window_end, repetition_guard, chunk_length=None):
+    """
+    Re-decodifica uma janela degenerada uma única vez com configuração barata
+
+    Beam search desligado, sem condicionamento no texto anterior e bloqueio de
+    n-gramas repetidos. Se ainda assim degenerar, o restante é descartado.
+
+    Returns:
+        Lista de segmentos aceitos da janela
+    """
+    repetition_guard.stats['redecoded_windows'] += 1
+    repetition_guard.reset()
+
+    segments, _info = model.transcribe(
+        audio_path,
+        language=options['language'],
+        beam_size=1,
+        condition_on_previous_text=False,
+        temperature=options['temperature'],
+        no_repeat_ngram_size=REDECODE_NO_REPEAT_NGRAM,
+        clip_timestamps=[window_start, window_end],
+        chunk_length=chunk_length
+    )
+
+    accepted = []
+    for segment in segments:
+        if repetition_guard.is_degenerate(segment.text):
+            repetition_guard.stats['dropped_segments'] += 1
+            break
+        accepted.append(segment)
+
+    repetition_guard.stats['recovered_segments'] += len(accepted)
+    repetition_guard.reset()
+    print(f"🔁 Window {window_start:.1f}-{window_end:.1f}s re-decoded: {len(accepted)} segments kept", file=sys.stderr)
+    return accepted
+
+def transcribe_audio_streaming(audio_path, model_size='medium', cpu_threads=0, writer=None, duration=None):
     """
     Transcreve áudio usando faster-whisper
     Suporta GPU AMD via ROCm
+
+    Sob pressão de memória degrada a configuração (memory_guard) e continua
+    do último segmento em vez de falhar. Janelas que entram em loop de
+    repetição (repetition_guard) são re-decodificadas uma vez, mais baratas.
+
+    Se writer (StreamingResultWriter) for informado, cada segmento aceito é
+    escrito no arquivo de resultado assim que decodificado.
+
+    duration evita ler a duração de novo quando o chamador já a conhece.
+
+    Returns:
+        (texto, estatísticas da transcrição); com writer o texto só é
+        devolvido se couber em memória (writer.buffered_text), senão None
     """
     try:
         send_progress(5, "Iniciando transcrição...")
@@ -268,17 +405,19 @@ def transcribe_audio_streaming(audio_path, model_size='medium'):
                 print("GPU info not available", file=sys.stderr)
 
         # Obter duração e opções
-        duration = get_duration(audio_path)
+        if duration is None:
+            with metrics.stage('duration_probe'):
+                duration = get_duration(audio_path)
         options = get_whisper_options(duration)
 
         send_progress(10, "Carregando modelo de IA...")
 
         # Escolher compute_type baseado no device
-        # float16 para GPU, int8 para CPU (melhor performance)
-        compute_type = "float16" if device == "cuda" else "int8"
+        # float16 para GPU; em CPU usa o registrado no registro local (int8 por padrão)
+        compute_type = "float16" if device == "cuda" else None
 
         # Carregar modelo faster-whisper
-        print(f"Loading faster-whisper model: {model_size} (compute_type={compute_type})", file=sys.stderr)
+        print(f"Loading faster-whisper model: {model_size} (compute_type={compute_type or 'registry default'})", file=sys.stderr)
 
         # DEBUG: Environment antes de carregar modelo
         print(f"🔍 [DEBUG] About to load WhisperModel...", file=sys.stderr)
@@ -289,7 +428,15 @@ def transcribe_audio_streaming(audio_path, model_size='medium'):
         print(f"🔍 [DEBUG] PWD={os.getcwd()}", file=sys.stderr)
         sys.stderr.flush()
 
-        model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        guard = MemoryGuard()
+        if guard.enabled:
+            print(f"🛡️ Memory guard: ceiling {guard.ceiling_mb:.0f}MB (threshold {guard.threshold:.0%})", file=sys.stderr)
+        state = {'model_size': model_size, 'compute_type': compute_type, 'chunk_length': None}
+        degradations = []
+
+        # Registro local (se o modelo estiver registrado) evita lookup no cache do HF
+        with metrics.stage('model_load'):
+            model = load_model_degrading(state, degradations, device, cpu_threads)
 
         print(f"🔍 [DEBUG] WhisperModel loaded successfully!", file=sys.stderr)
         sys.stderr.flush()
@@ -300,28 +447,97 @@ def transcribe_audio_streaming(audio_path, model_size='medium'):
         print(f"Starting transcription...", file=sys.stderr)
         send_progress(30, "Processando transcrição...")
 
-        segments, info = model.transcribe(
-            audio_path,
-            language=options['language'],
-            beam_size=options.get('beam_size', 5),
-            condition_on_previous_text=options['condition_on_previous_text'],
-            temperature=options['temperature']
-        )
+        collected = SegmentStoreBuilder()  # arrays compactos em vez de lista de strings
 
-        # Concatenar todos os segmentos
-        print(f"📊 Detected language: {info.language} (probability: {info.language_probability:.2f})", file=sys.stderr)
+        def commit(accepted):
+            collected.extend(accepted)
+            if writer is not None:
+                writer.add_segments(accepted)
 
-        text_parts = []
         segment_count = 0
-        for segment in segments:
-            text_parts.append(segment.text)
-            segment_count += 1
-            if segment_count % 10 == 0:
-                print(f"📝 Processed {segment_count} segments...", file=sys.stderr)
+        resume_at = 0.0  # fim do último segmento aceito (retomada após degradação/loop)
+        repetition_guard = RepetitionGuard()
+        guard.rearm()
 
-        text = " ".join(text_parts).strip()
+        metrics.decode_started()
+        while True:
+            window = []  # segmentos pendentes da janela atual (descartados se degenerarem)
+            try:
+                segments, info = model.transcribe(
+                    audio_path,
+                    language=options['language'],
+                    beam_size=options.get('beam_size', 5),
+                    condition_on_previous_text=options['condition_on_previous_text'],
+                    temperature=options['temperature'],
+                    clip_timestamps=[resume_at],
+                    chunk_length=state['chunk_length']
+                )
+
+                # Concatenar todos os segmentos
+                if segment_count == 0:
+                    print(f"📊 Detected language: {info.language} (probability: {info.language_probability:.2f})", file=sys.stderr)
+
+                window_start = resume_at
+                loop_reason = None
+                repetition_guard.reset()
+                for segment in segments:
+                    if segment.start >= window_start + REDECODE_WINDOW_SECONDS:
+                        commit(window)
+                        window = []
+                        window_start = segment.start
+                        repetition_guard.reset()
+
+                    window.append(segment)
+                    segment_count += 1
+                    metrics.first_segment()
+                    resume_at = segment.end
+                    if segment_count % 10 == 0:
+                        print(f"📝 Processed {segment_count} segments...", file=sys.stderr)
+
+                    loop_reason = repetition_guard.is_degenerate(segment.text)
+                    if loop_reason:
+                        break
+                    guard.check()
+
+                if loop_reason is None:
+                    commit(window)
+                    break
+
+                # Loop de repetição: abandonar a janela e re-decodificar uma vez, mais barato
+                segments = None
+                window_end = window_start + REDECODE_WINDOW_SECONDS
+                print(f"🔁 Repetition loop at {window_start:.1f}s ({loop_reason}): "
+                      f"dropping {len(window)} segments, re-decoding window", file=sys.stderr)
+                repetition_guard.record_activation(len(window))
+                window = []
+                commit(redecode_window(model, audio_path, options, window_start, window_end,
+                                       repetition_guard, state['chunk_length']))
+                resume_at = window_end
+                if duration and resume_at >= duration:
+                    break
+
+            except (MemoryError, MemoryPressure) as e:
+                # Liberar o modelo atual e continuar do último segmento com config mais leve
+                commit(window)
+                segments = None
+                del model
+                gc.collect()
+                reason = str(e) or type(e).__name__
+                degrade_on_memory_pressure(state, degradations, reason, resume_at)
+                # O recarregamento também pode estourar: mesma escada do load inicial
+                model = load_model_degrading(state, degradations, device, cpu_threads, resume_at)
+                guard.rearm()
+
+        metrics.decode_finished()
+        segment_store = collected.build()
+        if writer is None:
+            text = segment_store.full_text()
+            text_length = len(text)
+        else:
+            text = writer.buffered_text
+            text_length = writer.text_length
 
-        print(f"📊 Transcription completed: {len(text)} characters from {segment_count} segments", file=sys.stderr)
+        print(f"📊 Transcription completed: {text_length} characters from {segment_count} segments", file=sys.stderr)
         send_progress(92, "Finalizando transcrição...")
 
         # Limpar modelo da memória
@@ -343,7 +559,17 @@ def transcribe_audio_streaming(audio_path, model_size='medium'):
 
         send_progress(95, "Transcrição concluída!")
 
-        return text
+        stats = {
+            'model_size': state['model_size'],
+            'compute_type': state['compute_type'],
+            'degradations': degradations,
+            'repetition_guard': repetition_guard.summary(),
+            'segment_store': segment_store,
+        }
+        if guard.enabled:
+            stats['peak_rss_mb'] = round(guard.peak_rss_mb, 1)
+
+        return text, stats
 
     except Exception as e:
         print(f"❌ Transcription error: {str(e)}", file=sys.stderr)
@@ -572,6 +798,77 @@ def transcribe_with_chunking(audio_path, model_size, duration):
             except Exception as e:
                 print(f"⚠️ Erro ao deletar diretório temporário {temp_dir}: {e}", file=sys.stderr)
 
+def transcribe_distributed(audio_path, workers, writer, duration):
+    """
+    Modo coordenador: divide o áudio em chunks e distribui entre chunk_worker.py
+
+    Chunks de workers que caem são reatribuídos (chunk_coordinator.py); os
+    segmentos são escritos no writer em ordem, à medida que a sequência de
+    chunks concluídos avança.
+
+    Returns:
+        Estatísticas da transcrição (mesmo formato de transcribe_audio_streaming)
+    """
+    chunk_seconds = int(get_cli_option('chunk-seconds',
+                                       os.environ.get('TRANSCRIBE_CHUNK_SECONDS', DISTRIBUTED_CHUNK_SECONDS)))
+    chunk_files = []
+    temp_dir = None
+    try:
+        send_progress(5, "Dividindo áudio em chunks...")
+        chunk_files, temp_dir = split_audio_into_chunks(audio_path, chunk_seconds)
+
+        # ffmpeg -c copy corta em quadros: usar a duração real de cada chunk para os offsets
+        chunks = []
+        offset = 0.0
+        for index, chunk_path in enumerate(chunk_files):
+            chunk_duration = get_duration(chunk_path) or chunk_seconds
+            chunks.append(Chunk(index, chunk_path, offset, chunk_duration))
+            offset += chunk_duration
+
+        options = get_whisper_options(duration)
+        coordinator = ChunkCoordinator(
+            workers,
+            beam_size=options['beam_size'],
+            # Chunks independentes: sem contexto entre eles
+            condition_on_previous_text=False,
+        )
+
+        collected = SegmentStoreBuilder()
+        done = [0]
+
+        def on_result(index, segments):
+            for segment in segments:
+                collected.append(segment['start'], segment['end'], segment['text'],
+                                 segment.get('avg_logprob', 0.0))
+                writer.add_segment(segment['start'], segment['end'], segment['text'],
+                                   segment.get('avg_logprob'))
+            done[0] += 1
+            send_progress(10 + int(done[0] / len(chunks) * 80), f"Chunk {done[0]}/{len(chunks)} concluído")
+
+        send_progress(10, f"Distribuindo {len(chunks)} chunks...")
+        worker_stats = coordinator.run(chunks, on_result)
+        for url, stat in worker_stats.items():
+            print(f"📊 Worker {url}: {stat['chunks']} chunks, {stat['failures']} failures, "
+                  f"{stat['seconds']:.0f}s", file=sys.stderr)
+
+        return {
+            'degradations': [],
+            'segment_store': collected.build(),
+            'workers': worker_stats,
+        }
+
+    finally:
+        for chunk_path in chunk_files:
+            try:
+                os.unlink(chunk_path)
+            except OSError as e:
+                print(f"⚠️ Erro ao deletar chunk {chunk_path}: {e}", file=sys.stderr)
+        if temp_dir and os.path.exists(temp_dir):
+            try:
+                os.rmdir(temp_dir)
+            except OSError as e:
+                print(f"⚠️ Erro ao deletar diretório temporário {temp_dir}: {e}", file=sys.stderr)
+
 def main():
     """Função principal com melhor tratamento de erros"""
     if len(sys.argv) < 2:
@@ -586,13 +883,20 @@ def main():
     if simple_mode:
         print(f"🔧 [SIMPLE MODE] Processing single file without internal chunking", file=sys.stderr)
 
+    # Modo coordenador: --workers host:porta,... (ou TRANSCRIBE_WORKERS), ver chunk_worker.py
+    workers = parse_workers(get_cli_option('workers', os.environ.get('TRANSCRIBE_WORKERS')))
+
+    # Threads/afinidade de CPU (permite vários jobs concorrentes no mesmo host)
+    cpu_threads = configure_cpu_resources(model_size)
+
     # Diagnostic: Log environment variables related to ffmpeg
     print(f"🔍 [DEBUG] FFMPEG_PATH env: {os.environ.get('FFMPEG_PATH', 'NOT SET')}", file=sys.stderr)
     print(f"🔍 [DEBUG] IMAGEIO_FFMPEG_EXE env: {os.environ.get('IMAGEIO_FFMPEG_EXE', 'NOT SET')}", file=sys.stderr)
 
     # Pre-check ffmpeg availability (early detection of issues)
     try:
-        ffmpeg_path = check_ffmpeg_installed()
+        with metrics.stage('ffmpeg_discovery'):
+            ffmpeg_path = check_ffmpeg_installed()
         if ffmpeg_path:
             print(f"✅ [STARTUP] ffmpeg detected: {ffmpeg_path}", file=sys.stderr)
         else:
@@ -613,6 +917,7 @@ def main():
     if file_size > 2 * 1024**3 and model_size == 'large':  # > 2GB com modelo large
         print(f"⚠️ WARNING: Large file with large model. Consider using 'medium' or 'small' model.", file=sys.stderr)
     
+    writer = None
     try:
         start_time = time.time()
         
@@ -620,10 +925,13 @@ def main():
         
         # Preparar áudio
         print(f"📂 Processing file: {input_path}", file=sys.stderr)
-        audio_path, created_new_file = prepare_audio(input_path)
+        with metrics.stage('audio_extraction'):
+            audio_path, created_new_file = prepare_audio(input_path)
 
         # Obter duração do áudio para escolher estratégia
-        duration = get_duration(audio_path)
+        with metrics.stage('duration_probe'):
+            duration = get_duration(audio_path)
+        metrics.record('audio_duration', round(duration, 2))
         print(f"📊 Audio duration: {duration:.2f}s ({duration/60:.2f}min)", file=sys.stderr)
 
         # Threshold para chunking: 60 minutos (3600 segundos)
@@ -632,18 +940,39 @@ def main():
         # Transcrever (escolher estratégia baseado na duração e modo)
         print(f"🎤 Transcribing with model: {model_size}", file=sys.stderr)
 
+        transcription_stats = {}
+
+        # Resultado escrito incrementalmente no _transcription.json (ver result_writer.py)
+        output_file = input_path.rsplit('.', 1)[0] + '_transcription.json'
+        writer = StreamingResultWriter(
+            output_file,
+            compression=os.environ.get('TRANSCRIBE_RESULT_COMPRESSION'),
+            spill_threshold=OUTPUT_FILE_THRESHOLD
+        )
+
         # Se --simple flag está presente, usar modo simples (V3 architecture)
         if simple_mode:
+            mode = 'simple'
             print(f"✅ Simple mode: processing file directly", file=sys.stderr)
-            text = transcribe_simple(audio_path, model_size)
+            with metrics.stage('decode'):
+                writer.write_text(transcribe_simple(audio_path, model_size))
+        elif workers:
+            mode = 'distributed'
+            print(f"🌐 Distributed mode: {len(workers)} chunk workers", file=sys.stderr)
+            with metrics.stage('decode'):
+                transcription_stats = transcribe_distributed(audio_path, workers, writer, duration)
         elif duration > CHUNKING_THRESHOLD:
+            mode = 'chunking'
             # DEPRECATED: Python chunking interno (será removido após V3 estar estável)
             print(f"⚠️ [DEPRECATED] Using Python internal chunking - will be replaced by V3", file=sys.stderr)
             print(f"⚠️ Long audio ({duration/60:.1f}min) detected: using chunking strategy", file=sys.stderr)
-            text = transcribe_with_chunking(audio_path, model_size, duration)
+            with metrics.stage('decode'):
+                writer.write_text(transcribe_with_chunking(audio_path, model_size, duration))
         else:
+            mode = 'streaming'
             print(f"✅ Normal duration ({duration/60:.1f}min): using standard method", file=sys.stderr)
-            text = transcribe_audio_streaming(audio_path, model_size)
+            _text, transcription_stats = transcribe_audio_streaming(
+                audio_path, model_size, cpu_threads, writer, duration=duration)
         
         processing_time = int(time.time() - start_time)
         print(f"⏱️ Total time: {processing_time}s ({processing_time/60:.2f}min)", file=sys.stderr)
@@ -651,78 +980,97 @@ def main():
         send_progress(98, "Preparando resultado...")
         
         # Para textos muito grandes, considerar comprimir ou dividir
-        text_size = len(text)
+        text_size = writer.text_length
         if text_size > 5_000_000:  # > 5MB de texto
             print(f"⚠️ Very large text ({text_size} chars), consider post-processing", file=sys.stderr)
         
-        # Preparar resultado
+        # Preparar resultado (o texto já está no writer)
         result = {
             'success': True,
-            'text': text,
             'audio_path': audio_path if created_new_file else None,
             'processing_time': processing_time,
             'input_type': 'audio' if is_audio_file(input_path) else 'video',
             'text_length': text_size
         }
+
+        # Degradações por pressão de memória (job terminou com config mais leve)
+        degradations = transcription_stats.get('degradations', [])
+        if degradations:
+            result['degraded'] = True
+            result['degradations'] = degradations
+            result['model_size'] = transcription_stats['model_size']
+            result['compute_type'] = transcription_stats['compute_type']
         
+        # Segmentos com timestamps (arquivo binário compacto, ver segment_store.py)
+        segments_file = None
+        segment_store = transcription_stats.get('segment_store')
+        save_segments = '--segments' in sys.argv or os.environ.get('TRANSCRIBE_SAVE_SEGMENTS') == '1'
+        if save_segments and segment_store is not None:
+            segments_file = input_path.rsplit('.', 1)[0] + '_segments.bin'
+            segment_store.save(segments_file)
+            result['segments_file'] = segments_file
+            print(f"💾 {len(segment_store)} segments saved to {segments_file} "
+                  f"({segment_store.nbytes / 1024**2:.2f} MB)", file=sys.stderr)
+
+        # Ativações do guard de loops de repetição
+        repetition_stats = transcription_stats.get('repetition_guard')
+        if repetition_stats and repetition_stats['activations']:
+            result['repetition_guard'] = repetition_stats
+
+        # Distribuição de chunks por worker (modo --workers)
+        if transcription_stats.get('workers'):
+            result['workers'] = transcription_stats['workers']
+
+        # Métricas por etapa: no resultado e em uma linha METRICS: no stderr
+        result['metrics'] = metrics.emit()
+
+        # Histórico para o modelo de custo (ETA da fila / admissão, ver job_stats.py).
+        # Execuções degradadas misturam duas configurações e distorceriam o ajuste
+        if degradations:
+            print("📉 Degraded run not recorded in job stats", file=sys.stderr)
+        else:
+            record_transcription(
+                model_size=transcription_stats.get('model_size', model_size),
+                audio_duration=duration,
+                processing_time=time.time() - start_time,
+                compute_type=transcription_stats.get('compute_type'),
+                mode=mode,
+                decode_time=result['metrics']['stages'].get('decode'),
+            )
+
         send_progress(100, "Transcrição concluída!")
 
-        # Serializar e enviar resultado
-        # IMPORTANTE: Sempre usar arquivo para textos > 30KB para evitar stack overflow
-        # O json.dumps() com ensure_ascii=False pode causar crash em strings UTF-8 grandes
-        OUTPUT_FILE_THRESHOLD = 30_000  # 30KB - limite seguro para stdout
+        if writer.spilled:
+            # Texto grande (ou comprimido): publicar o arquivo e enviar só a referência
+            output_file = writer.finish(result)
+            small_result = {
+                'success': True,
+                'text_file': output_file,
+                'processing_time': processing_time,
+                'text_length': text_size
+            }
+            if writer.compression:
+                small_result['compression'] = writer.compression
+            if degradations:
+                small_result['degraded'] = True
+                small_result['degradations'] = degradations
+            if segments_file:
+                small_result['segments_file'] = segments_file
+            small_result['metrics'] = result['metrics']
+            print(json.dumps(small_result))
+            print(f"📤 Result saved to file: {output_file}", file=sys.stderr)
+        else:
+            # Textos pequenos podem ir via stdout
+            result = dict({'success': True, 'text': writer.buffered_text}, **result)
+            writer.abort()
+            print(json.dumps(result, ensure_ascii=False))
 
-        try:
-            if text_size > OUTPUT_FILE_THRESHOLD:
-                # Salvar em arquivo para evitar stack overflow no json.dumps()
-                output_file = input_path.rsplit('.', 1)[0] + '_transcription.json'
-
-                # Usar json.dump() direto no arquivo (mais seguro que json.dumps())
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, ensure_ascii=False)
-
-                # Enviar referência ao arquivo via stdout (JSON pequeno, seguro)
-                small_result = {
-                    'success': True,
-                    'text_file': output_file,
-                    'processing_time': processing_time,
-                    'text_length': text_size
-                }
-                print(json.dumps(small_result))
-            else:
-                # Textos pequenos podem ir via stdout
-                print(json.dumps(result, ensure_ascii=False))
-
-            sys.stdout.flush()
-
-        except Exception as json_error:
-            # Fallback: se falhar, tentar salvar em arquivo
-            print(f"⚠️ JSON serialization failed, using file fallback: {str(json_error)}", file=sys.stderr)
-            try:
-                output_file = input_path.rsplit('.', 1)[0] + '_transcription.json'
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    # Escrever manualmente para evitar json.dumps()
-                    f.write('{"success": true, "text": ')
-                    f.write(json.dumps(text, ensure_ascii=False))
-                    f.write(f', "processing_time": {processing_time}')
-                    f.write(f', "text_length": {text_size}')
-                    if created_new_file and audio_path:
-                        f.write(f', "audio_path": "{audio_path}"')
-                    f.write('}')
-
-                fallback_result = {
-                    'success': True,
-                    'text_file': output_file,
-                    'processing_time': processing_time,
-                    'text_length': text_size
-                }
-                print(json.dumps(fallback_result))
-                print(f"📤 Fallback: Result saved to file: {output_file}", file=sys.stderr)
-            except Exception as fallback_error:
-                print(f"❌ Fallback also failed: {str(fallback_error)}", file=sys.stderr)
-                raise json_error
+        sys.stdout.flush()
     
     except Exception as e:
+        if writer is not None:
+            writer.abort()
+        metrics.emit(success=False)
         send_progress(0, f"Erro: {str(e)}")
         error_result = {
             'success': False,
@@ -732,4 +1080,7 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Profiling opcional (--profile ou SDC_PROFILE): arquivos ao lado da entrada
+    profile_base = (sys.argv[1].rsplit('.', 1)[0] if len(sys.argv) > 1 else 'transcribe') + '_profile'
+    with profiled(profile_base, profile_mode()):
+        main()
\ No newline at end of file
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker persistente de transcrição para gravações curtas
+
+Mantém um único modelo carregado e recebe jobs via stdin (uma linha JSON por
+job). As janelas de 30s de todos os jobs em andamento são agrupadas em lotes
+de inferência compartilhados pelo MicroBatchScheduler, e cada resultado é
+devolvido no stdout como uma linha JSON assim que o job termina.
+
+Os jobs esperam em uma fila SEJF (job_scheduler.py): menor custo previsto
+primeiro (job_stats.py), com envelhecimento e uma raia para jobs pequenos.
+
+Todo job passa pelo journal durável (job_journal.py): após um restart o
+worker retoma os jobs não concluídos, reaproveitando as janelas já
+transcritas. Resultados de jobs retomados saem com "recovered": true; um id
+já concluído reenviado recebe o resultado gravado, sem nova transcrição.
+
+Entrada (stdin):   {"id": "abc", "path": "/uploads/nota.m4a", "duration": 312.5}
+                   (duration é opcional; sem ela a duração é lida do arquivo)
+Saída (stdout):    {"id": "abc", "success": true, "text": "...", "processing_time": 3.2, ...}
+
+Uso:
+    python transcription_worker.py [model_size] [--batch-size 8] [--max-wait 0.5]
+                                   [--tiny-workers 1] [--tiny-threshold 120] [--aging-rate 1.0]
+"""
+
+import sys
+import io
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+from batch_scheduler import MicroBatchScheduler, SAMPLE_RATE
+from model_registry import load_whisper_model
+from capacity_planner import apply_cpu_affinity, parse_cpu_list
+from job_scheduler import JobScheduler, TINY_JOB_SECONDS, AGING_RATE
+from job_stats import JobStats
+from job_journal import JobJournal, JobJournalError, DONE, FAILED
+
+# Forçar UTF-8 no stdout e stderr ANTES de qualquer print
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+_stdout_lock = threading.Lock()
+
+
+class JobRequestError(Exception):
+    """Linha de job sem os campos esperados"""
+    pass
+
+
+def emit(result):
+    """Escreve uma linha JSON de resultado no stdout (thread-safe)"""
+    line = json.dumps(result, ensure_ascii=False)
+    with _stdout_lock:
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+
+def make_batched_infer(model, beam_size=5):
+    """
+    Cria a função de inferência em lote usada pelo scheduler
+
+    As janelas (de jobs diferentes) são concatenadas em um único array e
+    passadas ao BatchedInferencePipeline com clip_timestamps apontando para
+    cada janela; os segmentos voltam em tempo do array concatenado e são
+    remapeados para o job/offset originais.
+    """
+    from faster_whisper import BatchedInferencePipeline
+
+    pipeline = BatchedInferencePipeline(model)
+
+    def infer(windows):
+        clips = []
+        position = 0
+        for window in windows:
+            length = len(window.audio)
+            clips.append({'start': position / SAMPLE_RATE, 'end': (position + length) / SAMPLE_RATE})
+            position += length
+
+        audio = np.concatenate([w.audio for w in windows]).astype(np.float32, copy=False)
+        clip_starts = [clip['start'] for clip in clips]
+
+        segments, _info = pipeline.transcribe(
+            audio,
+            language='pt',
+            clip_timestamps=clips,
+            batch_size=len(windows),
+            beam_size=beam_size,
+        )
+
+        results = [[] for _ in windows]
+        for segment in segments:
+            # Pequena tolerância: o início do segmento pode arredondar para antes do clip
+            index = max(0, bisect_right(clip_starts, segment.start + 1e-3) - 1)
+            window = windows[index]
+            shift = window.offset - clip_starts[index]
+            results[index].append({
+                'start': round(segment.start + shift, 3),
+                'end': round(segment.end + shift, 3),
+                'text': segment.text,
+                'avg_logprob': segment.avg_logprob,
+            })
+        return results
+
+    return infer
+
+
+def validate_request(request):
+    """
+    Valida a linha de job antes de registrá-la e enfileirá-la
+
+    Raises:
+        JobRequestError: não é objeto, id não textual, sem path ou duration não numérica
+    """
+    if not isinstance(request, dict):
+        raise JobRequestError(f"Job must be a JSON object, got {type(request).__name__}")
+    job_id = request.get('id')
+    if job_id not in (None, '') and not isinstance(job_id, str):
+        raise JobRequestError(f"Invalid 'id': {job_id!r} (must be a string)")
+    if not isinstance(request.get('path'), str) or not request['path'].strip():
+        raise JobRequestError("Job without 'path'")
+    duration = request.get('duration')
+    if duration is not None:
+        try:
+            if float(duration) < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise JobRequestError(f"Invalid 'duration': {duration!r}")
+    return request
+
+
+def probe_duration(request):
+    """Duração do áudio (s) sem decodificá-lo: campo do job, container ou tamanho"""
+    if request.get('duration'):
+        return float(request['duration'])
+    try:
+        import av
+        with av.open(request['path']) as container:
+            if container.duration:
+                return container.duration / av.time_base
+    except Exception as e:
+        print(f"⚠️ Could not probe duration of {request.get('path')}: {e}", file=sys.stderr)
+    try:
+        # Estimativa grosseira: ~128 kbps
+        return os.path.getsize(request['path']) / 16000
+    except OSError:
+        return 0.0
+
+
+def process_job(scheduler, request, priority=0.0, queued_for=0.0, journal=None, recovered=False):
+    """Decodifica o áudio do job, submete ao scheduler e emite o resultado"""
+    from faster_whisper import decode_audio
+
+    job_id = request.get('id')
+    start_time = time.time()
+    try:
+        completed = {}
+        if journal is not None:
+            journal.mark_running(job_id)
+            completed = journal.completed_chunks(job_id)
+            if completed:
+                print(f"♻️ Job {job_id}: resuming with {len(completed)} windows already transcribed",
+                      file=sys.stderr)
+
+        audio = decode_audio(request['path'], sampling_rate=SAMPLE_RATE)
+        job = scheduler.submit(job_id, audio, priority=priority, completed=completed)
+        result = job.wait()
+        output = {
+            'id': job_id,
+            'success': True,
+            'text': result['text'],
+            'text_length': len(result['text']),
+            'segments': len(result['segments']),
+            'duration': job.duration,
+            'processing_time': round(time.time() - start_time, 3),
+            'queue_wait': round(queued_for, 3),
+        }
+        if recovered:
+            output['recovered'] = True
+        if journal is not None:
+            journal.mark_done(job_id, output)
+        emit(output)
+        print(f"✅ Job {job_id} done: {job.duration:.1f}s audio in {time.time() - start_time:.1f}s", file=sys.stderr)
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}", file=sys.stderr)
+        if journal is not None:
+            try:
+                journal.mark_failed(job_id, e)
+            except JobJournalError as journal_error:
+                print(f"⚠️ {journal_error}", file=sys.stderr)
+        emit({'id': job_id, 'success': False, 'error': str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker persistente de transcrição com micro-batching')
+    parser.add_argument('model_size', nargs='?', default='medium')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-wait', type=float, default=0.5,
+                        help='Espera máxima (s) para completar um lote')
+    parser.add_argument('--beam-size', type=int, default=5)
+    parser.add_argument('--decoders', type=int, default=4,
+                        help='Jobs decodificando áudio em paralelo')
+    parser.add_argument('--tiny-workers', type=int, default=1,
+                        help='Workers exclusivos para jobs pequenos')
+    parser.add_argument('--tiny-threshold', type=float, default=TINY_JOB_SECONDS,
+                        help='Custo previsto (s) máximo de um job pequeno')
+    parser.add_argument('--aging-rate', type=float, default=AGING_RATE,
+                        help='Envelhecimento da prioridade (0 = SEJF puro)')
+    parser.add_argument('--cpu-threads', type=int, default=0)
+    parser.add_argument('--cpu-affinity', default=None, help="Núcleos, ex.: '0-3,8'")
+    args = parser.parse_args()
+
+    cpu_threads = args.cpu_threads
+    if args.cpu_affinity:
+        cores = parse_cpu_list(args.cpu_affinity)
+        apply_cpu_affinity(cores)
+        cpu_threads = cpu_threads or len(cores)
+
+    print(f"🚀 Starting transcription worker (model={args.model_size}, batch_size={args.batch_size}, "
+          f"max_wait={args.max_wait}s)", file=sys.stderr)
+
+    model, compute_type = load_whisper_model(args.model_size, device='cpu', cpu_threads=cpu_threads,
+                                             warmup=True)
+    journal = JobJournal()
+    scheduler = MicroBatchScheduler(
+        make_batched_infer(model, beam_size=args.beam_size),
+        batch_size=args.batch_size,
+        max_wait=args.max_wait,
+        on_window=journal.record_chunk,
+    )
+    scheduler.start()
+    print(f"✅ Worker ready (compute_type={compute_type})", file=sys.stderr)
+
+    def run_job(job):
+        request, recovered = job.payload
+        process_job(scheduler, request, priority=job.key,
+                    queued_for=job.started_at - job.submitted_at,
+                    journal=journal, recovered=recovered)
+
+    job_queue = JobScheduler(
+        run_job,
+        workers=args.decoders,
+        tiny_workers=args.tiny_workers,
+        tiny_threshold=args.tiny_threshold,
+        aging_rate=args.aging_rate,
+    )
+    job_queue.start()
+    stats = JobStats()
+
+    def enqueue(request, recovered=False):
+        cost = stats.predict_cost(probe_duration(request), args.model_size)['seconds']
+        job_queue.submit(request['id'], (request, recovered), cost)
+
+    def reject(job_id, error):
+        """Erro do job no stdout e no journal (não volta a ser retomado)"""
+        print(f"❌ Job {job_id} could not be queued: {error}", file=sys.stderr)
+        try:
+            journal.mark_failed(job_id, error)
+        except JobJournalError as journal_error:
+            print(f"⚠️ {journal_error}", file=sys.stderr)
+        emit({'id': job_id, 'success': False, 'error': str(error)})
+
+    # Retomar jobs interrompidos pelo último restart
+    for job_id, request in journal.recover():
+        print(f"♻️ Recovering job {job_id} from journal", file=sys.stderr)
+        try:
+            enqueue(validate_request(request), recovered=True)
+        except Exception as e:
+            reject(job_id, e)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit({'success': False, 'error': f'Invalid JSON: {e}'})
+            continue
+
+        job_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            validate_request(request)
+        except JobRequestError as e:
+            print(f"❌ Rejected job {job_id!r}: {e}", file=sys.stderr)
+            emit({'id': job_id, 'success': False, 'error': str(e)})
+            continue
+
+        # "id": null (ou vazio) também recebe id novo: o journal não rastreia linhas sem chave
+        if not request.get('id'):
+            request['id'] = uuid.uuid4().hex
+        try:
+            if not journal.submit(request['id'], request):
+                existing = journal.get(request['id'])
+                if existing['state'] == DONE:
+                    emit(existing['result'])
+                    continue
+                if existing['state'] != FAILED:
+                    print(f"⚠️ Job {request['id']} already queued, ignoring duplicate", file=sys.stderr)
+                    continue
+            enqueue(request)
+        except Exception as e:
+            # Um job ruim não derruba o worker: erro para este id e segue lendo o stdin
+            reject(request['id'], e)
+
+    job_queue.stop()
+    scheduler.stop()
+    stats.close()
+    journal.close()
+    print(f"📊 Worker stats: {json.dumps(scheduler.summary())}", file=sys.stderr)
+    print(f"📊 Queue stats: {json.dumps(job_queue.summary())}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tabela de tiers de decodificação por duração do áudio
+
+get_whisper_options (transcribe.py) escolhe beam_size e
+condition_on_previous_text pelo tier da duração. A tabela padrão abaixo é a
+configuração histórica; benchmark_whisper.py gera uma tabela baseada em
+medições (RTF/WER) em whisper_tiers.json, que passa a ter precedência.
+
+Formato do arquivo:
+
+    {
+      "generated_at": "...",
+      "model_size": "medium",
+      "compute_type": "int8",
+      "tiers": [
+        {"min_duration": 3600, "config": "minimal", "beam_size": 1,
+         "condition_on_previous_text": false},
+        ...
+      ]
+    }
+"""
+
+import os
+import sys
+import json
+
+TIERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'whisper_tiers.json')
+
+# Ordenada pela maior duração mínima primeiro
+DEFAULT_TIERS = [
+    {'min_duration': 3600, 'config': 'minimal', 'beam_size': 1, 'condition_on_previous_text': False},
+    {'min_duration': 1800, 'config': 'conservative', 'beam_size': 3, 'condition_on_previous_text': False},
+    {'min_duration': 600, 'config': 'balanced', 'beam_size': 5, 'condition_on_previous_text': True},
+    {'min_duration': 0, 'config': 'quality', 'beam_size': 5, 'condition_on_previous_text': True},
+]
+
+
+def _validate(tiers):
+    if not tiers or not isinstance(tiers, list):
+        raise ValueError("tier table must be a non-empty list")
+    for tier in tiers:
+        if 'min_duration' not in tier or 'beam_size' not in tier:
+            raise ValueError(f"tier without min_duration/beam_size: {tier}")
+    ordered = sorted(tiers, key=lambda tier: tier['min_duration'], reverse=True)
+    if ordered[-1]['min_duration'] > 0:
+        raise ValueError("tier table must cover duration 0")
+    return ordered
+
+
+def load_tiers(path=None):
+    """
+    Tabela de tiers: WHISPER_TIERS_FILE, whisper_tiers.json ou a padrão
+
+    Um arquivo inválido é ignorado (com aviso) para não derrubar transcrições.
+    """
+    path = path or os.environ.get('WHISPER_TIERS_FILE') or TIERS_FILE
+    if not os.path.exists(path):
+        return DEFAULT_TIERS
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return _validate(json.load(f)['tiers'])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ Invalid tier table {path} ({e}), using defaults", file=sys.stderr)
+        return DEFAULT_TIERS
+
+
+def select_tier(duration, tiers=None):
+    """Tier cuja duração mínima é a maior que não passa de duration"""
+    for tier in tiers or DEFAULT_TIERS:
+        if duration >= tier['min_duration']:
+            return tier
+    return (tiers or DEFAULT_TIERS)[-1]
+
+
+def save_tiers(path, tiers, **metadata):
+    """Grava a tabela (com metadados do benchmark que a gerou)"""
+    data = dict(metadata)
+    data['tiers'] = _validate(tiers)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return path
@@ -5,8 +5,8 @@ import fs from 'fs';
 
 const router = Router();
 
-// Endpoint para gerar ata completa
-router.post('/gerar-ata', async (req: Request, res: Response) => {
+// Executa o gerar_ata.py com os dados da requisição (geração completa ou regeneração)
+function executarGerarAta(body: any, res: Response) {
   try {
     const pythonPath = process.env.PYTHON_PATH || 'python3';
 
@@ -26,7 +26,7 @@ router.post('/gerar-ata', async (req: Request, res: Response) => {
     });
 
     // Enviar dados para o Python via stdin
-    python.stdin.write(JSON.stringify(req.body));
+    python.stdin.write(JSON.stringify(body));
     python.stdin.end();
 
     let output = '';
@@ -96,6 +96,22 @@ router.post('/gerar-ata', async (req: Request, res: Response) => {
       detalhes: err.message
     });
   }
+}
+
+// Endpoint para gerar ata completa
+router.post('/gerar-ata', async (req: Request, res: Response) => {
+  return executarGerarAta(req.body, res);
+});
+
+// Endpoint para regerar a ata com novos metadados (reaproveita a extração da Fase 1)
+router.post('/regenerar-ata', async (req: Request, res: Response) => {
+  if (!req.body?.extracaoId) {
+    return res.status(400).json({
+      status: 'erro',
+      mensagem: 'Campo obrigatório faltando: extracaoId'
+    });
+  }
+  return executarGerarAta(req.body, res);
 });
 
 // Endpoint para download de ata gerada
@@ -152,14 +168,16 @@ try:
     from gerador_ata.ollama_service import ollama_service
     from gerador_ata import config_ata
 
-    is_online = ollama_service.check_health()
+    # Status em cache + circuit breaker (não bate no Ollama com o circuito aberto)
+    is_online = ollama_service.health.is_available()
     modelos = ollama_service.list_models() if is_online else []
 
     result = {
         'status': 'online' if is_online else 'offline',
         'modelo_configurado': config_ata.OLLAMA_MODEL,
         'modelos_disponiveis': modelos,
-        'url': config_ata.OLLAMA_BASE_URL
+        'url': config_ata.OLLAMA_BASE_URL,
+        'saude': ollama_service.health.status()
     }
     print(json.dumps(result))
 except Exception as e: